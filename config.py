@@ -14,6 +14,58 @@ APP_NAME = "Arch Linux Automated Installer"
 APP_AUTHOR = "Arch Community"
 LOG_DIR = "/var/log"
 LOG_FILE = os.path.join(LOG_DIR, "archinstall.log")
+LOG_MAX_BYTES = 10 * 1024 * 1024  # ротация archinstall.log по размеру
+LOG_BACKUP_COUNT = 3
+LOG_BATCH_SIZE = 512  # максимум записей между сбросами файла на диск
+STARTUP_BUDGET_MS = 100  # бюджет на запуск main.py --help (см. --import-report)
+LOG_VIEWER_PAGE_LINES = 18  # строк лога на странице просмотра
+TRACE_FILE = os.path.join(LOG_DIR, "archinstall.trace.json")
+# Временной ряд ресурсов во время установки (utils.monitor)
+MONITOR_FILE = os.path.join(LOG_DIR, "archinstall.monitor.csv")
+MONITOR_INTERVAL = 1.0  # секунды между отсчетами
+EVENT_LOG_FILE = os.path.join(LOG_DIR, "archinstall.events.jsonl")
+# История установок (utils.history, main.py --history-report). /var/log
+# live-образа не переживает перезагрузку: путь можно задать через
+# ARCHINSTALL_HISTORY_DB или --history-db (например, на USB или сетевом
+# диске), а в конце установки история дописывается в /var/log целевой системы
+HISTORY_DB = os.environ.get('ARCHINSTALL_HISTORY_DB') or os.path.join(LOG_DIR, "archinstall.history.db")
+HISTORY_TARGET_DB = os.path.join("var", "log", "archinstall.history.db")  # относительно точки монтирования
+HISTORY_REGRESSION_RUNS = 10  # с каким числом прошлых запусков профиля сравнивать
+HISTORY_REGRESSION_FACTOR = 1.5  # этап медленнее медианы во столько раз - регрессия
+HISTORY_REGRESSION_MIN_SECONDS = 5.0  # и при этом медленнее хотя бы на столько секунд
+# Полный вывод команд, не поместившийся в память
+CAPTURE_DIR = os.path.join(LOG_DIR, "archinstall")
+CAPTURE_MEMORY_LIMIT = 256 * 1024  # символов вывода одной команды в памяти
+# Учет CPU, памяти и дискового ввода-вывода каждой команды (utils.resources):
+# фоновый опрос /proc на каждую команду, поэтому по умолчанию выключен
+RESOURCE_ACCOUNTING = False
+
+# Отпечаток готовой связки ключей pacman (utils.keyring)
+KEYRING_STATE_FILE = os.path.join(LOG_DIR, "archinstall.keyring.json")
+
+# Общий дедлайн обязательных проверок перед запуском (utils.validators)
+PREREQUISITE_DEADLINE = 30.0
+
+# Проверка сети (utils.netprobe): все точки опрашиваются одновременно.
+# Зеркала записаны как в mirrorlist; результаты проверки сети
+# используются и для выбора зеркал, если reflector не успел.
+CONNECTIVITY_MIRRORS = [
+    'https://geo.mirror.pkgbuild.com/$repo/os/$arch',
+    'https://mirrors.kernel.org/archlinux/$repo/os/$arch',
+    'https://mirror.rackspace.com/archlinux/$repo/os/$arch',
+    'https://mirror.leaseweb.net/archlinux/$repo/os/$arch',
+]
+CONNECTIVITY_ENDPOINTS = ['https://archlinux.org/']
+CONNECTIVITY_TIMEOUT = 5.0  # секунды на соединение и на чтение каждой точки
+CONNECTIVITY_SAMPLE_BYTES = 256 * 1024  # сколько читать для оценки скорости
+
+# Лимиты долгих сетевых команд (секунды): общий дедлайн и максимум без вывода
+COMMAND_TIMEOUTS: Dict[str, Dict[str, float]] = {
+    'reflector': {'timeout': 180, 'stall_timeout': 60},
+    'pacman_install': {'timeout': 3 * 60 * 60, 'stall_timeout': 600},
+    'git_clone': {'timeout': 300, 'stall_timeout': 120},
+    'pacman_key': {'timeout': 300, 'stall_timeout': 120},
+}
 
 # ============================================================================
 # ТЕКУЩИЙ ЯЗЫК И ПЕРЕВОДЫ
@@ -195,6 +247,35 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'open_chroot': 'Открыть chroot для ручных настроек',
         'view_logs': 'Посмотреть логи установки',
         
+        # Просмотр логов
+        'log_next_page': 'Далее',
+        'log_prev_page': 'Назад',
+        'log_close': 'Закрыть',
+        'log_actions': 'Действия',
+        'log_actions_title': 'Навигация по логу',
+        'log_first_page': 'В начало',
+        'log_last_page': 'В конец (обновить)',
+        'log_next_error': 'Следующая ошибка',
+        'log_prev_error': 'Предыдущая ошибка',
+        'log_filter_stage': 'Показать только этап',
+        'log_show_all': 'Показать весь лог',
+        'log_search': 'Поиск',
+        'log_search_next': 'Найти далее',
+        'log_search_prompt': 'Текст для поиска:',
+        'log_not_found': 'Ничего не найдено',
+        'log_no_errors': 'Ошибок больше нет',
+        'log_no_stages': 'В логе нет отметок этапов',
+        'log_empty': 'Лог пуст или не найден',
+        
+        # Рекомендации по железу
+        'warn_de_ram': '{de}: нужно не меньше {need} RAM, в системе {have}',
+        'warn_heavy_package': '{package}: при {have} RAM установка и работа будут упираться в swap (рекомендуется {need})',
+        'warn_disk_space': '{de}: нужно около {need} на диске, на целевом диске {have}',
+        'warn_continue': 'Все равно использовать этот выбор?',
+        'disk_space_estimate': 'Пакетов: {packages}, загрузка {download}, после установки {installed}.\nНужно {need}, в корневом разделе будет {have}.',
+        'disk_too_small': 'Недостаточно места на диске {disk}',
+        'recommended': 'рекомендуется',
+        
         # Главное меню
         'main_menu': 'Главное меню',
         'language': '1. Язык интерфейса',
@@ -390,6 +471,35 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         'open_chroot': 'Open chroot for manual configuration',
         'view_logs': 'View installation logs',
         
+        # Log viewer
+        'log_next_page': 'Next',
+        'log_prev_page': 'Back',
+        'log_close': 'Close',
+        'log_actions': 'Actions',
+        'log_actions_title': 'Log navigation',
+        'log_first_page': 'Go to start',
+        'log_last_page': 'Go to end (refresh)',
+        'log_next_error': 'Next error',
+        'log_prev_error': 'Previous error',
+        'log_filter_stage': 'Show only a stage',
+        'log_show_all': 'Show the whole log',
+        'log_search': 'Search',
+        'log_search_next': 'Find next',
+        'log_search_prompt': 'Text to search for:',
+        'log_not_found': 'Nothing found',
+        'log_no_errors': 'No more errors',
+        'log_no_stages': 'The log has no stage markers',
+        'log_empty': 'The log is empty or missing',
+        
+        # Hardware recommendations
+        'warn_de_ram': '{de}: needs at least {need} RAM, this machine has {have}',
+        'warn_heavy_package': '{package}: with {have} RAM installing and using it will thrash swap ({need} recommended)',
+        'warn_disk_space': '{de}: needs about {need} of disk, the target disk has {have}',
+        'warn_continue': 'Use this choice anyway?',
+        'disk_space_estimate': 'Packages: {packages}, download {download}, installed {installed}.\nNeeded {need}, the root partition will have {have}.',
+        'disk_too_small': 'Not enough disk space on {disk}',
+        'recommended': 'recommended',
+        
         # Main menu
         'main_menu': 'Main menu',
         'language': '1. Interface language',
@@ -477,9 +587,14 @@ class InstallationConfig:
         self.locale = ['en_US.UTF-8']
         self.multilib = False
         self.aur_helper = None
+        self.swap_type = 'file'
         self.swap_size = 2
         self.use_reflector = True
         
+        # Параллельность (installer.defaults подбирает под железо)
+        self.parallel_downloads = 5
+        self.make_jobs = 1
+        
         # Дополнительные пакеты
         self.additional_packages = []
         
@@ -2,8 +2,8 @@
 Установка загрузчика: GRUB или systemd-boot.
 """
 
-from typing import Optional
-from utils.executor import run_command
+from typing import List, Optional
+from utils.executor import Cmd, run_command, run_in_chroot, write_file
 from utils.logger import logger
 from ui.dialogs import get_dialog
 from config import t
@@ -55,6 +55,21 @@ def select_bootloader(dialog, is_uefi: bool) -> Optional[str]:
     
     return 'grub'
 
+def get_bootloader_packages(bootloader: str, is_uefi: bool) -> List[str]:
+    """
+    Получить пакеты загрузчика.
+    
+    Args:
+        bootloader: 'grub' или 'systemd-boot'
+        is_uefi: True если UEFI
+    
+    Returns:
+        Список пакетов (systemd-boot входит в systemd)
+    """
+    if bootloader != 'grub':
+        return []
+    return ['grub', 'efibootmgr'] if is_uefi else ['grub']
+
 def install_grub(disk: str, is_uefi: bool, mount_point: str = '/mnt') -> bool:
     """
     Установить GRUB загрузчик.
@@ -71,13 +86,11 @@ def install_grub(disk: str, is_uefi: bool, mount_point: str = '/mnt') -> bool:
         logger.info(f"Installing GRUB bootloader on {disk}")
         
         # Установить пакеты
-        packages = ['grub']
-        if is_uefi:
-            packages.append('efibootmgr')
+        packages = get_bootloader_packages('grub', is_uefi)
         
-        packages_str = ' '.join(packages)
-        run_command(
-            f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm",
+        run_in_chroot(
+            Cmd(['pacman', '-S', *packages, '--noconfirm']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -85,24 +98,27 @@ def install_grub(disk: str, is_uefi: bool, mount_point: str = '/mnt') -> bool:
         # Установить GRUB
         if is_uefi:
             logger.debug("Installing GRUB for UEFI")
-            run_command(
-                f"arch-chroot {mount_point} grub-install --target=x86_64-efi "
-                f"--efi-directory=/boot/efi --bootloader-id=GRUB",
+            run_in_chroot(
+                Cmd(['grub-install', '--target=x86_64-efi',
+                     '--efi-directory=/boot/efi', '--bootloader-id=GRUB']),
+                mount_point=mount_point,
                 check=True,
                 log=True
             )
         else:
             logger.debug("Installing GRUB for BIOS")
-            run_command(
-                f"arch-chroot {mount_point} grub-install --target=i386-pc {disk}",
+            run_in_chroot(
+                Cmd(['grub-install', '--target=i386-pc', disk]),
+                mount_point=mount_point,
                 check=True,
                 log=True
             )
         
         # Сгенерировать конфиг GRUB
         logger.debug("Generating GRUB config")
-        run_command(
-            f"arch-chroot {mount_point} grub-mkconfig -o /boot/grub/grub.cfg",
+        run_in_chroot(
+            Cmd(['grub-mkconfig', '-o', '/boot/grub/grub.cfg']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -129,8 +145,9 @@ def install_systemd_boot(mount_point: str = '/mnt', kernel: str = 'linux') -> bo
         logger.info("Installing systemd-boot bootloader")
         
         # Установить systemd-boot
-        run_command(
-            f"arch-chroot {mount_point} bootctl --path=/boot install",
+        run_in_chroot(
+            Cmd(['bootctl', '--path=/boot', 'install']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -138,12 +155,12 @@ def install_systemd_boot(mount_point: str = '/mnt', kernel: str = 'linux') -> bo
         # Получить параметры ядра
         logger.debug("Configuring kernel parameters")
         returncode, root_uuid = run_command(
-            f"blkid -s UUID -o value $(mount | grep '{mount_point} ' | awk '{{print $1}}')",
+            Cmd(['findmnt', '-n', '-o', 'UUID', mount_point]),
             check=False,
             log=False
         )
         
-        if returncode != 0:
+        if returncode != 0 or not root_uuid.strip():
             logger.warning("Could not determine root UUID")
             root_uuid = "ROOT_UUID_HERE"
         else:
@@ -156,12 +173,7 @@ initrd  /initramfs-{kernel}.img
 options root=UUID={root_uuid} rw
 """
         
-        run_command(
-            f"cat > {mount_point}/boot/loader/entries/arch.conf << 'EOF'\n{entry_content}EOF",
-            check=True,
-            log=True,
-            shell=True
-        )
+        write_file(f"{mount_point}/boot/loader/entries/arch.conf", entry_content)
         
         # Создать запись для LTS
         entry_lts = f"""title   Arch Linux LTS
@@ -170,12 +182,7 @@ initrd  /initramfs-linux-lts.img
 options root=UUID={root_uuid} rw
 """
         
-        run_command(
-            f"cat > {mount_point}/boot/loader/entries/arch-lts.conf << 'EOF'\n{entry_lts}EOF",
-            check=True,
-            log=True,
-            shell=True
-        )
+        write_file(f"{mount_point}/boot/loader/entries/arch-lts.conf", entry_lts)
         
         # Создать конфиг loader
         loader_config = """default arch
@@ -184,12 +191,7 @@ console-mode auto
 editor yes
 """
         
-        run_command(
-            f"cat > {mount_point}/boot/loader/loader.conf << 'EOF'\n{loader_config}EOF",
-            check=True,
-            log=True,
-            shell=True
-        )
+        write_file(f"{mount_point}/boot/loader/loader.conf", loader_config)
         
         logger.info("systemd-boot installed successfully")
         return True
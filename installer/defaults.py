@@ -0,0 +1,327 @@
+"""
+Значения по умолчанию под конкретное железо.
+
+Требования DE в DESKTOP_ENVIRONMENTS хранятся строками ('2GB', '512MB')
+только для показа. Здесь они разбираются в мегабайты и сопоставляются
+со снимком железа (RAM, ядра, размер и тип целевого диска, видеокарта):
+recommend() выбирает профиль, DE, схему разметки, swap и параллельность
+загрузки/сборки, а check_selection() предупреждает о выборе, при котором
+система будет упираться в swap или не поместится на диск.
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Any
+from config import config, t
+from utils.logger import logger
+from utils.hwprobe import get_hardware_snapshot, read_block_device
+from installer.desktop import DESKTOP_ENVIRONMENTS
+from installer.packages import INSTALLATION_PROFILES, get_profile_packages
+
+# Пакеты, которым для установки и работы нужно больше памяти, чем
+# заявлено для их DE (MB): сборка кэшей и сотни приложений на 1-2 GB
+# RAM превращают установку в многочасовой swap.
+HEAVY_PACKAGES: Dict[str, int] = {
+    'kde-applications-meta': 4096,
+    'gnome-extra': 3072,
+}
+
+# Порядок предпочтения DE при автоматическом выборе
+DESKTOP_PREFERENCE = ('kde', 'gnome', 'xfce', 'mate', 'i3')
+
+# DE с композитингом: без видеодрайвера (llvmpipe) работают медленно
+COMPOSITING_DESKTOPS = ('kde', 'gnome')
+
+# Базовая система без DE (MB на диске)
+BASE_SYSTEM_MB = 3072
+
+# Минимальный диск для btrfs со снапшотами (GB)
+BTRFS_MIN_DISK_GB = 32
+
+# Поля конфигурации, которые зависят от выбранного диска
+DISK_FIELDS = ('partition_scheme', 'swap_type', 'swap_size')
+
+# Значения, записанные apply_defaults/apply_disk_defaults: поле с другим
+# значением пользователь изменил сам
+_applied: Dict[str, Any] = {}
+
+_SIZE = re.compile(r'^\s*([\d.]+)\s*([KMGT]?)i?B?\s*$', re.I)
+_UNITS_MB = {'': 1 / (1024 * 1024), 'K': 1 / 1024, 'M': 1, 'G': 1024, 'T': 1024 * 1024}
+
+def parse_size_mb(text: str) -> int:
+    """
+    Разобрать размер вида '2GB', '512MB', '1.5G' в мегабайты.
+    
+    Args:
+        text: Строка размера
+    
+    Returns:
+        Размер в MB
+    
+    Raises:
+        ValueError: Если строка не распознана
+    """
+    match = _SIZE.match(text or '')
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _UNITS_MB[match.group(2).upper()])
+
+def _format_mb(size_mb: float) -> str:
+    """Размер в MB в виде '512MB' / '1.5GB'."""
+    if size_mb < 1024:
+        return f"{size_mb:.0f}MB"
+    return f"{size_mb / 1024:.1f}GB"
+
+class HardwareProfile:
+    """Сведения о железе, от которых зависят значения по умолчанию."""
+    
+    def __init__(
+        self,
+        ram_mb: int,
+        cores: int,
+        disk: Optional[str] = None,
+        disk_mb: Optional[int] = None,
+        rotational: bool = False,
+        gpu_driver: str = 'generic'
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            ram_mb: Объем RAM в MB
+            cores: Логических процессоров
+            disk: Целевой диск
+            disk_mb: Размер целевого диска в MB (None - неизвестен)
+            rotational: Целевой диск - HDD
+            gpu_driver: driver_type из detect_gpu
+        """
+        self.ram_mb = ram_mb
+        self.cores = cores
+        self.disk = disk
+        self.disk_mb = disk_mb
+        self.rotational = rotational
+        self.gpu_driver = gpu_driver
+    
+    @classmethod
+    def collect(cls, disk: Optional[str] = None) -> 'HardwareProfile':
+        """
+        Собрать профиль из снимка железа и фоновых проб.
+        
+        Args:
+            disk: Целевой диск (по умолчанию - самый большой несъемный)
+        
+        Returns:
+            HardwareProfile
+        """
+        from installer.inventory import inventory
+        
+        snapshot = get_hardware_snapshot()
+        if disk is None:
+            devices = [read_block_device(name) for name, _ in inventory.disks]
+            devices = [d for d in devices if d.exists and not d.removable and d.size_bytes > 0]
+            target = max(devices, key=lambda d: d.size_bytes) if devices else None
+        else:
+            target = read_block_device(disk)
+            target = target if target.exists else None
+        
+        return cls(
+            ram_mb=snapshot.memory.total_kb // 1024,
+            cores=snapshot.cpu.logical,
+            disk=f"/dev/{target.name}" if target else disk,
+            disk_mb=target.size_bytes // (1024 * 1024) if target else None,
+            rotational=target.rotational if target else False,
+            gpu_driver=inventory.gpu.get('driver_type', 'generic')
+        )
+
+def desktop_ram_mb(de_key: str, profile: Optional[str] = None) -> int:
+    """
+    Память, при которой DE (с пакетами профиля) работает без swap.
+    
+    Args:
+        de_key: Ключ DE
+        profile: Профиль установки
+    
+    Returns:
+        MB: наибольшее из ram_required и порогов тяжелых пакетов
+    """
+    de = DESKTOP_ENVIRONMENTS[de_key]
+    need = parse_size_mb(de['ram_required'])
+    packages = list(de['packages'])
+    if profile:
+        packages += get_profile_packages(profile)
+    for package in packages:
+        need = max(need, HEAVY_PACKAGES.get(package, 0))
+    return need
+
+def desktop_disk_mb(de_key: str) -> int:
+    """Место на диске под базовую систему и DE (MB)."""
+    return BASE_SYSTEM_MB + parse_size_mb(DESKTOP_ENVIRONMENTS[de_key]['disk_space'])
+
+class Recommendation:
+    """Рекомендованные значения и причины выбора."""
+    
+    def __init__(self):
+        """Инициализация значениями InstallationConfig."""
+        self.profile = 'desktop'
+        self.desktop: Optional[str] = None
+        self.partition_scheme = 'auto_ext4'
+        self.swap_type = 'file'
+        self.swap_size = 2
+        self.parallel_downloads = 5
+        self.make_jobs = 1
+        self.reasons: List[str] = []
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Значения для логов."""
+        return {
+            'profile': self.profile,
+            'desktop': self.desktop,
+            'partition_scheme': self.partition_scheme,
+            'swap_type': self.swap_type,
+            'swap_size': self.swap_size,
+            'parallel_downloads': self.parallel_downloads,
+            'make_jobs': self.make_jobs,
+        }
+
+def recommend(hw: HardwareProfile) -> Recommendation:
+    """
+    Подобрать значения по умолчанию под железо.
+    
+    Args:
+        hw: Профиль железа
+    
+    Returns:
+        Recommendation
+    """
+    result = Recommendation()
+    ram_gb = hw.ram_mb / 1024
+    disk_gb = hw.disk_mb / 1024 if hw.disk_mb else None
+    
+    # Профиль: на очень малой памяти или диске - минимальная система
+    if hw.ram_mb < 768 or (disk_gb is not None and disk_gb < 16):
+        result.profile = 'minimal'
+        result.reasons.append(f"minimal profile: {ram_gb:.1f} GB RAM, disk {disk_gb or 0:.0f} GB")
+    else:
+        # Первое DE из предпочтений, которому хватает памяти и диска
+        for de_key in DESKTOP_PREFERENCE:
+            if hw.gpu_driver == 'generic' and de_key in COMPOSITING_DESKTOPS:
+                continue
+            fits_ram = desktop_ram_mb(de_key, result.profile) <= hw.ram_mb
+            fits_disk = hw.disk_mb is None or desktop_disk_mb(de_key) <= hw.disk_mb
+            if fits_ram and fits_disk:
+                result.desktop = de_key
+                break
+        result.reasons.append(f"desktop {result.desktop}: {ram_gb:.1f} GB RAM, GPU driver {hw.gpu_driver}")
+    
+    # Разметка: btrfs со снапшотами на SSD достаточного размера
+    if not hw.rotational and disk_gb is not None and disk_gb >= BTRFS_MIN_DISK_GB:
+        result.partition_scheme = 'auto_btrfs'
+    result.reasons.append(
+        f"{result.partition_scheme}: {'HDD' if hw.rotational else 'SSD'}, {disk_gb or 0:.0f} GB"
+    )
+    
+    # Swap: вдвое больше RAM на малой памяти, не больше 4 GB на большой
+    if ram_gb < 2:
+        result.swap_size = max(1, math.ceil(ram_gb * 2))
+    elif ram_gb < 8:
+        result.swap_size = math.ceil(ram_gb)
+    elif ram_gb < 32:
+        result.swap_size = 4
+    else:
+        result.swap_type = 'none'
+        result.swap_size = 0
+    if disk_gb is not None and disk_gb < 32:
+        result.swap_size = min(result.swap_size, 2)
+    
+    # Параллельность: загрузки по ядрам, сборка - около 2 GB RAM на задачу
+    result.parallel_downloads = 3 if hw.ram_mb < 2048 else min(10, max(5, hw.cores))
+    result.make_jobs = max(1, min(hw.cores, int(ram_gb // 2)))
+    return result
+
+def check_selection(
+    hw: HardwareProfile,
+    desktop: Optional[str],
+    profile: Optional[str] = None,
+    lang: Optional[str] = None
+) -> List[str]:
+    """
+    Предупреждения о выборе, который не подходит железу.
+    
+    Args:
+        hw: Профиль железа
+        desktop: Выбранное DE
+        profile: Выбранный профиль
+        lang: Язык сообщений
+    
+    Returns:
+        Список текстов предупреждений (пустой - все в порядке)
+    """
+    warnings: List[str] = []
+    if not desktop or desktop not in DESKTOP_ENVIRONMENTS:
+        return warnings
+    
+    de = DESKTOP_ENVIRONMENTS[desktop]
+    name = t(de['name'], lang)
+    have = _format_mb(hw.ram_mb)
+    
+    required = parse_size_mb(de['ram_required'])
+    if required > hw.ram_mb:
+        warnings.append(t('warn_de_ram', lang).format(de=name, need=_format_mb(required), have=have))
+    
+    packages = list(de['packages'])
+    if profile in INSTALLATION_PROFILES:
+        packages += get_profile_packages(profile)
+    for package in packages:
+        need = HEAVY_PACKAGES.get(package, 0)
+        if need > hw.ram_mb and need > required:
+            warnings.append(t('warn_heavy_package', lang).format(package=package, need=_format_mb(need), have=have))
+    
+    if hw.disk_mb is not None and desktop_disk_mb(desktop) > hw.disk_mb:
+        warnings.append(t('warn_disk_space', lang).format(
+            de=name, need=_format_mb(desktop_disk_mb(desktop)), have=_format_mb(hw.disk_mb)
+        ))
+    return warnings
+
+def apply_defaults(recommendation: Recommendation) -> None:
+    """
+    Записать рекомендации в глобальную конфигурацию.
+    
+    Args:
+        recommendation: Результат recommend()
+    """
+    config.installation_profile = recommendation.profile
+    config.desktop_environment = recommendation.desktop
+    config.parallel_downloads = recommendation.parallel_downloads
+    config.make_jobs = recommendation.make_jobs
+    for field in DISK_FIELDS:
+        setattr(config, field, getattr(recommendation, field))
+        _applied[field] = getattr(recommendation, field)
+    logger.info(f"Hardware-based defaults: {recommendation.to_dict()}")
+    for reason in recommendation.reasons:
+        logger.debug(f"  {reason}")
+
+def apply_disk_defaults(recommendation: Recommendation) -> List[str]:
+    """
+    Обновить разметку и swap под выбранный диск.
+    
+    Меняются только поля, которые пользователь не трогал: их значение
+    все еще то, что записал apply_defaults (или прошлый вызов).
+    
+    Args:
+        recommendation: Результат recommend() для выбранного диска
+    
+    Returns:
+        Имена обновленных полей
+    """
+    changed = []
+    for field in DISK_FIELDS:
+        if field in _applied and getattr(config, field) != _applied[field]:
+            continue
+        value = getattr(recommendation, field)
+        setattr(config, field, value)
+        _applied[field] = value
+        changed.append(field)
+    
+    kept = [field for field in DISK_FIELDS if field not in changed]
+    logger.info(f"Disk-based defaults: updated {changed}, kept user choice {kept}")
+    return changed
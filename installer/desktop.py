@@ -3,10 +3,11 @@
 """
 
 from typing import Dict, Optional
-from utils.executor import run_command
+from utils.executor import Cmd, run_in_chroot
 from utils.logger import logger
+from utils.events import events
 from ui.dialogs import get_dialog
-from config import t
+from config import t, COMMAND_TIMEOUTS
 
 # Конфигурация Desktop Environments
 DESKTOP_ENVIRONMENTS = {
@@ -76,12 +77,13 @@ DESKTOP_ENVIRONMENTS = {
     }
 }
 
-def select_desktop_environment(dialog) -> Optional[str]:
+def select_desktop_environment(dialog, default: Optional[str] = None) -> Optional[str]:
     """
     Интерактивный выбор Desktop Environment через dialog.
     
     Args:
         dialog: Экземпляр InstallerDialog
+        default: Предварительно выбранное DE
     
     Returns:
         Ключ выбранного DE или None
@@ -95,7 +97,7 @@ def select_desktop_environment(dialog) -> Optional[str]:
         
         # Форматированное описание
         full_desc = f"{desc} ({ram} RAM, {space} disk)"
-        choices.append((key, full_desc))
+        choices.append((key, full_desc, 1 if key == default else 0))
     
     result = dialog.radiolist('select_desktop', choices, height=20, width=80)
     
@@ -159,17 +161,21 @@ def install_desktop_environment(de_key: str, mount_point: str = '/mnt') -> bool:
             return True
         
         # Установить пакеты
-        packages_str = ' '.join(packages)
-        cmd = f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm"
-        logger.info(f"Installing packages: {packages_str}")
-        run_command(cmd, check=True, log=True)
+        cmd = Cmd(['pacman', '-S', *packages, '--noconfirm'])
+        logger.info(f"Installing packages: {' '.join(packages)}")
+        events.emit('packages', source='desktop', count=len(packages), packages=packages)
+        run_in_chroot(
+            cmd, mount_point, check=True, log=True, stream=True,
+            **COMMAND_TIMEOUTS['pacman_install']
+        )
         
         # Включить display manager если нужен
         display_manager = de_config['display_manager']
         if display_manager:
             logger.debug(f"Enabling display manager: {display_manager}")
-            run_command(
-                f"arch-chroot {mount_point} systemctl enable {display_manager}",
+            run_in_chroot(
+                Cmd(['systemctl', 'enable', display_manager]),
+                mount_point=mount_point,
                 check=True,
                 log=True
             )
@@ -195,10 +201,12 @@ def install_wayland_essentials(mount_point: str = '/mnt') -> bool:
         logger.info("Installing Wayland essentials")
         
         packages = ['wayland', 'xwayland', 'libxcb']
-        packages_str = ' '.join(packages)
         
-        cmd = f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm"
-        run_command(cmd, check=True, log=True)
+        cmd = Cmd(['pacman', '-S', *packages, '--noconfirm'])
+        run_in_chroot(
+            cmd, mount_point, check=True, log=True, stream=True,
+            **COMMAND_TIMEOUTS['pacman_install']
+        )
         
         return True
     
@@ -6,11 +6,14 @@
 import json
 import re
 from typing import List, Dict, Tuple, Optional
-from utils.executor import run_command
+from utils.executor import Cmd, run_command, run_probe, write_file, CommandBatch
 from utils.logger import logger
 from ui.dialogs import get_dialog
 from config import t
 
+# Размер EFI-раздела, который создает format_disk (MB)
+EFI_PARTITION_MB = 512
+
 def detect_disks() -> List[Tuple[str, str]]:
     """
     Определить все доступные диски через lsblk.
@@ -22,10 +25,9 @@ def detect_disks() -> List[Tuple[str, str]]:
     logger.debug("Detecting disks...")
     
     try:
-        returncode, output = run_command(
-            "lsblk -J -o NAME,SIZE,TYPE",
-            check=False,
-            log=False
+        returncode, output = run_probe(
+            Cmd(['lsblk', '-J', '-o', 'NAME,SIZE,TYPE']),
+            tags=('disk',)
         )
         
         if returncode != 0:
@@ -51,17 +53,19 @@ def detect_disks() -> List[Tuple[str, str]]:
         logger.error(f"Error detecting disks: {e}")
         return []
 
-def select_disk(dialog) -> Optional[str]:
+def select_disk(dialog, disks: Optional[List[Tuple[str, str]]] = None) -> Optional[str]:
     """
     Интерактивный выбор диска через dialog.
     
     Args:
         dialog: Экземпляр InstallerDialog
+        disks: Уже найденные диски (иначе будет вызван detect_disks)
     
     Returns:
         Выбранное устройство (например '/dev/sda') или None
     """
-    disks = detect_disks()
+    if disks is None:
+        disks = detect_disks()
     
     if not disks:
         dialog.msgbox('error_disk_not_found')
@@ -119,47 +123,52 @@ def get_partition_schemes() -> Dict[str, Dict]:
         }
     }
 
-def select_partition_scheme(dialog) -> Optional[str]:
+def select_partition_scheme(dialog, default: Optional[str] = None) -> Optional[str]:
     """
     Выбрать схему разметки через dialog.
     
     Args:
         dialog: Экземпляр InstallerDialog
+        default: Предварительно выбранная схема
     
     Returns:
         Код выбранной схемы или None
     """
     schemes = get_partition_schemes()
     choices = [
-        (key, t(value['description']))
+        (key, t(value['description']), 1 if key == default else 0)
         for key, value in schemes.items()
     ]
     
     return dialog.radiolist('partition_scheme', choices, height=15, width=60)
 
-def setup_swap(dialog) -> Optional[Dict]:
+def setup_swap(dialog, default: Optional[Dict] = None) -> Optional[Dict]:
     """
     Настройка swap через диалоги.
     
     Args:
         dialog: Экземпляр InstallerDialog
+        default: Предварительный выбор {'type', 'size_gb'}
     
     Returns:
         Словарь с конфигурацией swap или None
     """
+    default = default or {'type': 'file', 'size_gb': 2}
+    default_size = default.get('size_gb') or 2
     choices = [
         ('file', 'Swap-файл (рекомендуется)'),
         ('partition', 'Swap-раздел'),
         ('none', 'Без swap')
     ]
+    choices = [(tag, text, 1 if tag == default['type'] else 0) for tag, text in choices]
     
     swap_type = dialog.radiolist('Выберите тип swap', choices)
     
     if swap_type == 'none':
         return {'type': 'none', 'size_gb': 0}
     elif swap_type == 'file':
-        size = dialog.inputbox('swap_size', init='2')
-        return {'type': 'file', 'size_gb': int(size) if size else 2}
+        size = dialog.inputbox('swap_size', init=str(default_size))
+        return {'type': 'file', 'size_gb': int(size) if size else default_size}
     elif swap_type == 'partition':
         return {'type': 'partition', 'size_gb': None}
     
@@ -182,14 +191,14 @@ def format_disk(disk: str, is_uefi: bool) -> bool:
         # Использовать sgdisk для GPT (UEFI) или fdisk для MBR (BIOS)
         if is_uefi:
             logger.debug(f"Creating GPT table on {disk}")
-            run_command(f"sgdisk --zap-all {disk}", check=True)
-            run_command(f"sgdisk -n 1:0:+512M -t 1:ef00 {disk}", check=True)
+            run_command(Cmd(['sgdisk', '--zap-all', disk]), check=True)
+            run_command(Cmd(['sgdisk', '-n', f"1:0:+{EFI_PARTITION_MB}M", '-t', '1:ef00', disk]), check=True)
         else:
             logger.debug(f"Creating MBR table on {disk}")
-            run_command(f"fdisk -l {disk}", check=False)
+            run_command(Cmd(['fdisk', '-l', disk]), check=False)
             # fdisk требует интерактивного ввода, поэтому используем parted
             run_command(
-                f"parted -s {disk} mklabel msdos",
+                Cmd(['parted', '-s', disk, 'mklabel', 'msdos']),
                 check=True
             )
         
@@ -227,7 +236,7 @@ def create_partitions(
             return _create_auto_btrfs(disk, is_uefi, swap_config)
         elif scheme == 'manual':
             logger.info("Opening manual partitioning tool (cfdisk)")
-            run_command(f"cfdisk {disk}", check=False)
+            run_command(Cmd(['cfdisk', disk]), check=False)
             return True
         
         return False
@@ -243,37 +252,33 @@ def _create_auto_ext4(
 ) -> bool:
     """Создать разделы для автоматической схемы ext4."""
     try:
-        # Определить номера разделов
-        if is_uefi:
-            # EFI раздел уже создан при форматировании
-            boot_partition = f"{disk}1"
-            root_partition = f"{disk}2"
+        # Все шаги разметки и монтирования - одним процессом
+        with CommandBatch('auto_ext4') as batch:
+            # Определить номера разделов
+            if is_uefi:
+                # EFI раздел уже создан при форматировании
+                boot_partition = f"{disk}1"
+                root_partition = f"{disk}2"
+                
+                # Создать корневой раздел
+                batch.add(Cmd(['sgdisk', '-n', '2:0:0', '-t', '2:8300', disk]), "Creating root partition")
+            else:
+                root_partition = f"{disk}1"
+                boot_partition = None
             
-            # Создать корневой раздел
-            run_command(
-                f"sgdisk -n 2:0:0 -t 2:8300 {disk}",
-                check=True
-            )
-        else:
-            root_partition = f"{disk}1"
-            boot_partition = None
-        
-        # Форматировать
-        logger.debug(f"Formatting root partition {root_partition}")
-        run_command(f"mkfs.ext4 -F {root_partition}", check=True)
-        
-        if is_uefi:
-            logger.debug(f"Formatting EFI partition {boot_partition}")
-            run_command(f"mkfs.fat -F 32 {boot_partition}", check=True)
-        
-        # Монтировать
-        logger.debug("Mounting partitions")
-        run_command("mkdir -p /mnt", check=True)
-        run_command(f"mount {root_partition} /mnt", check=True)
-        
-        if is_uefi:
-            run_command("mkdir -p /mnt/boot/efi", check=True)
-            run_command(f"mount {boot_partition} /mnt/boot/efi", check=True)
+            # Форматировать
+            batch.add(Cmd(['mkfs.ext4', '-F', root_partition]), f"Formatting root partition {root_partition}")
+            
+            if is_uefi:
+                batch.add(Cmd(['mkfs.fat', '-F', '32', boot_partition]), f"Formatting EFI partition {boot_partition}")
+            
+            # Монтировать
+            batch.add(Cmd(['mkdir', '-p', '/mnt']), "Mounting partitions")
+            batch.add(Cmd(['mount', root_partition, '/mnt']))
+            
+            if is_uefi:
+                batch.add(Cmd(['mkdir', '-p', '/mnt/boot/efi']))
+                batch.add(Cmd(['mount', boot_partition, '/mnt/boot/efi']))
         
         logger.info("Auto ext4 partitioning completed")
         return True
@@ -289,45 +294,41 @@ def _create_auto_btrfs(
 ) -> bool:
     """Создать разделы для автоматической схемы btrfs."""
     try:
-        if is_uefi:
-            boot_partition = f"{disk}1"
-            root_partition = f"{disk}2"
+        # Все шаги разметки и монтирования - одним процессом
+        with CommandBatch('auto_btrfs') as batch:
+            if is_uefi:
+                boot_partition = f"{disk}1"
+                root_partition = f"{disk}2"
+                
+                batch.add(Cmd(['sgdisk', '-n', '2:0:0', '-t', '2:8300', disk]), "Creating root partition")
+            else:
+                root_partition = f"{disk}1"
+                boot_partition = None
             
-            run_command(
-                f"sgdisk -n 2:0:0 -t 2:8300 {disk}",
-                check=True
-            )
-        else:
-            root_partition = f"{disk}1"
-            boot_partition = None
-        
-        # Форматировать в btrfs
-        logger.debug(f"Formatting root partition {root_partition} with btrfs")
-        run_command(f"mkfs.btrfs -f {root_partition}", check=True)
-        
-        if is_uefi:
-            logger.debug(f"Formatting EFI partition {boot_partition}")
-            run_command(f"mkfs.fat -F 32 {boot_partition}", check=True)
-        
-        # Монтировать и создать subvolumes
-        logger.debug("Creating btrfs subvolumes")
-        run_command("mkdir -p /mnt", check=True)
-        run_command(f"mount {root_partition} /mnt", check=True)
-        
-        subvolumes = ['@', '@home', '@var', '@snapshots']
-        for subvol in subvolumes:
-            run_command(f"btrfs subvolume create /mnt/{subvol}", check=True)
-        
-        # Перемонтировать с subvolumes
-        run_command(f"umount /mnt", check=True)
-        run_command(f"mount -o subvol=@ {root_partition} /mnt", check=True)
-        run_command("mkdir -p /mnt/home /mnt/var", check=True)
-        run_command(f"mount -o subvol=@home {root_partition} /mnt/home", check=True)
-        run_command(f"mount -o subvol=@var {root_partition} /mnt/var", check=True)
-        
-        if is_uefi:
-            run_command("mkdir -p /mnt/boot/efi", check=True)
-            run_command(f"mount {boot_partition} /mnt/boot/efi", check=True)
+            # Форматировать в btrfs
+            batch.add(Cmd(['mkfs.btrfs', '-f', root_partition]), f"Formatting root partition {root_partition} with btrfs")
+            
+            if is_uefi:
+                batch.add(Cmd(['mkfs.fat', '-F', '32', boot_partition]), f"Formatting EFI partition {boot_partition}")
+            
+            # Монтировать и создать subvolumes
+            batch.add(Cmd(['mkdir', '-p', '/mnt']), "Creating btrfs subvolumes")
+            batch.add(Cmd(['mount', root_partition, '/mnt']))
+            
+            subvolumes = ['@', '@home', '@var', '@snapshots']
+            for subvol in subvolumes:
+                batch.add(Cmd(['btrfs', 'subvolume', 'create', f"/mnt/{subvol}"]))
+            
+            # Перемонтировать с subvolumes
+            batch.add(Cmd(['umount', '/mnt']))
+            batch.add(Cmd(['mount', '-o', 'subvol=@', root_partition, '/mnt']))
+            batch.add(Cmd(['mkdir', '-p', '/mnt/home', '/mnt/var']))
+            batch.add(Cmd(['mount', '-o', 'subvol=@home', root_partition, '/mnt/home']))
+            batch.add(Cmd(['mount', '-o', 'subvol=@var', root_partition, '/mnt/var']))
+            
+            if is_uefi:
+                batch.add(Cmd(['mkdir', '-p', '/mnt/boot/efi']))
+                batch.add(Cmd(['mount', boot_partition, '/mnt/boot/efi']))
         
         logger.info("Auto btrfs partitioning completed")
         return True
@@ -345,10 +346,8 @@ def generate_fstab() -> bool:
     """
     try:
         logger.info("Generating fstab")
-        run_command(
-            "genfstab -U /mnt >> /mnt/etc/fstab",
-            check=True
-        )
+        _, fstab = run_command(Cmd(['genfstab', '-U', '/mnt']), check=True)
+        write_file("/mnt/etc/fstab", fstab, append=True)
         return True
     except Exception as e:
         logger.error(f"Failed to generate fstab: {e}")
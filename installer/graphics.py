@@ -2,11 +2,13 @@
 Определение видеокарты и установка соответствующих драйверов.
 """
 
+import re
 from typing import Dict, Optional, Tuple
-from utils.executor import run_command
+from utils.executor import Cmd, run_in_chroot, run_probe, write_file
 from utils.logger import logger
+from utils.events import events
 from ui.dialogs import get_dialog
-from config import t
+from config import t, COMMAND_TIMEOUTS
 
 # Конфигурация драйверов
 GPU_DRIVERS = {
@@ -61,11 +63,12 @@ def detect_gpu() -> Dict[str, str]:
     logger.debug("Detecting GPU...")
     
     try:
-        returncode, output = run_command(
-            "lspci | grep -E 'VGA|3D'",
-            check=False,
-            log=False
-        )
+        # Набор PCI-устройств за сессию не меняется
+        returncode, output = run_probe(Cmd(['lspci']), ttl=None, tags=('pci',))
+        if returncode == 0:
+            output = '\n'.join(
+                line for line in output.splitlines() if re.search(r'VGA|3D', line)
+            )
         
         if returncode != 0 or not output:
             logger.warning("Could not detect GPU")
@@ -184,17 +187,21 @@ def install_gpu_drivers(driver_type: str, mount_point: str = '/mnt') -> bool:
         # Удалить конфликтующие пакеты
         for conflict in driver_config.get('conflicts', []):
             logger.debug(f"Removing conflicting package: {conflict}")
-            run_command(
-                f"arch-chroot {mount_point} pacman -R {conflict} --noconfirm",
+            run_in_chroot(
+                Cmd(['pacman', '-R', conflict, '--noconfirm']),
+                mount_point=mount_point,
                 check=False,
                 log=True
             )
         
         # Установить пакеты
-        packages_str = ' '.join(packages)
-        cmd = f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm"
-        logger.info(f"Installing packages: {packages_str}")
-        run_command(cmd, check=True, log=True)
+        cmd = Cmd(['pacman', '-S', *packages, '--noconfirm'])
+        logger.info(f"Installing packages: {' '.join(packages)}")
+        events.emit('packages', source='gpu_drivers', count=len(packages), packages=packages)
+        run_in_chroot(
+            cmd, mount_point, check=True, log=True, stream=True,
+            **COMMAND_TIMEOUTS['pacman_install']
+        )
         
         logger.info(f"GPU drivers installed successfully")
         return True
@@ -223,11 +230,7 @@ def configure_gpu_hybrid(mount_point: str = '/mnt') -> bool:
 # Example: prime-run glxinfo | grep NVIDIA
 """
         
-        run_command(
-            f"echo '{config_content}' > {mount_point}/etc/profile.d/nvidia-prime.sh",
-            check=True,
-            log=True
-        )
+        write_file(f"{mount_point}/etc/profile.d/nvidia-prime.sh", config_content)
         
         logger.info("Hybrid graphics configured")
         return True
@@ -244,11 +247,9 @@ def check_nvidia_legacy_needed() -> bool:
         True если нужны
     """
     try:
-        returncode, output = run_command(
-            "lspci | grep -E 'GeForce (6|7|8|9|GTX [0-9]{3}|GTX [0-9]{4}M)'",
-            check=False,
-            log=False
-        )
-        return returncode == 0
+        returncode, output = run_probe(Cmd(['lspci']), ttl=None, tags=('pci',))
+        if returncode != 0:
+            return False
+        return re.search(r'GeForce (6|7|8|9|GTX [0-9]{3}|GTX [0-9]{4}M)', output) is not None
     except:
         return False
@@ -0,0 +1,145 @@
+"""
+Фоновый сбор сведений о железе.
+
+get_system_info, detect_gpu, detect_disks и detect_boot_mode раньше
+вызывались по одному, когда пользователь доходил до нужного пункта
+меню, и каждый раз он ждал lspci/lsblk. HardwareInventory запускает
+все пробы параллельно сразу при старте main.py, пока на экране
+проверки, приветствие и выбор языка; меню потом читают готовый снимок.
+Если проба еще не закончилась, чтение ждет только ее.
+"""
+
+import threading
+import time
+from typing import Dict, List, Tuple, Optional, Callable, Any
+from utils.logger import logger
+from utils.tracing import tracer
+from utils.system import get_system_info
+from installer.disk import detect_disks, detect_boot_mode
+from installer.graphics import detect_gpu
+
+class HardwareInventory:
+    """Параллельно собираемый снимок железа."""
+    
+    # Имя пробы -> функция без аргументов
+    PROBES: Dict[str, Callable[[], Any]] = {
+        'system': get_system_info,
+        'gpu': detect_gpu,
+        'disks': detect_disks,
+        'boot_mode': detect_boot_mode,
+    }
+    
+    def __init__(self):
+        """Инициализация (пробы не запущены)."""
+        self._results: Dict[str, Any] = {}
+        self._done: Dict[str, threading.Event] = {}
+        self._durations: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def _run(self, name: str) -> None:
+        """Выполнить пробу и сохранить результат."""
+        started = time.monotonic()
+        try:
+            with tracer.span(f"inventory:{name}", cat='inventory'):
+                result = self.PROBES[name]()
+            with self._lock:
+                self._results[name] = result
+        except Exception as e:
+            logger.error(f"Hardware probe '{name}' failed: {e}")
+        finally:
+            self._durations[name] = time.monotonic() - started
+            self._done[name].set()
+    
+    def start(self, names: Tuple[str, ...] = ()) -> 'HardwareInventory':
+        """
+        Запустить пробы в фоновых потоках.
+        
+        Args:
+            names: Какие пробы запустить (по умолчанию все)
+        
+        Returns:
+            self
+        """
+        for name in names or tuple(self.PROBES):
+            with self._lock:
+                event = self._done.get(name)
+                if event is not None and not event.is_set():
+                    continue  # проба уже выполняется
+                self._done[name] = threading.Event()
+            threading.Thread(
+                target=self._run,
+                args=(name,),
+                name=f"inventory-{name}",
+                daemon=True
+            ).start()
+        return self
+    
+    def refresh(self, name: str) -> Any:
+        """
+        Выполнить пробу заново (например, после подключения диска).
+        
+        Args:
+            name: Имя пробы
+        
+        Returns:
+            Новый результат
+        """
+        self.start((name,))
+        return self.get(name)
+    
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Результат пробы (ожидание, если она еще выполняется).
+        
+        Проба, которую не запускали через start(), выполняется сразу в
+        текущем потоке. Если проба упала, функция вызывается повторно,
+        и ошибка обрабатывается ею самой как раньше.
+        
+        Args:
+            name: Имя пробы
+            timeout: Максимальное ожидание в секундах (None - без ограничения)
+        
+        Returns:
+            Результат функции пробы
+        """
+        event = self._done.get(name)
+        if event is None:
+            self.start((name,))
+            event = self._done[name]
+        
+        if not event.wait(timeout):
+            logger.warning(f"Hardware probe '{name}' still running after {timeout}s, probing directly")
+            return self.PROBES[name]()
+        
+        with self._lock:
+            if name in self._results:
+                return self._results[name]
+        return self.PROBES[name]()
+    
+    @property
+    def system(self) -> Dict[str, Any]:
+        """Результат get_system_info."""
+        return self.get('system')
+    
+    @property
+    def gpu(self) -> Dict[str, str]:
+        """Результат detect_gpu."""
+        return self.get('gpu')
+    
+    @property
+    def disks(self) -> List[Tuple[str, str]]:
+        """Результат detect_disks."""
+        return self.get('disks')
+    
+    @property
+    def is_uefi(self) -> bool:
+        """Результат detect_boot_mode."""
+        return self.get('boot_mode')
+    
+    def log_timings(self) -> None:
+        """Записать в лог время выполнения проб."""
+        for name, duration in sorted(self._durations.items()):
+            logger.debug(f"Hardware probe '{name}': {duration * 1000:.0f} ms")
+
+# Глобальный снимок железа
+inventory = HardwareInventory()
@@ -2,8 +2,9 @@
 Локализация системы: раскладки клавиатуры, часовой пояс, локали.
 """
 
+import os
 from typing import Dict, List, Optional
-from utils.executor import run_command
+from utils.executor import Cmd, run_command, run_in_chroot, run_probe, write_file
 from utils.logger import logger
 from ui.dialogs import get_dialog
 from config import t
@@ -131,11 +132,7 @@ def get_timezones() -> List[str]:
         Список часовых поясов
     """
     try:
-        returncode, output = run_command(
-            "timedatectl list-timezones",
-            check=False,
-            log=False
-        )
+        returncode, output = run_probe(Cmd(['timedatectl', 'list-timezones']), ttl=None)
         
         if returncode == 0:
             timezones = output.strip().split('\n')
@@ -208,14 +205,15 @@ def set_timezone(timezone: str, mount_point: str = '/mnt') -> bool:
         
         # Создать symlink
         run_command(
-            f"ln -sf /usr/share/zoneinfo/{timezone} {mount_point}/etc/localtime",
+            Cmd(['ln', '-sf', f"/usr/share/zoneinfo/{timezone}", f"{mount_point}/etc/localtime"]),
             check=True,
             log=True
         )
         
         # Запустить hwclock
-        run_command(
-            f"arch-chroot {mount_point} hwclock --systohc",
+        run_in_chroot(
+            Cmd(['hwclock', '--systohc']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -274,14 +272,15 @@ def generate_locale(locales: List[str], mount_point: str = '/mnt') -> bool:
         # Раскомментировать локали в /etc/locale.gen
         for locale in locales:
             run_command(
-                f"sed -i '/{locale}/s/^#//g' {mount_point}/etc/locale.gen",
+                Cmd(['sed', '-i', f"/{locale}/s/^#//g", f"{mount_point}/etc/locale.gen"]),
                 check=False,
                 log=False
             )
         
         # Запустить locale-gen
-        run_command(
-            f"arch-chroot {mount_point} locale-gen",
+        run_in_chroot(
+            Cmd(['locale-gen']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -289,11 +288,7 @@ def generate_locale(locales: List[str], mount_point: str = '/mnt') -> bool:
         # Установить LANG
         if locales:
             lang = locales[0]
-            run_command(
-                f"echo 'LANG={lang}' > {mount_point}/etc/locale.conf",
-                check=True,
-                log=True
-            )
+            write_file(f"{mount_point}/etc/locale.conf", f"LANG={lang}\n")
         
         logger.info("Locales generated successfully")
         return True
@@ -319,11 +314,7 @@ def set_keyboard_layout(layout: str, mount_point: str = '/mnt') -> bool:
         # Создать конфиг vconsole.conf
         config = f"KEYMAP={layout}\n"
         
-        run_command(
-            f"echo '{config}' > {mount_point}/etc/vconsole.conf",
-            check=True,
-            log=True
-        )
+        write_file(f"{mount_point}/etc/vconsole.conf", config)
         
         logger.info("Keyboard layout set successfully")
         return True
@@ -375,14 +366,8 @@ Section "InputClass"
 EndSection
 """
         
-        run_command(
-            f"mkdir -p {mount_point}/etc/X11/xorg.conf.d",
-            check=False,
-            log=False
-        )
-        
-        with open(f"{mount_point}/etc/X11/xorg.conf.d/00-keyboard.conf", 'w') as f:
-            f.write(config)
+        os.makedirs(f"{mount_point}/etc/X11/xorg.conf.d", exist_ok=True)
+        write_file(f"{mount_point}/etc/X11/xorg.conf.d/00-keyboard.conf", config)
         
         logger.info("X11 keyboard configured successfully")
         return True
@@ -3,7 +3,7 @@
 """
 
 from typing import Optional
-from utils.executor import run_command
+from utils.executor import Cmd, run_in_chroot, write_file
 from utils.logger import logger
 from utils.validators import validate_hostname
 from ui.dialogs import get_dialog
@@ -107,11 +107,7 @@ def set_hostname(hostname: str, mount_point: str = '/mnt') -> bool:
         logger.info(f"Setting hostname: {hostname}")
         
         # Создать /etc/hostname
-        run_command(
-            f"echo '{hostname}' > {mount_point}/etc/hostname",
-            check=True,
-            log=True
-        )
+        write_file(f"{mount_point}/etc/hostname", f"{hostname}\n")
         
         # Обновить /etc/hosts
         hosts_content = f"""127.0.0.1           localhost
@@ -119,12 +115,7 @@ def set_hostname(hostname: str, mount_point: str = '/mnt') -> bool:
 127.0.1.1           {hostname}.localdomain	{hostname}
 """
         
-        run_command(
-            f"cat > {mount_point}/etc/hosts << 'EOF'\n{hosts_content}EOF",
-            check=True,
-            log=True,
-            shell=True
-        )
+        write_file(f"{mount_point}/etc/hosts", hosts_content)
         
         logger.info("Hostname set successfully")
         return True
@@ -154,17 +145,18 @@ def install_network_manager(nm: str, mount_point: str = '/mnt') -> bool:
         
         # Установить пакеты
         if nm_config['packages']:
-            packages_str = ' '.join(nm_config['packages'])
-            run_command(
-                f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm",
+            run_in_chroot(
+                Cmd(['pacman', '-S', *nm_config['packages'], '--noconfirm']),
+                mount_point=mount_point,
                 check=True,
                 log=True
             )
         
         # Включить сервис
         service = nm_config['service']
-        run_command(
-            f"arch-chroot {mount_point} systemctl enable {service}",
+        run_in_chroot(
+            Cmd(['systemctl', 'enable', service]),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -190,19 +182,26 @@ def enable_dhcp(mount_point: str = '/mnt') -> bool:
         logger.info("Enabling DHCP")
         
         # Найти сетевые интерфейсы
-        returncode, output = run_command(
-            "arch-chroot /mnt bash -c 'ip link | grep -E '^[0-9]+:' | grep -v lo | awk -F: '{print $2}' | tr -d ' ''",
+        returncode, output = run_in_chroot(
+            Cmd(['ip', '-o', 'link', 'show']),
+            mount_point=mount_point,
             check=False,
             log=False
         )
         
         if returncode == 0 and output:
-            interfaces = output.strip().split('\n')
+            # Формат строки: "2: enp0s3: <BROADCAST,...> ..."
+            interfaces = [
+                fields[1] for fields in
+                (line.split(': ') for line in output.strip().split('\n'))
+                if len(fields) > 1
+            ]
             for iface in interfaces:
                 if iface and iface != 'lo':
                     # Включить DHCP для интерфейса
-                    run_command(
-                        f"arch-chroot {mount_point} systemctl enable dhcpcd@{iface}",
+                    run_in_chroot(
+                        Cmd(['systemctl', 'enable', f"dhcpcd@{iface}"]),
+                        mount_point=mount_point,
                         check=False,
                         log=False
                     )
@@ -3,10 +3,12 @@
 """
 
 from typing import Dict, List, Optional
-from utils.executor import run_command
+from utils.executor import Cmd, CommandTimeoutError, run_command, run_in_chroot, write_file
 from utils.logger import logger
+from utils.netprobe import last_results, rank_mirrors
+from utils.events import events
 from ui.dialogs import get_dialog
-from config import t
+from config import t, COMMAND_TIMEOUTS
 
 # Профили установки
 INSTALLATION_PROFILES = {
@@ -96,12 +98,13 @@ ADDITIONAL_PACKAGES = {
     }
 }
 
-def select_installation_profile(dialog) -> Optional[str]:
+def select_installation_profile(dialog, default: Optional[str] = None) -> Optional[str]:
     """
     Выбрать профиль установки через dialog.
     
     Args:
         dialog: Экземпляр InstallerDialog
+        default: Предварительно выбранный профиль
     
     Returns:
         Ключ выбранного профиля или None
@@ -110,7 +113,7 @@ def select_installation_profile(dialog) -> Optional[str]:
     
     for key, profile in INSTALLATION_PROFILES.items():
         desc = t(profile['description'])
-        choices.append((key, desc))
+        choices.append((key, desc, 1 if key == default else 0))
     
     result = dialog.radiolist('select_profile', choices, height=15, width=70)
     
@@ -118,7 +121,7 @@ def select_installation_profile(dialog) -> Optional[str]:
         logger.info(f"Installation profile selected: {result}")
         return result
     
-    return 'desktop'
+    return default or 'desktop'
 
 def get_profile_packages(profile_key: str) -> List[str]:
     """
@@ -181,11 +184,14 @@ def install_packages(packages: List[str], mount_point: str = '/mnt') -> bool:
             return True
         
         logger.info(f"Installing {len(packages)} packages")
+        events.emit('packages', source='install_packages', count=len(packages), packages=packages)
         
-        packages_str = ' '.join(packages)
-        cmd = f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm"
+        cmd = Cmd(['pacman', '-S', *packages, '--noconfirm'])
         
-        run_command(cmd, check=True, log=True)
+        run_in_chroot(
+            cmd, mount_point, check=True, log=True, stream=True,
+            **COMMAND_TIMEOUTS['pacman_install']
+        )
         
         logger.info("Packages installed successfully")
         return True
@@ -209,15 +215,19 @@ def enable_multilib(mount_point: str = '/mnt') -> bool:
         
         # Раскомментировать multilib в /etc/pacman.conf
         run_command(
-            f"sed -i '/^#\\[multilib\\]/,/^#Include = \\/etc\\/pacman.d\\/mirrorlist/ "
-            f"s/^#//' {mount_point}/etc/pacman.conf",
+            Cmd([
+                'sed', '-i',
+                r'/^#\[multilib\]/,/^#Include = \/etc\/pacman.d\/mirrorlist/ s/^#//',
+                f"{mount_point}/etc/pacman.conf"
+            ]),
             check=False,
             log=True
         )
         
         # Обновить базы данных
-        run_command(
-            f"arch-chroot {mount_point} pacman -Sy",
+        run_in_chroot(
+            Cmd(['pacman', '-Sy']),
+            mount_point=mount_point,
             check=True,
             log=True
         )
@@ -250,45 +260,158 @@ def setup_aur_helper(helper: str, mount_point: str = '/mnt') -> bool:
         # Установить зависимости
         if helper == 'yay':
             packages = ['git', 'base-devel']
-            packages_str = ' '.join(packages)
-            run_command(
-                f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm",
-                check=True,
-                log=True
-            )
-            
-            # Клонировать и собрать yay
-            run_command(
-                f"arch-chroot {mount_point} bash -c 'cd /tmp && "
-                f"git clone https://aur.archlinux.org/yay-bin.git && "
-                f"cd yay-bin && makepkg -si --noconfirm'",
-                check=True,
-                log=True
-            )
-        
-        elif helper == 'paru':
+        else:
             packages = ['git', 'base-devel', 'rust']
-            packages_str = ' '.join(packages)
-            run_command(
-                f"arch-chroot {mount_point} pacman -S {packages_str} --noconfirm",
-                check=True,
-                log=True
-            )
-            
-            # Клонировать и собрать paru
+        
+        run_in_chroot(
+            Cmd(['pacman', '-S', *packages, '--noconfirm']),
+            mount_point=mount_point,
+            check=True,
+            log=True,
+            **COMMAND_TIMEOUTS['pacman_install']
+        )
+        
+        # Клонировать и собрать -bin пакет из AUR
+        build_dir = f"/tmp/{helper}-bin"
+        run_in_chroot(
+            Cmd(['git', 'clone', f"https://aur.archlinux.org/{helper}-bin.git", build_dir]),
+            mount_point=mount_point,
+            check=True,
+            log=True,
+            **COMMAND_TIMEOUTS['git_clone']
+        )
+        run_in_chroot(
+            Cmd(['makepkg', '-si', '--noconfirm'], cwd=build_dir),
+            mount_point=mount_point,
+            check=True,
+            log=True,
+            stream=True
+        )
+        
+        logger.info(f"AUR helper {helper} installed successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Failed to install AUR helper: {e}")
+        return False
+
+def configure_parallelism(
+    parallel_downloads: int,
+    make_jobs: Optional[int] = None,
+    mount_point: str = '/mnt'
+) -> bool:
+    """
+    Настроить параллельные загрузки pacman и число задач сборки makepkg
+    в устанавливаемой системе (live-окружение - configure_live_parallelism).
+    
+    Args:
+        parallel_downloads: ParallelDownloads в pacman.conf
+        make_jobs: MAKEFLAGS="-jN" в makepkg.conf (None - не менять)
+        mount_point: Точка монтирования системы
+    
+    Returns:
+        True если успешно
+    """
+    try:
+        logger.info(f"Configuring parallelism in {mount_point or '/'}: "
+                    f"{parallel_downloads} downloads, {make_jobs} build jobs")
+        
+        run_command(
+            Cmd([
+                'sed', '-i', '-E',
+                rf's/^#?ParallelDownloads.*/ParallelDownloads = {parallel_downloads}/',
+                f"{mount_point}/etc/pacman.conf"
+            ]),
+            check=True,
+            log=True
+        )
+        
+        if make_jobs:
             run_command(
-                f"arch-chroot {mount_point} bash -c 'cd /tmp && "
-                f"git clone https://aur.archlinux.org/paru-bin.git && "
-                f"cd paru-bin && makepkg -si --noconfirm'",
-                check=True,
+                Cmd([
+                    'sed', '-i', '-E',
+                    rf's/^#?MAKEFLAGS=.*/MAKEFLAGS="-j{make_jobs}"/',
+                    f"{mount_point}/etc/makepkg.conf"
+                ]),
+                check=False,
                 log=True
             )
         
-        logger.info(f"AUR helper {helper} installed successfully")
         return True
     
     except Exception as e:
-        logger.error(f"Failed to install AUR helper: {e}")
+        logger.error(f"Failed to configure parallelism: {e}")
+        return False
+
+def configure_live_parallelism(parallel_downloads: int, pacman_conf: str = '/etc/pacman.conf') -> bool:
+    """
+    Изменить ParallelDownloads в pacman.conf live-окружения.
+    
+    Это отдельный шаг, потому что он меняет систему, с которой запущен
+    установщик, а не целевую: прежнее значение записывается в лог, а если
+    оно уже совпадает, файл не трогается.
+    
+    Args:
+        parallel_downloads: Новое значение ParallelDownloads
+        pacman_conf: pacman.conf live-окружения
+    
+    Returns:
+        True если значение установлено
+    """
+    try:
+        with open(pacman_conf, 'r') as f:
+            current = [line.strip() for line in f if line.lstrip('#').strip().startswith('ParallelDownloads')]
+    except OSError as e:
+        logger.error(f"Failed to read {pacman_conf}: {e}")
+        return False
+    
+    wanted = f"ParallelDownloads = {parallel_downloads}"
+    if current == [wanted]:
+        logger.debug(f"Live environment {pacman_conf} already has {wanted}")
+        return True
+    
+    try:
+        logger.info(f"Changing live environment {pacman_conf}: "
+                    f"{current[0] if current else 'no ParallelDownloads'} -> {wanted}")
+        run_command(
+            Cmd(['sed', '-i', '-E', rf's/^#?ParallelDownloads.*/{wanted}/', pacman_conf]),
+            check=True,
+            log=True
+        )
+        return True
+    
+    except Exception as e:
+        logger.error(f"Failed to configure live environment parallelism: {e}")
+        return False
+
+def use_probed_mirrors(mount_point: str = '/mnt') -> bool:
+    """
+    Поставить в начало mirrorlist зеркала из проверки сети, от быстрых к медленным.
+    
+    Args:
+        mount_point: Точка монтирования системы
+    
+    Returns:
+        True если mirrorlist изменен
+    """
+    servers = rank_mirrors(last_results())
+    if not servers:
+        return False
+    
+    path = f"{mount_point}/etc/pacman.d/mirrorlist"
+    try:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = ''
+        header = '# Ranked by installer connectivity probe\n'
+        header += ''.join(f"Server = {server}\n" for server in servers)
+        write_file(path, header + '\n' + current)
+        logger.info(f"Using probed mirrors: {', '.join(servers)}")
+        return True
+    except OSError as e:
+        logger.error(f"Failed to write probed mirrors: {e}")
         return False
 
 def update_mirrors(mount_point: str = '/mnt') -> bool:
@@ -305,23 +428,33 @@ def update_mirrors(mount_point: str = '/mnt') -> bool:
         logger.info("Updating mirrors with reflector")
         
         # Установить reflector если нет
-        run_command(
-            f"arch-chroot {mount_point} pacman -S reflector --noconfirm",
+        run_in_chroot(
+            Cmd(['pacman', '-S', 'reflector', '--noconfirm']),
+            mount_point=mount_point,
             check=False,
             log=False
         )
         
         # Запустить reflector
-        run_command(
-            f"arch-chroot {mount_point} reflector --latest 20 --sort rate "
-            f"--save /etc/pacman.d/mirrorlist",
+        run_in_chroot(
+            Cmd(['reflector', '--latest', '20', '--sort', 'rate',
+                 '--save', '/etc/pacman.d/mirrorlist']),
+            mount_point=mount_point,
             check=True,
-            log=True
+            log=True,
+            **COMMAND_TIMEOUTS['reflector']
         )
         
         logger.info("Mirrors updated successfully")
         return True
     
+    except CommandTimeoutError as e:
+        # reflector пишет mirrorlist только в конце, текущий список остается рабочим;
+        # зеркала, измеренные при проверке сети, ставятся в его начало
+        logger.warning(f"{e}, keeping current mirrorlist")
+        use_probed_mirrors(mount_point)
+        return False
+    
     except Exception as e:
         logger.error(f"Failed to update mirrors: {e}")
         return False
@@ -0,0 +1,361 @@
+"""
+Оценка места на диске до начала установки.
+
+Полный набор пакетов (база, профиль, DE, видеодрайвер, загрузчик,
+менеджер сети, дополнительные пакеты) раскрывается по группам и
+зависимостям через локальные базы синхронизации pacman
+(/var/lib/pacman/sync/*.db). Из них же берутся размеры: %CSIZE% -
+загрузка (пакеты остаются в кэше pacman целевой системы), %ISIZE% -
+место после распаковки.
+
+Сумма сравнивается с корневым разделом, который останется после
+разметки (диск минус EFI-раздел и служебное место ФС),
+чтобы установка остановилась до стирания диска, а не на середине
+pacman -S. Если баз синхронизации нет, используется грубая оценка
+из требований DE (installer.defaults).
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+from config import config, t
+from utils.logger import logger
+from utils.lazy import lazy_module
+from utils.hwprobe import read_block_device
+from installer.packages import get_profile_packages
+from installer.desktop import get_desktop_packages
+from installer.graphics import get_gpu_packages
+from installer.bootloader import get_bootloader_packages
+from installer.network import NETWORK_MANAGERS
+from installer.disk import EFI_PARTITION_MB
+from installer.defaults import BASE_SYSTEM_MB, desktop_disk_mb
+
+tarfile = lazy_module('tarfile')
+
+SYNC_DB_DIR = '/var/lib/pacman/sync'
+
+# Порядок репозиториев как в pacman.conf: при одинаковых именах побеждает первый
+REPO_ORDER = ('core', 'extra', 'multilib')
+
+BASE_PACKAGES = ['base', 'linux', 'linux-firmware']
+
+# Пакеты, которые установщик ставит сам (update_mirrors)
+INSTALLER_PACKAGES = ['reflector']
+
+# Служебное место файловой системы (доля раздела)
+FILESYSTEM_OVERHEAD = {'ext4': 0.02, 'btrfs': 0.03}
+
+# Запас на initramfs, логи и файлы, созданные после установки пакетов (MB)
+DISK_SPACE_MARGIN_MB = 1024
+
+MB = 1024 * 1024
+
+_VERSION_CONSTRAINT = re.compile(r'[<>=]')
+
+def _format_bytes(size: float) -> str:
+    """Размер в виде '512MB' / '12.3GB'."""
+    if size < 1024 * MB:
+        return f"{size / MB:.0f}MB"
+    return f"{size / (1024 * MB):.1f}GB"
+
+def _strip_version(dep: str) -> str:
+    """Имя из зависимости с ограничением версии ('glibc>=2.38' -> 'glibc')."""
+    return _VERSION_CONSTRAINT.split(dep, 1)[0].strip()
+
+def parse_desc(text: str) -> Dict[str, List[str]]:
+    """
+    Разобрать файл desc из базы pacman.
+    
+    Args:
+        text: Содержимое ("%NAME%\\nfoo\\n\\n%VERSION%\\n...")
+    
+    Returns:
+        Словарь поле -> список значений ('NAME' -> ['foo'])
+    """
+    fields: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in text.splitlines():
+        if line.startswith('%') and line.endswith('%') and len(line) > 2:
+            current = fields.setdefault(line[1:-1], [])
+        elif not line:
+            current = None
+        elif current is not None:
+            current.append(line)
+    return fields
+
+class PackageInfo:
+    """Пакет из базы синхронизации."""
+    
+    def __init__(self, fields: Dict[str, List[str]], repo: str):
+        """
+        Инициализация.
+        
+        Args:
+            fields: Результат parse_desc
+            repo: Имя репозитория
+        """
+        self.name = fields['NAME'][0]
+        self.version = (fields.get('VERSION') or [''])[0]
+        self.repo = repo
+        self.download_size = int((fields.get('CSIZE') or ['0'])[0])
+        self.installed_size = int((fields.get('ISIZE') or ['0'])[0])
+        self.depends = [_strip_version(dep) for dep in fields.get('DEPENDS', [])]
+        self.provides = [_strip_version(name) for name in fields.get('PROVIDES', [])]
+        self.groups = fields.get('GROUPS', [])
+
+class SyncDatabase:
+    """Пакеты, виртуальные имена и группы из баз синхронизации pacman."""
+    
+    def __init__(self, db_dir: str = SYNC_DB_DIR):
+        """
+        Инициализация (базы читаются при первом обращении).
+        
+        Args:
+            db_dir: Каталог баз синхронизации
+        """
+        self.db_dir = db_dir
+        self.repos: List[str] = []
+        self.packages: Dict[str, PackageInfo] = {}
+        self.providers: Dict[str, List[str]] = {}
+        self.groups: Dict[str, List[str]] = {}
+        self._loaded = False
+    
+    def _repo_files(self) -> List[Tuple[str, str]]:
+        """Пары (репозиторий, путь к .db) в порядке REPO_ORDER."""
+        try:
+            names = [n[:-3] for n in os.listdir(self.db_dir) if n.endswith('.db')]
+        except OSError:
+            return []
+        order = {repo: index for index, repo in enumerate(REPO_ORDER)}
+        names.sort(key=lambda repo: (order.get(repo, len(order)), repo))
+        return [(repo, os.path.join(self.db_dir, f"{repo}.db")) for repo in names]
+    
+    def _load_repo(self, repo: str, path: str) -> None:
+        """Прочитать одну базу (tar со сжатием, каталог на пакет)."""
+        entries: Dict[str, Dict[str, List[str]]] = {}
+        with tarfile.open(path, 'r:*') as archive:
+            for member in archive:
+                directory, _, filename = member.name.rpartition('/')
+                # Старые базы держат зависимости в отдельном файле depends
+                if not member.isfile() or filename not in ('desc', 'depends'):
+                    continue
+                text = archive.extractfile(member).read().decode('utf-8', 'replace')
+                entries.setdefault(directory, {}).update(parse_desc(text))
+        
+        for fields in entries.values():
+            if 'NAME' not in fields:
+                continue
+            package = PackageInfo(fields, repo)
+            if package.name in self.packages:
+                continue  # пакет из репозитория выше по списку
+            self.packages[package.name] = package
+            for name in package.provides:
+                self.providers.setdefault(name, []).append(package.name)
+            for group in package.groups:
+                self.groups.setdefault(group, []).append(package.name)
+    
+    def load(self) -> bool:
+        """
+        Прочитать все базы (повторный вызов ничего не делает).
+        
+        Returns:
+            True если прочитана хотя бы одна база
+        """
+        if self._loaded:
+            return bool(self.repos)
+        self._loaded = True
+        for repo, path in self._repo_files():
+            try:
+                self._load_repo(repo, path)
+                self.repos.append(repo)
+            except Exception as e:
+                logger.warning(f"Failed to read sync database {path}: {e}")
+        logger.debug(f"Sync databases {self.repos}: {len(self.packages)} packages")
+        return bool(self.repos)
+    
+    def find(self, name: str) -> Optional[PackageInfo]:
+        """
+        Пакет по имени или по виртуальному имени (provides).
+        
+        Args:
+            name: Имя пакета, зависимости или soname
+        
+        Returns:
+            PackageInfo или None
+        """
+        if name in self.packages:
+            return self.packages[name]
+        providers = self.providers.get(name)
+        return self.packages[providers[0]] if providers else None
+    
+    def resolve(self, names: Iterable[str]) -> Tuple[Dict[str, PackageInfo], List[str]]:
+        """
+        Раскрыть группы и зависимости.
+        
+        Args:
+            names: Имена пакетов или групп
+        
+        Returns:
+            (пакеты по имени, ненайденные имена)
+        """
+        self.load()
+        resolved: Dict[str, PackageInfo] = {}
+        missing: List[str] = []
+        queue: List[str] = []
+        for name in names:
+            # Группа ставится целиком, как pacman -S --noconfirm
+            if name not in self.packages and name in self.groups:
+                queue.extend(self.groups[name])
+            elif self.find(name) is not None:
+                queue.append(name)
+            else:
+                missing.append(name)
+        
+        while queue:
+            package = self.find(queue.pop())
+            if package is None or package.name in resolved:
+                continue
+            resolved[package.name] = package
+            for dep in package.depends:
+                if self.find(dep) is None:
+                    missing.append(dep)
+                else:
+                    queue.append(dep)
+        return resolved, sorted(set(missing))
+
+def collect_package_set(cfg: Any = config) -> List[str]:
+    """
+    Все пакеты, которые установка попросит у pacman при этой конфигурации.
+    
+    Args:
+        cfg: InstallationConfig
+    
+    Returns:
+        Имена пакетов и групп без повторов
+    """
+    names = list(BASE_PACKAGES) + INSTALLER_PACKAGES
+    names += get_profile_packages(cfg.installation_profile)
+    if cfg.desktop_environment:
+        names += get_desktop_packages(cfg.desktop_environment)
+    if cfg.gpu_driver:
+        names += get_gpu_packages(cfg.gpu_driver)
+    names += get_bootloader_packages(cfg.bootloader, cfg.is_uefi)
+    if cfg.network_manager in NETWORK_MANAGERS:
+        names += NETWORK_MANAGERS[cfg.network_manager]['packages']
+    names += cfg.additional_packages
+    return list(dict.fromkeys(names))
+
+def root_partition_bytes(disk_bytes: int, cfg: Any = config) -> Optional[int]:
+    """
+    Место под файлы в корневом разделе после разметки.
+    
+    Вычитается только то, что выделяют автоматические схемы
+    installer.disk: EFI-раздел и служебное место ФС. Swap они не создают.
+    
+    Args:
+        disk_bytes: Размер диска
+        cfg: InstallationConfig (схема разметки, режим загрузки)
+    
+    Returns:
+        Байты, доступные пакетам, или None для ручной разметки
+        (размер корневого раздела заранее неизвестен)
+    """
+    if cfg.partition_scheme not in ('auto_ext4', 'auto_btrfs'):
+        return None
+    
+    available = disk_bytes
+    if cfg.is_uefi:
+        available -= EFI_PARTITION_MB * MB
+    filesystem = 'btrfs' if cfg.partition_scheme == 'auto_btrfs' else 'ext4'
+    available -= int(available * FILESYSTEM_OVERHEAD[filesystem])
+    return max(0, available)
+
+class DiskEstimate:
+    """Оценка места, нужного установке."""
+    
+    def __init__(self):
+        """Инициализация пустой оценки."""
+        self.packages: Dict[str, PackageInfo] = {}
+        self.missing: List[str] = []
+        self.download_bytes = 0
+        self.installed_bytes = 0
+        self.margin_bytes = DISK_SPACE_MARGIN_MB * MB
+        self.from_sync_db = False
+        self.disk_bytes: Optional[int] = None
+        self.available_bytes: Optional[int] = None
+    
+    @property
+    def required_bytes(self) -> int:
+        """Распакованные пакеты, их архивы в кэше pacman и запас."""
+        return self.installed_bytes + self.download_bytes + self.margin_bytes
+    
+    @property
+    def fits(self) -> Optional[bool]:
+        """True/False - хватает ли места, None - размер раздела неизвестен."""
+        if self.available_bytes is None:
+            return None
+        return self.required_bytes <= self.available_bytes
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Оценка для логов."""
+        return {
+            'packages': len(self.packages),
+            'missing': self.missing,
+            'download_bytes': self.download_bytes,
+            'installed_bytes': self.installed_bytes,
+            'required_bytes': self.required_bytes,
+            'available_bytes': self.available_bytes,
+            'from_sync_db': self.from_sync_db,
+        }
+    
+    def describe(self, lang: Optional[str] = None) -> str:
+        """Текст для пользователя: сколько нужно и сколько есть."""
+        return t('disk_space_estimate', lang).format(
+            packages=len(self.packages),
+            download=_format_bytes(self.download_bytes),
+            installed=_format_bytes(self.installed_bytes),
+            need=_format_bytes(self.required_bytes),
+            have=_format_bytes(self.available_bytes or 0)
+        )
+
+def estimate_disk_usage(
+    cfg: Any = config,
+    db: Optional[SyncDatabase] = None,
+    disk_bytes: Optional[int] = None
+) -> DiskEstimate:
+    """
+    Оценить место для текущей конфигурации.
+    
+    Args:
+        cfg: InstallationConfig
+        db: Базы синхронизации (по умолчанию SYNC_DB_DIR)
+        disk_bytes: Размер диска (по умолчанию - из sysfs для cfg.disk)
+    
+    Returns:
+        DiskEstimate
+    """
+    estimate = DiskEstimate()
+    db = db or SyncDatabase()
+    
+    if db.load():
+        estimate.packages, estimate.missing = db.resolve(collect_package_set(cfg))
+        estimate.download_bytes = sum(p.download_size for p in estimate.packages.values())
+        estimate.installed_bytes = sum(p.installed_size for p in estimate.packages.values())
+        estimate.from_sync_db = True
+        if estimate.missing:
+            logger.warning(f"Packages not found in sync databases: {', '.join(estimate.missing)}")
+    else:
+        # Нет баз (pacman -Sy не выполнялся): грубая оценка из требований DE
+        logger.warning("No pacman sync databases, using static disk space estimate")
+        size_mb = desktop_disk_mb(cfg.desktop_environment) if cfg.desktop_environment else BASE_SYSTEM_MB
+        estimate.installed_bytes = size_mb * MB
+    
+    if disk_bytes is None and cfg.disk:
+        device = read_block_device(cfg.disk)
+        disk_bytes = device.size_bytes if device.exists else None
+    if disk_bytes:
+        estimate.disk_bytes = disk_bytes
+        estimate.available_bytes = root_partition_bytes(disk_bytes, cfg)
+    
+    logger.info(f"Disk space estimate: {estimate.to_dict()}")
+    return estimate
@@ -3,7 +3,7 @@
 """
 
 from typing import Optional, List
-from utils.executor import run_command
+from utils.executor import Cmd, run_command, run_in_chroot
 from utils.logger import logger
 from utils.validators import validate_username, validate_password
 from ui.dialogs import get_dialog
@@ -150,17 +150,14 @@ def set_root_password_system(password: str, mount_point: str = '/mnt') -> bool:
     try:
         logger.info("Setting root password")
         
-        # Экранировать пароль для использования в shell
-        escaped_pass = password.replace("'", "'\\''")
-        
-        # Установить пароль через chpasswd
-        cmd = (
-            f"echo 'root:{escaped_pass}' | "
-            f"arch-chroot {mount_point} chpasswd"
+        # Установить пароль через chpasswd (пароль передается через stdin)
+        run_in_chroot(
+            Cmd(['chpasswd'], stdin=f"root:{password}"),
+            mount_point=mount_point,
+            check=True,
+            log=False
         )
         
-        run_command(cmd, check=True, log=False, shell=True)
-        
         logger.info("Root password set successfully")
         return True
     
@@ -188,19 +185,20 @@ def create_user_system(user_info: dict, mount_point: str = '/mnt') -> bool:
         
         # Создать пользователя
         groups_str = ','.join(groups)
-        run_command(
-            f"arch-chroot {mount_point} useradd -m -G {groups_str} {username}",
+        run_in_chroot(
+            Cmd(['useradd', '-m', '-G', groups_str, username]),
+            mount_point=mount_point,
             check=True,
             log=True
         )
         
         # Установить пароль
-        escaped_pass = password.replace("'", "'\\''")
-        cmd = (
-            f"echo '{username}:{escaped_pass}' | "
-            f"arch-chroot {mount_point} chpasswd"
+        run_in_chroot(
+            Cmd(['chpasswd'], stdin=f"{username}:{password}"),
+            mount_point=mount_point,
+            check=True,
+            log=False
         )
-        run_command(cmd, check=True, log=False, shell=True)
         
         logger.info(f"User {username} created successfully")
         return True
@@ -224,8 +222,8 @@ def setup_sudo(mount_point: str = '/mnt') -> bool:
         
         # Раскомментировать wheel в sudoers
         run_command(
-            f"sed -i 's/^# %wheel ALL=(ALL) ALL/%wheel ALL=(ALL) ALL/' "
-            f"{mount_point}/etc/sudoers",
+            Cmd(['sed', '-i', 's/^# %wheel ALL=(ALL) ALL/%wheel ALL=(ALL) ALL/',
+                 f"{mount_point}/etc/sudoers"]),
             check=True,
             log=True
         )
@@ -11,20 +11,12 @@ import argparse
 from datetime import datetime
 
 from config import config, CURRENT_LANG, TRANSLATIONS, t, APP_VERSION, APP_NAME
-from utils.logger import logger
-from utils.validators import check_all_prerequisites
-from utils.system import print_system_info
-from ui.dialogs import get_dialog
-from ui.progress import get_progress
+from utils.logger import logger, flush_logs
 
-from installer.disk import detect_disks, select_disk, detect_boot_mode, select_partition_scheme, setup_swap, create_partitions, generate_fstab
-from installer.graphics import detect_gpu, select_gpu_driver, install_gpu_drivers
-from installer.desktop import select_desktop_environment, install_desktop_environment
-from installer.localization import configure_keyboards, select_timezone, configure_locales, set_timezone, generate_locale, set_keyboard_layout, configure_x11_keyboard
-from installer.packages import select_installation_profile, get_profile_packages, select_additional_packages, install_packages, enable_multilib, setup_aur_helper, update_mirrors
-from installer.network import configure_hostname, select_network_manager, set_hostname, install_network_manager
-from installer.users import set_root_password, create_user, set_root_password_system, create_user_system, setup_sudo
-from installer.bootloader import detect_boot_mode as detect_boot_mode_bl, select_bootloader, install_bootloader
+# Модули установщика (executor, проверка сети, история, оценка места,
+# интерфейс) импортируются в функциях, которые их используют: main.py
+# --help, --import-report и --history-report не должны платить за них
+# (бюджет STARTUP_BUDGET_MS)
 
 # ASCII Art логотип
 ARCH_LOGO = r"""
@@ -47,7 +39,7 @@ ARCH_LOGO = r"""
   `+sso+:-`                 `.-/+oso:
  `++:.                           `-/+/
  .`                                 `/
-
+ 
  ╔═══════════════════════════════════════╗
  ║   Arch Linux Automated Installer      ║
  ║            Version 2.0                ║
@@ -81,6 +73,16 @@ def main_menu(dialog) -> None:
     Главное меню установки.
     Показывает статус каждого этапа.
     """
+    from installer.disk import select_disk, select_partition_scheme, setup_swap
+    from installer.graphics import select_gpu_driver
+    from installer.desktop import select_desktop_environment
+    from installer.localization import configure_keyboards, select_timezone, configure_locales
+    from installer.packages import select_installation_profile
+    from installer.network import configure_hostname, select_network_manager
+    from installer.users import set_root_password, create_user
+    from installer.inventory import inventory
+    from installer.defaults import HardwareProfile, recommend, apply_disk_defaults
+    
     while True:
         # Подготовить информацию о выборах
         disk_info = config.disk if config.disk else t('not_selected')
@@ -112,7 +114,7 @@ def main_menu(dialog) -> None:
 ║ [L: Load] [E: Exit]                   ║
 ╚════════════════════════════════════════╝
 """
-        
+
         dialog.msgbox(menu_text, height=25, width=80)
         
         # Получить выбор от пользователя (в простой версии используем меню)
@@ -144,9 +146,12 @@ def main_menu(dialog) -> None:
         
         elif result == '2':
             # Выбор диска
-            disk = select_disk(dialog)
+            disk = select_disk(dialog, inventory.disks)
             if disk:
                 config.disk = disk
+                # Схема разметки и swap зависят от размера и типа диска,
+                # но выбор пользователя в пункте 3 не перезаписывается
+                apply_disk_defaults(recommend(HardwareProfile.collect(disk)))
         
         elif result == '3':
             # Выбор схемы разметки
@@ -154,17 +159,18 @@ def main_menu(dialog) -> None:
                 dialog.msgbox('error_disk_not_found')
                 continue
             
-            config.is_uefi = detect_boot_mode()
-            scheme = select_partition_scheme(dialog)
+            config.is_uefi = inventory.is_uefi
+            scheme = select_partition_scheme(dialog, config.partition_scheme)
             if scheme:
                 config.partition_scheme = scheme
-                swap_config = setup_swap(dialog)
+                swap_config = setup_swap(dialog, {'type': config.swap_type, 'size_gb': config.swap_size})
                 if swap_config:
+                    config.swap_type = swap_config['type']
                     config.swap_size = swap_config.get('size_gb', 2)
         
         elif result == '4':
             # Выбор видеодрайвера
-            detected = detect_gpu()
+            detected = inventory.gpu
             config.gpu_model = f"{detected['vendor']} {detected['model']}"
             driver = select_gpu_driver(dialog, detected)
             if driver:
@@ -172,8 +178,8 @@ def main_menu(dialog) -> None:
         
         elif result == '5':
             # Выбор Desktop Environment
-            de = select_desktop_environment(dialog)
-            if de:
+            de = select_desktop_environment(dialog, config.desktop_environment)
+            if de and confirm_hardware_fit(dialog, de, config.installation_profile):
                 config.desktop_environment = de
         
         elif result == '6':
@@ -185,8 +191,8 @@ def main_menu(dialog) -> None:
         
         elif result == '7':
             # Выбор профиля установки
-            profile = select_installation_profile(dialog)
-            if profile:
+            profile = select_installation_profile(dialog, config.installation_profile)
+            if profile and confirm_hardware_fit(dialog, config.desktop_environment, profile):
                 config.installation_profile = profile
         
         elif result == '8':
@@ -237,7 +243,7 @@ def main_menu(dialog) -> None:
         
         elif result == 'i':
             # Начать установку
-            if final_review(dialog):
+            if final_review(dialog) and confirm_disk_space(dialog):
                 install_system(dialog)
                 break
         
@@ -254,6 +260,41 @@ def main_menu(dialog) -> None:
             if dialog.yesno('Do you really want to exit?'):
                 break
 
+def confirm_hardware_fit(dialog, desktop, profile) -> bool:
+    """
+    Предупредить, если DE и профиль не подходят железу.
+    
+    Returns:
+        True если предупреждений нет или пользователь подтвердил выбор
+    """
+    from installer.defaults import HardwareProfile, check_selection
+    
+    warnings = check_selection(HardwareProfile.collect(config.disk), desktop, profile)
+    if not warnings:
+        return True
+    
+    logger.warning(f"Selection does not fit hardware: {'; '.join(warnings)}")
+    text = '\n\n'.join(warnings + [t('warn_continue')])
+    return dialog.yesno(text, height=8 + 2 * len(warnings), width=78)
+
+def confirm_disk_space(dialog) -> bool:
+    """
+    Проверить до стирания диска, что выбранные пакеты на нем поместятся.
+    
+    Returns:
+        True если места достаточно или размер диска неизвестен
+    """
+    from installer.sizing import estimate_disk_usage
+    
+    estimate = estimate_disk_usage()
+    if estimate.fits is not False:
+        return True
+    
+    logger.error(f"Not enough disk space on {config.disk}: need {estimate.required_bytes} bytes, "
+                 f"root partition {estimate.available_bytes} bytes")
+    dialog.msgbox(f"{t('disk_too_small').format(disk=config.disk)}\n\n{estimate.describe()}", height=12, width=78)
+    return False
+
 def final_review(dialog) -> bool:
     """
     Финальный обзор конфигурации перед установкой.
@@ -282,18 +323,39 @@ def final_review(dialog) -> bool:
 
 Все параметры правильны?
 """
-    
+
     logger.info("Final review shown to user")
     return dialog.yesno('Do you confirm these settings?')
 
 def install_system(dialog) -> None:
     """Главная функция установки системы."""
+    from utils.executor import ChrootSession
+    from utils.tracing import tracer
+    from utils.accounting import accounting
+    from utils.events import events
+    from utils.history import history
+    from utils.validators import wait_for_pacman_keys
+    from utils.keyring import copy_keyring
+    from ui.progress import get_progress
+    from installer.disk import create_partitions, generate_fstab
+    from installer.graphics import install_gpu_drivers
+    from installer.desktop import install_desktop_environment
+    from installer.localization import set_timezone, generate_locale
+    from installer.packages import get_profile_packages, install_packages, update_mirrors, configure_parallelism, configure_live_parallelism
+    from installer.network import set_hostname, install_network_manager
+    from installer.users import set_root_password_system, create_user_system, setup_sudo
+    from installer.bootloader import select_bootloader, install_bootloader
+    
     logger.info("Starting installation...")
     config.installation_started = True
+    history.start_run()
     
     progress = get_progress('install')
     progress.start('installation_progress')
     
+    # Одна chroot-сессия на всю установку вместо arch-chroot на каждую команду
+    chroot = ChrootSession('/mnt')
+    
     try:
         # 1. Подготовка диска
         progress.next_stage()
@@ -311,15 +373,26 @@ def install_system(dialog) -> None:
         # 4. Установка базовой системы
         progress.next_stage()
         base_packages = ['base', 'linux', 'linux-firmware']
+        # Базовые пакеты качает pacman live-окружения - меняем его pacman.conf
+        configure_live_parallelism(config.parallel_downloads)
+        if not wait_for_pacman_keys():
+            logger.warning("Pacman keyring is not ready, package signatures may fail")
+        else:
+            copy_keyring()
         if not install_packages(base_packages):
             raise Exception("Failed to install base system")
+        configure_parallelism(config.parallel_downloads, config.make_jobs)
         
         # 5-6. Ядро и fstab
         progress.next_stage()
         progress.next_stage()
+        # genfstab - до старта сессии: иначе в fstab попадут ее служебные
+        # монтирования (proc, sys, dev, run, efivars, resolv.conf)
         if not generate_fstab():
             raise Exception("Failed to generate fstab")
         
+        chroot.start()
+        
         # 7-9. Локализация
         progress.next_stage()
         progress.next_stage()
@@ -384,8 +457,14 @@ def install_system(dialog) -> None:
                 logger.warning("Network manager installation failed")
         
         # Завершение
+        chroot.close()
         progress.set_percent(100, 'installation_complete')
         progress.stop()
+        tracer.save()
+        accounting.log_summary()
+        events.emit('install_end', success=True, stages=accounting.summary())
+        history.record_run(success=True)
+        history.save_to_target()
         
         logger.info("Installation completed successfully!")
         config.installation_completed = True
@@ -397,7 +476,13 @@ def install_system(dialog) -> None:
     
     except Exception as e:
         logger.error(f"Installation failed: {e}")
+        chroot.close()
         progress.stop()
+        tracer.save()
+        accounting.log_summary()
+        events.emit('install_end', success=False, error=str(e), stages=accounting.summary())
+        history.record_run(success=False, error=str(e))
+        history.save_to_target()
         dialog.msgbox(f"Installation failed: {str(e)}")
 
 def post_install(dialog) -> None:
@@ -412,11 +497,14 @@ def post_install(dialog) -> None:
     result = dialog.menu('Installation complete', choices)
     
     if result == 'reboot':
+        flush_logs()
         os.system('reboot')
     elif result == 'chroot':
         os.system('arch-chroot /mnt')
     elif result == 'logs':
-        dialog.textbox('/var/log/archinstall.log')
+        from ui.logviewer import view_log
+        flush_logs()
+        view_log(dialog)
 
 def save_config() -> None:
     """Сохранить конфигурацию в YAML."""
@@ -487,18 +575,57 @@ def main():
     parser.add_argument('--config', help='Load configuration from file')
     parser.add_argument('--auto', action='store_true', help='Run in automatic mode')
     parser.add_argument('--lang', choices=['ru', 'en'], default='ru', help='Interface language')
+    parser.add_argument('--record-cassette', metavar='PATH',
+                        help='Record all executed commands to a cassette file')
+    parser.add_argument('--replay-cassette', metavar='PATH',
+                        help='Replay command results from a cassette instead of running them')
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help='Replay with recorded delays scaled by speed (0 - no delays)')
+    parser.add_argument('--import-report', action='store_true',
+                        help='Show import time report (-X importtime) and startup budget')
+    parser.add_argument('--history-report', action='store_true',
+                        help='Show stage timing percentiles and regressions from the installation history')
+    parser.add_argument('--history-db', metavar='PATH',
+                        help='Installation history database (default: ARCHINSTALL_HISTORY_DB or /var/log)')
+    parser.add_argument('--history-runs', type=int, default=None, metavar='N',
+                        help='Compare the last run with the previous N runs of the same profile')
     
     args = parser.parse_args()
     
+    if args.import_report:
+        from utils.startup import print_import_report
+        return 0 if print_import_report() else 1
+    
+    if args.history_report:
+        from utils.history import print_history_report
+        return 0 if print_history_report(args.history_db, runs=args.history_runs) else 1
+    
+    if args.history_db:
+        from utils.history import history
+        history.path = args.history_db
+    
+    from utils.cassette import start_recording, start_replay, stop_cassette
+    from utils.validators import check_all_prerequisites
+    from utils.system import print_system_info
+    from ui.dialogs import get_dialog
+    from installer.inventory import inventory
+    from installer.defaults import HardwareProfile, recommend, apply_defaults
+    
+    # Запись/воспроизведение команд для профилирования без диска и сети
+    if args.record_cassette:
+        start_recording(args.record_cassette)
+    elif args.replay_cassette:
+        start_replay(args.replay_cassette, speed=args.replay_speed)
+    
+    # Пробы железа (lspci, lsblk) идут в фоне, пока пользователь на первых экранах
+    inventory.start()
+    
     # Логирование
     logger.info("=" * 60)
     logger.info(f"Starting {APP_NAME} v{APP_VERSION}")
     logger.info(f"Start time: {datetime.now()}")
     logger.info("=" * 60)
     
-    # Печать информации о системе
-    print_system_info()
-    
     # Проверка предварительных условий
     if not check_all_prerequisites():
         logger.error("Prerequisite check failed")
@@ -515,12 +642,26 @@ def main():
     # Показать приветствие
     show_welcome(dialog)
     
+    # Информация о системе - после приветствия: к этому времени пробы
+    # закончились, и ожидание не задерживает первый экран
+    print_system_info(inventory.system)
+    inventory.log_timings()
+    
+    # Значения по умолчанию под железо (диски и видеокарта уже определены в фоне)
+    config.is_uefi = inventory.is_uefi
+    apply_defaults(recommend(HardwareProfile.collect()))
+    
     # Главное меню
     main_menu(dialog)
     
     logger.info("Installer exited normally")
     logger.info("=" * 60)
     
+    summary = stop_cassette()
+    if summary is not None and summary.get('matched') is False:
+        logger.error("Replayed commands do not match the cassette")
+        return 1
+    
     return 0
 
 if __name__ == '__main__':
@@ -532,3 +673,6 @@ if __name__ == '__main__':
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        from utils.cassette import stop_cassette
+        stop_cassette()
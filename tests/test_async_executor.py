@@ -0,0 +1,61 @@
+"""
+Параллельное выполнение независимых команд (utils.executor).
+"""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+import unittest
+
+from utils.executor import (
+    Cmd, add_command_listener, async_run_command, remove_command_listener, run_commands_parallel
+)
+
+class ParallelCommandsTest(unittest.TestCase):
+
+    def max_concurrency(self, count, limit):
+        """Сколько команд работало одновременно (по журналу начала и конца)."""
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, 'journal')
+            script = f"echo + >> {journal}; sleep 0.2; echo - >> {journal}"
+            results = run_commands_parallel([script] * count, limit=limit, log=False)
+            self.assertEqual(results, [(0, '')] * count)
+            with open(journal) as f:
+                events = f.read().split()
+        
+        running = peak = 0
+        for event in events:
+            running += 1 if event == '+' else -1
+            peak = max(peak, running)
+        return peak
+    
+    def test_limit(self):
+        self.assertEqual(self.max_concurrency(6, limit=2), 2)
+        self.assertEqual(self.max_concurrency(3, limit=4), 3)
+        # limit < 1 означает последовательное выполнение
+        self.assertEqual(self.max_concurrency(2, limit=0), 1)
+    
+    def test_results_in_order(self):
+        cmds = ['sleep 0.2; echo slow', Cmd(['echo', 'fast']), Cmd(['cat'], stdin='input'), 'exit 5']
+        results = run_commands_parallel(cmds, log=False)
+        self.assertEqual(results, [(0, 'slow\n'), (0, 'fast\n'), (0, 'input'), (5, '')])
+    
+    def test_check(self):
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            run_commands_parallel(['true', 'echo bad >&2; exit 2'], check=True, log=False)
+        self.assertEqual(caught.exception.returncode, 2)
+        self.assertIn('bad', caught.exception.output)
+    
+    def test_records(self):
+        records = []
+        add_command_listener(records.append)
+        try:
+            returncode, output = asyncio.run(async_run_command(Cmd(['echo', 'hi']), log=False))
+        finally:
+            remove_command_listener(records.append)
+        self.assertEqual((returncode, output), (0, 'hi\n'))
+        self.assertEqual([(r.kind, r.cmd, r.returncode) for r in records], [('async', 'echo hi', 0)])
+
+if __name__ == '__main__':
+    unittest.main()
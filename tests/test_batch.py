@@ -0,0 +1,68 @@
+"""
+Пакет команд в одном процессе (utils.executor.CommandBatch).
+"""
+
+import unittest
+
+from utils.executor import Cmd, CommandBatch, CommandBatchError
+
+class CommandBatchTest(unittest.TestCase):
+
+    def test_output_split_by_step(self):
+        batch = CommandBatch('test', log=False)
+        batch.add("echo first")
+        batch.add("echo second; echo more")
+        batch.add("true")
+        steps = batch.run()
+        
+        self.assertEqual([step.returncode for step in steps], [0, 0, 0])
+        self.assertEqual([step.output for step in steps], ['first', 'second\nmore', ''])
+        self.assertTrue(all(step.duration is not None for step in steps))
+    
+    def test_failing_step_stops_batch(self):
+        batch = CommandBatch('test', log=False)
+        batch.add("echo ok")
+        batch.add("echo broken; false", description='broken step')
+        batch.add("echo never")
+        
+        with self.assertRaises(CommandBatchError) as caught:
+            batch.run()
+        error = caught.exception
+        self.assertIs(error.step, batch.steps[1])
+        self.assertEqual(error.returncode, 1)
+        self.assertEqual(error.cmd, "echo broken; false")
+        self.assertIn('broken', error.output)
+        # Шаг после упавшего не выполнялся
+        self.assertEqual([step.returncode for step in error.steps], [0, 1, None])
+    
+    def test_no_check_returns_steps(self):
+        batch = CommandBatch('test', check=False, log=False)
+        batch.add("true")
+        batch.add("exit 4")
+        steps = batch.run()
+        self.assertEqual([step.returncode for step in steps], [0, 4])
+    
+    def test_context_manager_runs_on_exit(self):
+        with self.assertRaises(CommandBatchError):
+            with CommandBatch('test', log=False) as batch:
+                batch.add("false")
+        
+        # Исключение внутри блока: пакет не выполняется
+        with self.assertRaises(KeyError):
+            with CommandBatch('test', log=False) as batch:
+                batch.add("false")
+                raise KeyError('stop')
+        self.assertIsNone(batch.steps[0].returncode)
+    
+    def test_cmd_steps(self):
+        batch = CommandBatch('test', log=False)
+        batch.add(Cmd(['printf', '%s', "it's a $HOME"]))
+        batch.add(Cmd(['pwd'], cwd='/'))
+        steps = batch.run()
+        self.assertEqual([step.output for step in steps], ["it's a $HOME", '/'])
+        
+        with self.assertRaises(ValueError):
+            batch.add(Cmd(['chpasswd'], stdin='root:secret'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Буфер вывода команд с ограничением памяти (utils.capture).
+"""
+
+import os
+import tempfile
+import unittest
+
+from utils.capture import CaptureBuffer
+
+class CaptureBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def fill(self, buffer, count):
+        for number in range(count):
+            buffer(f"line {number:04d}", 'stdout')
+    
+    def test_small_output_stays_in_memory(self):
+        buffer = CaptureBuffer('echo', limit=1000, spill_dir=self.tmp.name)
+        self.fill(buffer, 10)
+        buffer.close()
+        self.assertIsNone(buffer.path)
+        self.assertEqual(buffer.text().splitlines()[-1], 'line 0009')
+        self.assertEqual(os.listdir(self.tmp.name), [])
+    
+    def test_spill_keeps_full_output_in_file(self):
+        buffer = CaptureBuffer('pacman -S base', limit=200, spill_dir=self.tmp.name)
+        self.fill(buffer, 1000)
+        buffer.close(keep=True)
+        
+        # В памяти - начало и хвост в пределах лимита
+        self.assertLessEqual(buffer.head_size + buffer.tail_size, 200)
+        self.assertEqual(buffer.head[0], 'line 0000')
+        self.assertEqual(buffer.tail[-1], 'line 0999')
+        self.assertGreater(buffer.omitted_lines, 0)
+        self.assertIn(buffer.path, buffer.text())
+        
+        with open(buffer.path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, [f"line {number:04d}" for number in range(1000)])
+        self.assertTrue(os.path.basename(buffer.path).startswith('pacman_-S_base-'))
+    
+    def test_spill_file_removed_for_successful_command(self):
+        buffer = CaptureBuffer('cmd', limit=100, spill_dir=self.tmp.name)
+        self.fill(buffer, 100)
+        path = buffer.path
+        buffer.close(keep=False)
+        self.assertIsNone(buffer.path)
+        self.assertFalse(os.path.exists(path))
+    
+    def test_unwritable_spill_dir(self):
+        target = os.path.join(self.tmp.name, 'file')
+        open(target, 'w').close()
+        buffer = CaptureBuffer('cmd', limit=100, spill_dir=os.path.join(target, 'dir'))
+        self.fill(buffer, 100)
+        self.assertIsNone(buffer.path)
+        self.assertIsNotNone(buffer.spill_error)
+        self.assertLessEqual(buffer.tail_size, buffer.tail_limit)
+    
+    def test_excerpt(self):
+        buffer = CaptureBuffer('cmd', limit=100000, spill_dir=self.tmp.name)
+        self.fill(buffer, 100)
+        excerpt = buffer.excerpt(lines=2).splitlines()
+        self.assertEqual(excerpt[:2], ['line 0000', 'line 0001'])
+        self.assertIn('96 lines omitted', excerpt[2])
+        self.assertEqual(excerpt[-1], 'line 0099')
+
+if __name__ == '__main__':
+    unittest.main()
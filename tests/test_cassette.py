@@ -0,0 +1,102 @@
+"""
+Запись и воспроизведение команд (utils.cassette).
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+from utils.cassette import Cassette, CassetteMiss, start_recording, start_replay, stop_cassette
+from utils.executor import Cmd, CommandTimeoutError, run_command
+
+class CassetteRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(stop_cassette)
+        self.path = os.path.join(directory.name, 'cassette.jsonl')
+        self.marker = os.path.join(directory.name, 'ran')
+    
+    def record(self):
+        start_recording(self.path)
+        try:
+            # Побочный эффект показывает, запускался ли процесс
+            run_command(Cmd(['sh', '-c', f"touch {self.marker}; echo out; echo err >&2"]), log=False)
+            run_command(Cmd(['sh', '-c', 'exit 3']), check=False, log=False)
+            run_command(Cmd(['echo', 'one']), log=False)
+            run_command(Cmd(['echo', 'one']), log=False)
+        finally:
+            summary = stop_cassette()
+        os.remove(self.marker)
+        return summary
+    
+    def test_replay_without_processes(self):
+        self.assertEqual(self.record()['commands'], 4)
+        
+        start_replay(self.path)
+        returncode, output = run_command(
+            Cmd(['sh', '-c', f"touch {self.marker}; echo out; echo err >&2"]), log=False
+        )
+        self.assertEqual((returncode, output), (0, 'out\n'))
+        self.assertFalse(os.path.exists(self.marker))
+        
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            run_command(Cmd(['sh', '-c', 'exit 3']), log=False)
+        self.assertEqual(caught.exception.returncode, 3)
+        
+        # Повторы одной команды отдаются по очереди
+        self.assertEqual(run_command(Cmd(['echo', 'one']), log=False), (0, 'one\n'))
+        self.assertEqual(run_command(Cmd(['echo', 'one']), log=False), (0, 'one\n'))
+        
+        summary = stop_cassette()
+        self.assertTrue(summary['matched'])
+        self.assertEqual(summary['recorded_commands'], 4)
+    
+    def test_file_format(self):
+        self.record()
+        with open(self.path, encoding='utf-8') as f:
+            header, first, *_ = [json.loads(line) for line in f]
+        self.assertEqual(header['version'], 1)
+        self.assertEqual(first['kind'], 'command')
+        self.assertEqual((first['stdout'], first['stderr']), ('out\n', 'err\n'))
+    
+    def test_strict_miss(self):
+        self.record()
+        start_replay(self.path)
+        with self.assertRaises(CassetteMiss):
+            run_command(Cmd(['echo', 'unrecorded']), log=False)
+        summary = stop_cassette()
+        self.assertFalse(summary['matched'])
+        self.assertEqual(summary['misses'], ["command: echo unrecorded"])
+        self.assertEqual(len(summary['unused']), 4)
+    
+    def test_lenient_miss(self):
+        self.record()
+        start_replay(self.path, strict=False)
+        self.assertEqual(run_command(Cmd(['echo', 'unrecorded']), log=False), (0, ''))
+        self.assertEqual(stop_cassette()['misses'], ["command: echo unrecorded"])
+    
+    def test_timeout_replayed(self):
+        start_recording(self.path)
+        try:
+            with self.assertRaises(CommandTimeoutError):
+                run_command(Cmd(['sleep', '5']), log=False, timeout=0.2)
+        finally:
+            stop_cassette()
+        
+        start_replay(self.path)
+        with self.assertRaises(CommandTimeoutError) as caught:
+            run_command(Cmd(['sleep', '5']), log=False, timeout=0.2)
+        self.assertEqual(caught.exception.reason, 'deadline')
+    
+    def test_unknown_version(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': 99}) + '\n')
+        with self.assertRaises(ValueError):
+            Cassette(self.path, 'replay').open()
+
+if __name__ == '__main__':
+    unittest.main()
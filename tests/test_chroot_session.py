@@ -0,0 +1,64 @@
+"""
+Протокол маркеров ChrootSession (utils.executor).
+"""
+
+import subprocess
+import unittest
+
+from utils.executor import ChrootSession
+
+class ChrootSessionFramingTest(unittest.TestCase):
+
+    def setUp(self):
+        # Протокол сессии без chroot и монтирования: shell в текущем корне
+        self.session = ChrootSession('/')
+        self.session.proc = subprocess.Popen(
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    
+    def tearDown(self):
+        self.session.proc.stdin.close()
+        self.session.proc.wait()
+    
+    def test_returncode_of_each_command(self):
+        self.assertEqual(self.session.run('true', log=False), (0, ''))
+        self.assertEqual(self.session.run('exit 3', check=False, log=False), (3, ''))
+        self.assertEqual(self.session.run('echo ok', log=False), (0, 'ok\n'))
+    
+    def test_failure_raises_and_session_survives(self):
+        with self.assertRaises(subprocess.CalledProcessError) as caught:
+            self.session.run('echo broken; exit 2', log=False)
+        self.assertEqual(caught.exception.returncode, 2)
+        self.assertIn('broken', caught.exception.output)
+        # exit в подоболочке не завершает shell сессии
+        self.assertTrue(self.session.active)
+        self.assertEqual(self.session.run('echo next', log=False), (0, 'next\n'))
+    
+    def test_stderr_does_not_leak_into_next_command(self):
+        self.session.run('echo out; echo err >&2; printf tail >&2', log=False)
+        self.assertEqual(self.session.run('echo second', log=False), (0, 'second\n'))
+    
+    def test_input_passed_as_heredoc(self):
+        text = "line 1\n$HOME `id` 'quoted'\n"
+        _, output = self.session.run('cat', input=text, log=False)
+        self.assertEqual(output, text)
+        # Без input команда читает /dev/null и не ждет stdin сессии
+        self.assertEqual(self.session.run('cat', log=False), (0, ''))
+    
+    def test_marker_like_output_is_not_a_frame(self):
+        marker = self.session._marker
+        _, output = self.session.run(f"echo 'x {marker} 0'", log=False)
+        self.assertEqual(output, f"x {marker} 0\n")
+    
+    def test_commands_run_in_subshells(self):
+        # Переменные и cwd одной команды не влияют на следующие
+        _, before = self.session.run('pwd', log=False)
+        self.session.run('cd /tmp; FOO=1', log=False)
+        self.assertEqual(self.session.run('echo "${FOO:-unset}"', log=False)[1], 'unset\n')
+        self.assertEqual(self.session.run('pwd', log=False)[1], before)
+
+if __name__ == '__main__':
+    unittest.main()
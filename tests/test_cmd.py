@@ -0,0 +1,70 @@
+"""
+Команды в виде argv без shell (utils.executor.Cmd).
+"""
+
+import subprocess
+import unittest
+
+from utils.executor import Cmd, ChrootSession, run_command
+
+# Аргументы, которые shell бы разобрал по-своему
+TRICKY = ["it's", 'a "b"', '$HOME', '`id`', 'x; rm -rf /', '*', '']
+
+class CmdTest(unittest.TestCase):
+
+    def test_str_is_shell_quoted(self):
+        cmd = Cmd(['useradd', '-c', "John's box", 'john'])
+        self.assertEqual(str(cmd), "useradd -c 'John'\"'\"'s box' john")
+        self.assertEqual(Cmd(['echo', 1, 2]).argv, ['echo', '1', '2'])
+    
+    def test_empty_argv(self):
+        with self.assertRaises(ValueError):
+            Cmd([])
+    
+    def test_env_argv(self):
+        self.assertEqual(Cmd(['ls']).env_argv(), ['ls'])
+        self.assertEqual(
+            Cmd(['make'], cwd='/build', env={'LANG': 'C'}).env_argv(),
+            ['env', '-C', '/build', 'LANG=C', 'make']
+        )
+    
+    def test_arguments_reach_program_unchanged(self):
+        _, output = run_command(Cmd(['printf', '%s\\n'] + TRICKY), log=False)
+        self.assertEqual(output.split('\n')[:-1], TRICKY)
+    
+    def test_stdin_cwd_env(self):
+        _, output = run_command(Cmd(['cat'], stdin="root:pa$$ word\n"), log=False)
+        self.assertEqual(output, "root:pa$$ word\n")
+        _, output = run_command(Cmd(['pwd'], cwd='/'), log=False)
+        self.assertEqual(output, '/\n')
+        _, output = run_command(Cmd(['sh', '-c', 'echo "$MARK"'], env={'MARK': '$1 two'}), log=False)
+        self.assertEqual(output, '$1 two\n')
+
+class CmdInSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        # Протокол сессии без chroot и монтирования: shell в текущем корне
+        self.session = ChrootSession('/')
+        self.session.proc = subprocess.Popen(
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    
+    def tearDown(self):
+        self.session.proc.stdin.close()
+        self.session.proc.wait()
+    
+    def test_arguments_reach_program_unchanged(self):
+        _, output = self.session.run(Cmd(['printf', '%s\\n'] + TRICKY), log=False)
+        self.assertEqual(output.split('\n')[:-1], TRICKY)
+    
+    def test_stdin_cwd_env(self):
+        _, output = self.session.run(Cmd(['cat'], stdin="user:it's $secret"), log=False)
+        self.assertEqual(output, "user:it's $secret\n")
+        _, output = self.session.run(Cmd(['sh', '-c', 'echo "$MARK $PWD"'], cwd='/', env={'MARK': 'a b'}), log=False)
+        self.assertEqual(output, 'a b /\n')
+
+if __name__ == '__main__':
+    unittest.main()
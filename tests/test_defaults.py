@@ -0,0 +1,114 @@
+"""
+Значения по умолчанию под железо (installer.defaults) и настройка
+параллельности live-окружения (installer.packages).
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config import config, InstallationConfig
+from installer import defaults
+from installer.defaults import HardwareProfile, recommend, apply_defaults, apply_disk_defaults, check_selection
+from installer.packages import configure_live_parallelism
+
+GB = 1024
+
+class RecommendTest(unittest.TestCase):
+
+    def test_small_machine_gets_minimal_profile(self):
+        result = recommend(HardwareProfile(ram_mb=512, cores=1, disk_mb=8 * GB))
+        self.assertEqual(result.profile, 'minimal')
+        self.assertIsNone(result.desktop)
+        self.assertEqual(result.partition_scheme, 'auto_ext4')
+        self.assertEqual(result.swap_size, 1)
+        self.assertEqual(result.parallel_downloads, 3)
+        self.assertEqual(result.make_jobs, 1)
+    
+    def test_large_ssd_gets_btrfs(self):
+        result = recommend(HardwareProfile(ram_mb=16 * GB, cores=8, disk_mb=512 * GB, gpu_driver='amdgpu'))
+        self.assertEqual(result.partition_scheme, 'auto_btrfs')
+        self.assertEqual(result.desktop, 'kde')
+        self.assertEqual(result.swap_size, 4)
+        self.assertEqual(result.parallel_downloads, 8)
+        self.assertEqual(result.make_jobs, 8)
+    
+    def test_hdd_and_no_gpu_driver(self):
+        result = recommend(HardwareProfile(ram_mb=4 * GB, cores=2, disk_mb=500 * GB, rotational=True))
+        self.assertEqual(result.partition_scheme, 'auto_ext4')
+        self.assertNotIn(result.desktop, defaults.COMPOSITING_DESKTOPS)
+    
+    def test_no_swap_on_large_memory(self):
+        result = recommend(HardwareProfile(ram_mb=64 * GB, cores=16, disk_mb=1024 * GB))
+        self.assertEqual((result.swap_type, result.swap_size), ('none', 0))
+    
+    def test_heavy_desktop_warning(self):
+        warnings = check_selection(HardwareProfile(ram_mb=1 * GB, cores=2, disk_mb=64 * GB), 'kde', lang='en')
+        self.assertTrue(warnings)
+
+class ApplyDiskDefaultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = dict(vars(config))
+        self.applied = dict(defaults._applied)
+        defaults._applied.clear()
+        vars(config).update(vars(InstallationConfig()))
+    
+    def tearDown(self):
+        vars(config).clear()
+        vars(config).update(self.saved)
+        defaults._applied.clear()
+        defaults._applied.update(self.applied)
+    
+    def disk(self, disk_gb, ram_gb=4):
+        return recommend(HardwareProfile(ram_mb=ram_gb * GB, cores=4, disk_mb=disk_gb * GB))
+    
+    def test_untouched_fields_follow_disk(self):
+        apply_defaults(self.disk(512))
+        self.assertEqual(config.partition_scheme, 'auto_btrfs')
+        changed = apply_disk_defaults(self.disk(20))
+        self.assertEqual(set(changed), set(defaults.DISK_FIELDS))
+        self.assertEqual(config.partition_scheme, 'auto_ext4')
+        self.assertEqual(config.swap_size, 2)
+    
+    def test_user_choice_kept(self):
+        apply_defaults(self.disk(512))
+        # Пользователь выбрал разметку и swap в пункте 3
+        config.partition_scheme = 'manual'
+        config.swap_size = 8
+        changed = apply_disk_defaults(self.disk(20))
+        self.assertEqual(changed, ['swap_type'])
+        self.assertEqual(config.partition_scheme, 'manual')
+        self.assertEqual(config.swap_size, 8)
+        
+        # И при следующей смене диска тоже
+        apply_disk_defaults(self.disk(512))
+        self.assertEqual((config.partition_scheme, config.swap_size), ('manual', 8))
+
+class LiveParallelismTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, 'w') as f:
+            f.write("[options]\n#ParallelDownloads = 5\nColor\n")
+    
+    def tearDown(self):
+        os.unlink(self.path)
+    
+    def test_sets_value(self):
+        self.assertTrue(configure_live_parallelism(8, self.path))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "[options]\nParallelDownloads = 8\nColor\n")
+    
+    def test_unchanged_value_not_rewritten(self):
+        configure_live_parallelism(8, self.path)
+        with mock.patch('installer.packages.run_command') as run_command:
+            self.assertTrue(configure_live_parallelism(8, self.path))
+        run_command.assert_not_called()
+    
+    def test_missing_file(self):
+        self.assertFalse(configure_live_parallelism(8, self.path + '.missing'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Журнал событий установки в JSON Lines (utils.events).
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import events as events_module
+from utils.events import EventLog
+from utils.executor import Cmd, add_command_listener, remove_command_listener, run_command
+from utils.logger import logger
+
+class EventLogTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'archinstall.events.jsonl')
+        self.events = EventLog(self.path)
+        self.addCleanup(self.events.close)
+    
+    def read(self):
+        self.events.close()
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+    
+    def test_stages_and_packages(self):
+        self.events.open()
+        # Принятые байты: 1000 в начале этапа, 5000 в конце
+        with mock.patch.object(events_module, '_net_rx_bytes', side_effect=[1000, 5000]):
+            self.events.begin_stage('installing_base', index=3)
+            self.events.emit('packages', count=120, source='pacstrap')
+            self.events.end_stage()
+        self.events.emit('packages', count=5, source='aur')
+        
+        records = self.read()
+        self.assertEqual(
+            [(r['seq'], r['event'], r.get('stage')) for r in records],
+            [
+                (1, 'session_start', None),
+                (2, 'stage_start', 'installing_base'),
+                (3, 'packages', 'installing_base'),
+                (4, 'stage_end', 'installing_base'),
+                (5, 'packages', None),
+            ]
+        )
+        self.assertEqual(records[1]['index'], 3)
+        self.assertEqual(records[3]['net_rx_bytes'], 4000)
+        self.assertGreaterEqual(records[3]['duration'], 0)
+        self.assertEqual(self.events.stage_net_rx, {'installing_base': 4000})
+        self.assertEqual(self.events.package_count, 125)
+        self.assertEqual(records, sorted(records, key=lambda r: r['t']))
+    
+    def test_commands(self):
+        add_command_listener(self.events.record_command)
+        try:
+            run_command(Cmd(['sh', '-c', 'echo abc; exit 1']), check=False, log=False)
+        finally:
+            remove_command_listener(self.events.record_command)
+        
+        command, = [r for r in self.read() if r['event'] == 'command']
+        self.assertEqual(command['kind'], 'command')
+        self.assertEqual(command['cmd'], "sh -c 'echo abc; exit 1'")
+        self.assertEqual((command['returncode'], command['output_bytes']), (1, 4))
+    
+    def test_errors_from_log(self):
+        self.events.open()
+        handler = self.events._error_handler
+        self.assertIn(handler, logger.handlers)
+        logger.error("Disk is on fire")
+        logger.warning("Only a warning")
+        errors = [r for r in self.read() if r['event'] == 'error']
+        self.assertEqual([r['message'] for r in errors], ['Disk is on fire'])
+        
+        # После закрытия журнал больше не подписан на лог
+        self.assertNotIn(handler, logger.handlers)
+    
+    def test_separate_logs(self):
+        # Открытый позже журнал не перехватывает события первого
+        other = EventLog(os.path.join(os.path.dirname(self.path), 'other.jsonl'))
+        self.events.open()
+        other.open()
+        self.events.emit('packages', count=1)
+        other.emit('packages', count=2)
+        other.close()
+        self.assertEqual([r['event'] for r in self.read()], ['session_start', 'packages'])
+    
+    def test_unwritable_path(self):
+        events = EventLog(os.path.join(self.path, 'missing', 'events.jsonl'))
+        events.emit('packages', count=1)
+        events.close()
+        self.assertEqual(events.package_count, 1)
+        self.assertFalse(os.path.exists(events.path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+stdout, возвращаемый run_command и ChrootSession.run.
+"""
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+from utils.executor import Cmd, ChrootSession, run_command, STREAM_TAIL_LINES
+from utils.cassette import start_recording, start_replay, stop_cassette
+
+class RunCommandOutputTest(unittest.TestCase):
+
+    def test_output_without_trailing_newline(self):
+        _, output = run_command(Cmd(['printf', 'abc']), log=False)
+        self.assertEqual(output, 'abc')
+    
+    def test_output_kept_as_is(self):
+        _, output = run_command(Cmd(['printf', 'a\\r\\nb\\n\\n']), log=False)
+        self.assertEqual(output, 'a\r\nb\n\n')
+    
+    def test_stream_mode_returns_lines(self):
+        _, output = run_command(Cmd(['printf', 'a\\nb\\n']), log=False, stream=True)
+        self.assertEqual(output, 'a\nb')
+    
+    def test_stream_mode_returns_only_tail(self):
+        _, output = run_command(Cmd(['seq', '100000']), log=False, stream=True)
+        lines = output.split('\n')
+        self.assertEqual(len(lines), STREAM_TAIL_LINES)
+        self.assertEqual(lines[-1], '100000')
+    
+    def test_cassette_replay_keeps_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cassette.jsonl')
+            start_recording(path)
+            try:
+                run_command(Cmd(['printf', 'abc']), log=False)
+            finally:
+                stop_cassette()
+            start_replay(path)
+            try:
+                _, output = run_command(Cmd(['printf', 'abc']), log=False)
+            finally:
+                stop_cassette()
+        self.assertEqual(output, 'abc')
+
+class ChrootSessionOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        # Протокол сессии без chroot и монтирования: shell в текущем корне
+        self.session = ChrootSession('/')
+        self.session.proc = subprocess.Popen(
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    
+    def tearDown(self):
+        self.session.proc.stdin.close()
+        self.session.proc.wait()
+    
+    def test_output_without_trailing_newline(self):
+        _, output = self.session.run(Cmd(['printf', 'abc']), log=False)
+        self.assertEqual(output, 'abc')
+    
+    def test_output_with_trailing_newline(self):
+        _, output = self.session.run(Cmd(['printf', 'a\\r\\nb\\n']), log=False)
+        self.assertEqual(output, 'a\r\nb\n')
+    
+    def test_empty_output(self):
+        _, output = self.session.run(Cmd(['true']), log=False)
+        self.assertEqual(output, '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+История установок (utils.history).
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.history import InstallHistory, print_history_report, percentile
+
+class InstallHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'history.db')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def record(self, history, stages, success=True):
+        with mock.patch.object(history, 'collect_stages', return_value=[
+            {'stage': name, 'duration': duration, 'commands': 1, 'cpu_s': 0.0,
+             'read_bytes': 0, 'write_bytes': 0, 'net_rx_bytes': None}
+            for name, duration in stages
+        ]), mock.patch('utils.history._hardware_summary', return_value={}):
+            history.start_run()
+            # Запуск длится столько же, сколько его этапы
+            history._started_monotonic -= sum(duration for _, duration in stages)
+            return history.record_run(success=success)
+    
+    def test_regression_against_previous_runs(self):
+        history = InstallHistory(self.path)
+        for _ in range(5):
+            self.record(history, [('partitioning', 10.0), ('base_system', 60.0)])
+        last = self.record(history, [('partitioning', 10.5), ('base_system', 200.0)])
+        regressions = history.find_regressions(last)
+        self.assertEqual([r['stage'] for r in regressions], ['base_system'])
+        self.assertEqual(regressions[0]['runs'], 5)
+    
+    def test_merge_into_skips_existing_runs(self):
+        live = InstallHistory(self.path)
+        self.record(live, [('partitioning', 1.0)])
+        self.record(live, [('partitioning', 2.0)])
+        target = os.path.join(self.tmp.name, 'mnt', 'var', 'log', 'history.db')
+        os.makedirs(os.path.dirname(target))
+        
+        self.assertEqual(live.merge_into(target), 2)
+        self.record(live, [('partitioning', 3.0)])
+        self.assertEqual(live.merge_into(target), 1)
+        
+        merged = InstallHistory(target)
+        self.assertEqual(merged.stage_durations('desktop'), {'partitioning': [1.0, 2.0, 3.0]})
+    
+    def test_save_to_target_requires_mount(self):
+        history = InstallHistory(self.path)
+        self.record(history, [('partitioning', 1.0)])
+        self.assertIsNone(history.save_to_target(self.tmp.name))
+        with mock.patch('os.path.ismount', return_value=True):
+            path = history.save_to_target(self.tmp.name)
+        self.assertEqual(path, os.path.join(self.tmp.name, 'var', 'log', 'archinstall.history.db'))
+        self.assertEqual(len(InstallHistory(path).profiles()), 1)
+    
+    def test_report(self):
+        history = InstallHistory(self.path)
+        self.record(history, [('partitioning', 1.0)])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(print_history_report(self.path))
+        self.assertIn("Profile 'desktop': 1 runs", output.getvalue())
+    
+    def test_percentile(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(percentile([5], 90), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Разбор procfs/sysfs в utils.hwprobe на копии дерева.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.hwprobe import (
+    HardwareSnapshot, parse_cpu_list, parse_cpuinfo, parse_meminfo,
+    read_block_device, read_meminfo
+)
+
+# Два логических процессора одного ядра (HT) и еще одно ядро
+CPUINFO_X86 = """processor\t: 0
+vendor_id\t: GenuineIntel
+model name\t: Intel(R) Core(TM) i5-8250U CPU @ 1.60GHz
+cpu MHz\t\t: 1800.000
+physical id\t: 0
+core id\t\t: 0
+flags\t\t: fpu vmx sse2 hypervisor
+
+processor\t: 1
+vendor_id\t: GenuineIntel
+model name\t: Intel(R) Core(TM) i5-8250U CPU @ 1.60GHz
+physical id\t: 0
+core id\t\t: 0
+flags\t\t: fpu vmx sse2 hypervisor
+
+processor\t: 2
+vendor_id\t: GenuineIntel
+model name\t: Intel(R) Core(TM) i5-8250U CPU @ 1.60GHz
+physical id\t: 0
+core id\t\t: 1
+flags\t\t: fpu vmx sse2 hypervisor
+"""
+
+CPUINFO_ARM = """processor\t: 0
+BogoMIPS\t: 108.00
+Features\t: fp asimd evtstrm
+
+processor\t: 1
+BogoMIPS\t: 108.00
+Features\t: fp asimd evtstrm
+
+Hardware\t: BCM2835
+Model\t\t: Raspberry Pi 4 Model B Rev 1.4
+"""
+
+MEMINFO = """MemTotal:       16303412 kB
+MemFree:         1203412 kB
+MemAvailable:    8151706 kB
+SwapTotal:       2097148 kB
+SwapFree:        2097148 kB
+HugePages_Total:       0
+"""
+
+class ParserTest(unittest.TestCase):
+
+    def test_cpu_list(self):
+        self.assertEqual(parse_cpu_list('0-3,6,8-9\n'), [0, 1, 2, 3, 6, 8, 9])
+        self.assertEqual(parse_cpu_list('0'), [0])
+        self.assertEqual(parse_cpu_list(''), [])
+    
+    def test_cpuinfo(self):
+        processors = parse_cpuinfo(CPUINFO_X86)
+        self.assertEqual(len(processors), 3)
+        self.assertEqual(processors[2]['core id'], '1')
+        self.assertEqual(processors[0]['model name'], 'Intel(R) Core(TM) i5-8250U CPU @ 1.60GHz')
+        
+        # На ARM общие поля идут отдельным блоком в конце
+        processors = parse_cpuinfo(CPUINFO_ARM)
+        self.assertEqual(len(processors), 3)
+        self.assertEqual(processors[-1]['Model'], 'Raspberry Pi 4 Model B Rev 1.4')
+    
+    def test_meminfo(self):
+        values = parse_meminfo(MEMINFO)
+        self.assertEqual(values['MemTotal'], 16303412)
+        self.assertEqual(values['HugePages_Total'], 0)
+        self.assertEqual(parse_meminfo(''), {})
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.write('proc/cpuinfo', CPUINFO_X86)
+        self.write('proc/meminfo', MEMINFO)
+    
+    def write(self, relative, text):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+    
+    def test_cpu_from_cpuinfo(self):
+        # Без sysfs: число процессоров и ядер из cpuinfo
+        cpu = HardwareSnapshot(self.root).cpu
+        self.assertEqual(cpu.vendor, 'GenuineIntel')
+        self.assertEqual((cpu.logical, cpu.physical_cores, cpu.sockets), (3, 2, 1))
+        self.assertEqual(cpu.max_mhz, 1800.0)
+        self.assertEqual(cpu.virtualization, 'vmx')
+        self.assertTrue(cpu.hypervisor)
+    
+    def test_cpu_topology_from_sysfs(self):
+        self.write('sys/devices/system/cpu/online', '0-3\n')
+        for cpu, (package, core) in enumerate([(0, 0), (0, 0), (1, 0), (1, 1)]):
+            topology = f"sys/devices/system/cpu/cpu{cpu}/topology"
+            self.write(f"{topology}/core_id", f"{core}\n")
+            self.write(f"{topology}/physical_package_id", f"{package}\n")
+        self.write('sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq', '3400000\n')
+        
+        cpu = HardwareSnapshot(self.root).cpu
+        self.assertEqual((cpu.logical, cpu.physical_cores, cpu.sockets), (4, 3, 2))
+        self.assertEqual(cpu.max_mhz, 3400.0)
+    
+    def test_arm_brand(self):
+        self.write('proc/cpuinfo', CPUINFO_ARM)
+        cpu = HardwareSnapshot(self.root).cpu
+        self.assertEqual(cpu.brand, 'Raspberry Pi 4 Model B Rev 1.4')
+        # Блок Hardware/Model - не процессор
+        self.assertEqual(cpu.logical, 2)
+        self.assertEqual(cpu.flags, {'fp', 'asimd', 'evtstrm'})
+        self.assertIsNone(cpu.virtualization)
+    
+    def test_memory(self):
+        memory = HardwareSnapshot(self.root).memory
+        self.assertAlmostEqual(memory.total_gb, 15.55, places=2)
+        self.assertEqual(memory.available_kb, 8151706)
+        self.assertEqual(memory.swap_total_kb, 2097148)
+        self.assertEqual(read_meminfo(self.root).total_kb, 16303412)
+    
+    def test_firmware(self):
+        firmware = HardwareSnapshot(self.root).firmware
+        self.assertFalse(firmware.uefi)
+        self.assertIsNone(firmware.efi_bitness)
+        
+        self.write('sys/firmware/efi/fw_platform_size', '32\n')
+        firmware = HardwareSnapshot(self.root).firmware
+        self.assertTrue(firmware.uefi)
+        self.assertEqual(firmware.efi_bitness, 32)
+    
+    def test_dmi(self):
+        self.write('sys/class/dmi/id/sys_vendor', 'LENOVO\n')
+        self.write('sys/class/dmi/id/chassis_type', '10\n')
+        snapshot = HardwareSnapshot(self.root)
+        self.assertTrue(snapshot.dmi.is_laptop)
+        self.assertEqual(snapshot.to_dict()['dmi'], {'sys_vendor': 'LENOVO', 'chassis_type': '10'})
+    
+    def test_empty_tree(self):
+        shutil.rmtree(os.path.join(self.root, 'proc'))
+        snapshot = HardwareSnapshot(self.root)
+        self.assertEqual(snapshot.cpu.brand, 'Unknown CPU')
+        self.assertGreaterEqual(snapshot.cpu.logical, 1)
+        self.assertEqual(snapshot.memory.total_kb, 0)
+    
+    def test_block_device(self):
+        self.write('sys/block/sda/size', '1000215216\n')
+        self.write('sys/block/sda/queue/rotational', '0\n')
+        self.write('sys/block/sda/removable', '0\n')
+        self.write('sys/block/sda/device/model', 'Samsung SSD 860  \n')
+        
+        disk = read_block_device('/dev/sda', self.root)
+        self.assertTrue(disk.exists)
+        self.assertEqual(disk.size_bytes, 1000215216 * 512)
+        self.assertFalse(disk.rotational)
+        self.assertEqual(disk.model, 'Samsung SSD 860')
+        self.assertFalse(read_block_device('/dev/sdb', self.root).exists)
+
+if __name__ == '__main__':
+    unittest.main()
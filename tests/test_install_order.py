@@ -0,0 +1,64 @@
+"""
+Порядок шагов установки в main.install_system.
+"""
+
+import unittest
+from contextlib import ExitStack
+from unittest import mock
+
+import main
+
+class FakeChrootSession:
+    """ChrootSession без монтирования: запоминает, запущена ли сессия."""
+    
+    def __init__(self, mount_point='/mnt'):
+        self.mount_point = mount_point
+        self.mounted = False
+    
+    def start(self):
+        self.mounted = True
+    
+    def close(self):
+        self.mounted = False
+
+class InstallOrderTest(unittest.TestCase):
+
+    def test_fstab_generated_without_session_mounts(self):
+        sessions = []
+        mounted_during_fstab = []
+        
+        def make_session(mount_point='/mnt'):
+            session = FakeChrootSession(mount_point)
+            sessions.append(session)
+            return session
+        
+        def fake_generate_fstab():
+            mounted_during_fstab.append(any(s.mounted for s in sessions))
+            # Остановить установку сразу после шага fstab
+            return False
+        
+        patches = {
+            'utils.executor.ChrootSession': make_session,
+            'installer.disk.generate_fstab': fake_generate_fstab,
+            'installer.disk.create_partitions': lambda *a, **k: True,
+            'installer.packages.update_mirrors': lambda *a, **k: True,
+            'installer.packages.configure_parallelism': lambda *a, **k: True,
+            'utils.validators.wait_for_pacman_keys': lambda *a, **k: True,
+            'utils.keyring.copy_keyring': lambda *a, **k: True,
+            'installer.packages.install_packages': lambda *a, **k: True,
+            'ui.progress.get_progress': mock.MagicMock(),
+            'utils.history.history': mock.MagicMock(),
+            'utils.tracing.tracer': mock.MagicMock(),
+            'utils.accounting.accounting': mock.MagicMock(),
+            'utils.events.events': mock.MagicMock(),
+        }
+        with ExitStack() as stack:
+            for target, value in patches.items():
+                stack.enter_context(mock.patch(target, value))
+            main.install_system(mock.MagicMock())
+        
+        self.assertEqual(mounted_during_fstab, [False])
+        self.assertFalse(sessions[0].mounted)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Фоновый сбор сведений о железе (installer.inventory).
+"""
+
+import threading
+import unittest
+
+from installer.inventory import HardwareInventory
+
+class FakeInventory(HardwareInventory):
+    """Пробы-заглушки: считают вызовы и могут ждать сигнала."""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = {'fast': 0, 'slow': 0, 'flaky': 0}
+        self.release = threading.Event()
+        self.PROBES = {
+            'fast': self.fast,
+            'slow': self.slow,
+            'flaky': self.flaky,
+        }
+    
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            return self.calls[name]
+    
+    def fast(self):
+        return f"fast {self.count('fast')}"
+    
+    def slow(self):
+        # Ждет сигнала только первый (фоновый) вызов
+        number = self.count('slow')
+        if number == 1:
+            self.release.wait(5)
+        return f"slow {number}"
+    
+    def flaky(self):
+        # Первый вызов падает, повторный - уже нет
+        if self.count('flaky') == 1:
+            raise RuntimeError('lspci failed')
+        return 'flaky ok'
+
+class HardwareInventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = FakeInventory()
+        self.addCleanup(self.inventory.release.set)
+    
+    def test_probes_run_in_parallel(self):
+        barrier = threading.Barrier(3, timeout=5)
+        self.inventory.PROBES = {name: barrier.wait for name in ('a', 'b', 'c')}
+        self.inventory.start()
+        # Каждая проба ждет остальные: без параллельного запуска barrier не пройти
+        self.assertEqual(sorted(self.inventory.get(name, timeout=5) for name in 'abc'), [0, 1, 2])
+    
+    def test_get_waits_only_for_its_probe(self):
+        self.inventory.start()
+        self.assertEqual(self.inventory.get('fast'), 'fast 1')
+        self.inventory.release.set()
+        self.assertEqual(self.inventory.get('slow'), 'slow 1')
+        # Готовый результат читается без нового вызова
+        self.assertEqual(self.inventory.get('fast'), 'fast 1')
+        self.assertEqual(self.inventory.calls['fast'], 1)
+    
+    def test_not_started_probe(self):
+        self.assertEqual(self.inventory.get('fast'), 'fast 1')
+        self.assertEqual(self.inventory.calls, {'fast': 1, 'slow': 0, 'flaky': 0})
+    
+    def test_failed_probe_called_again(self):
+        self.inventory.start(('flaky',))
+        self.assertEqual(self.inventory.get('flaky'), 'flaky ok')
+        self.assertEqual(self.inventory.calls['flaky'], 2)
+    
+    def test_timeout_probes_directly(self):
+        self.inventory.start(('slow',))
+        self.assertEqual(self.inventory.get('slow', timeout=0.1), 'slow 2')
+        self.inventory.release.set()
+        self.assertEqual(self.inventory.get('slow'), 'slow 1')
+    
+    def test_running_probe_not_started_twice(self):
+        self.inventory.start(('slow',))
+        self.inventory.start(('slow',))
+        self.inventory.release.set()
+        self.assertEqual(self.inventory.get('slow'), 'slow 1')
+        self.assertEqual(self.inventory.calls['slow'], 1)
+    
+    def test_refresh(self):
+        self.assertEqual(self.inventory.get('fast'), 'fast 1')
+        self.assertEqual(self.inventory.refresh('fast'), 'fast 2')
+        self.assertEqual(self.inventory.get('fast'), 'fast 2')
+
+if __name__ == '__main__':
+    unittest.main()
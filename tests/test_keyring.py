@@ -0,0 +1,160 @@
+"""
+Отпечаток связки ключей pacman и пропуск --init/--populate (utils.keyring).
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import keyring, validators
+from utils.keyring import (
+    KeyringState, copy_keyring, load_keyring_state, read_package_version, save_keyring_state
+)
+
+class KeyringTestCase(unittest.TestCase):
+    """Живой образ в каталоге: локальная база pacman и /etc/pacman.d/gnupg."""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.root = os.path.join(self.directory, 'root')
+        self.state_file = os.path.join(self.directory, 'keyring.json')
+        self.install_package('archlinux-keyring', '20240520-1')
+        self.install_package('archlinux-keyring-extra', '1.0-1')
+    
+    def install_package(self, name, version):
+        path = os.path.join(self.root, 'var/lib/pacman/local', f"{name}-{version}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'desc'), 'w') as f:
+            f.write(f"%NAME%\n{name}\n\n%VERSION%\n{version}\n\n")
+    
+    def remove_package(self, name, version):
+        shutil.rmtree(os.path.join(self.root, 'var/lib/pacman/local', f"{name}-{version}"))
+    
+    def write_keyring(self, root=None, pubring=b'keys'):
+        gnupg = os.path.join(root or self.root, 'etc/pacman.d/gnupg')
+        os.makedirs(os.path.join(gnupg, 'private-keys-v1.d'), exist_ok=True)
+        for name, data in (('pubring.gpg', pubring), ('trustdb.gpg', b'trust')):
+            with open(os.path.join(gnupg, name), 'wb') as f:
+                f.write(data)
+        with open(os.path.join(gnupg, 'private-keys-v1.d', 'MASTER.key'), 'wb') as f:
+            f.write(b'master')
+    
+    def state(self, root=None):
+        return KeyringState(root or self.root)
+
+class KeyringStateTest(KeyringTestCase):
+
+    def test_package_version(self):
+        # Имя с дефисами не путается с archlinux-keyring-extra
+        self.assertEqual(read_package_version('archlinux-keyring', self.root), '20240520-1')
+        self.assertEqual(read_package_version('archlinux-keyring-extra', self.root), '1.0-1')
+        self.assertIsNone(read_package_version('linux', self.root))
+        self.assertIsNone(read_package_version('linux', self.directory))
+    
+    def test_initialized(self):
+        self.assertFalse(self.state().initialized)
+        self.write_keyring()
+        self.assertTrue(self.state().initialized)
+    
+    def test_fingerprint(self):
+        self.write_keyring()
+        before = self.state().fingerprint
+        self.assertEqual(self.state().fingerprint, before)
+        
+        # Новая версия archlinux-keyring
+        self.remove_package('archlinux-keyring', '20240520-1')
+        self.install_package('archlinux-keyring', '20240601-1')
+        updated = self.state().fingerprint
+        self.assertNotEqual(updated, before)
+        
+        # Изменились ключи
+        self.write_keyring(pubring=b'more keys')
+        self.assertNotEqual(self.state().fingerprint, updated)
+    
+    def test_state_file(self):
+        self.assertIsNone(load_keyring_state(self.state_file))
+        self.write_keyring()
+        save_keyring_state(self.state(), self.state_file)
+        self.assertEqual(load_keyring_state(self.state_file), self.state().fingerprint)
+        
+        with open(self.state_file, 'w') as f:
+            f.write('{broken')
+        self.assertIsNone(load_keyring_state(self.state_file))
+
+class CheckPacmanKeysTest(KeyringTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.commands = []
+        self.fail = False
+        for name, replacement in (
+            ('KeyringState', lambda: KeyringState(self.root)),
+            ('load_keyring_state', functools.partial(load_keyring_state, self.state_file)),
+            ('save_keyring_state', functools.partial(save_keyring_state, path=self.state_file)),
+            ('run_command', self.run_command),
+        ):
+            patcher = mock.patch.object(validators, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def run_command(self, cmd, **kwargs):
+        action = cmd.argv[1]
+        self.commands.append(action)
+        if self.fail:
+            raise RuntimeError('pacman-key failed')
+        if action == '--init':
+            self.write_keyring()
+        return 0, ''
+    
+    def test_fresh_image(self):
+        self.assertTrue(validators.check_pacman_keys())
+        self.assertEqual(self.commands, ['--init', '--populate'])
+        self.assertEqual(load_keyring_state(self.state_file), self.state().fingerprint)
+    
+    def test_skipped_when_fingerprint_matches(self):
+        self.assertTrue(validators.check_pacman_keys())
+        self.commands.clear()
+        self.assertTrue(validators.check_pacman_keys())
+        self.assertEqual(self.commands, [])
+    
+    def test_populate_after_keyring_update(self):
+        self.assertTrue(validators.check_pacman_keys())
+        self.remove_package('archlinux-keyring', '20240520-1')
+        self.install_package('archlinux-keyring', '20240601-1')
+        self.commands.clear()
+        self.assertTrue(validators.check_pacman_keys())
+        # Связка уже создана: только --populate
+        self.assertEqual(self.commands, ['--populate'])
+    
+    def test_failure_not_saved(self):
+        self.write_keyring()
+        self.fail = True
+        self.assertFalse(validators.check_pacman_keys())
+        self.assertIsNone(load_keyring_state(self.state_file))
+
+class CopyKeyringTest(KeyringTestCase):
+
+    def test_copy_then_skip(self):
+        self.write_keyring()
+        target = os.path.join(self.directory, 'mnt')
+        # Корень '/' - каталог хоста в тесте
+        host_state = lambda root='/': KeyringState(self.root if root == '/' else root)
+        with mock.patch.object(keyring, 'KeyringState', host_state):
+            self.assertTrue(copy_keyring(target))
+            copied, host = self.state(target), self.state()
+            self.assertEqual((copied.files, copied.private_keys), (host.files, host.private_keys))
+            
+            with mock.patch.object(keyring, 'run_command') as run_command:
+                self.assertTrue(copy_keyring(target))
+            run_command.assert_not_called()
+    
+    def test_host_not_initialized(self):
+        with mock.patch.object(keyring, 'KeyringState', lambda root='/': KeyringState(self.root)):
+            self.assertFalse(copy_keyring(os.path.join(self.directory, 'mnt')))
+
+if __name__ == '__main__':
+    unittest.main()
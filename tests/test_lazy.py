@@ -0,0 +1,67 @@
+"""
+Отложенный импорт (utils.lazy).
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from utils.lazy import lazy_module
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Первое обращение к еще не импортированным модулям из многих потоков сразу
+CONCURRENT_FIRST_USE = '''
+import sys, threading
+from utils.lazy import lazy_module
+names = ['ssl', 'http.client', 'tarfile', 'sqlite3', 'hashlib']
+assert not any(name in sys.modules for name in names), 'already imported'
+modules = [lazy_module(name) for name in names]
+attrs = ['create_default_context', 'HTTPConnection', 'open', 'connect', 'sha256']
+barrier = threading.Barrier(32)
+errors = []
+def worker(index):
+    barrier.wait()
+    module, attr = modules[index % len(modules)], attrs[index % len(attrs)]
+    try:
+        getattr(module, attr)
+    except Exception as e:
+        errors.append(f"{module.__name__}.{attr}: {e!r}")
+threads = [threading.Thread(target=worker, args=(i,)) for i in range(32)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print('\\n'.join(errors) or 'ok')
+'''
+
+class LazyModuleTest(unittest.TestCase):
+
+    def test_deferred_until_first_use(self):
+        script = (
+            "import sys\n"
+            "from utils.lazy import lazy_module\n"
+            "tarfile = lazy_module('tarfile')\n"
+            "print('tarfile' in sys.modules)\n"
+            "tarfile.open\n"
+            "print('tarfile' in sys.modules)\n"
+        )
+        output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False', 'True'])
+    
+    def test_concurrent_first_use(self):
+        for _ in range(3):
+            result = subprocess.run(
+                [sys.executable, '-c', CONCURRENT_FIRST_USE],
+                cwd=ROOT, capture_output=True, text=True
+            )
+            self.assertEqual(result.stdout.strip(), 'ok', result.stderr)
+    
+    def test_missing_module(self):
+        module = lazy_module('archinstall_no_such_module')
+        with self.assertRaises(ImportError):
+            module.anything
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Фоновая запись логов пачками (utils.log_writer, utils.logger).
+"""
+
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from utils.log_writer import (
+    BatchQueueListener, BufferedRotatingFileHandler, FlushRequest, RawQueueHandler
+)
+from utils.logger import ColoredFormatter, _excerpt
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class BatchQueueListenerTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'archinstall.log')
+        self.handler = BufferedRotatingFileHandler(self.path, maxBytes=4000, backupCount=2)
+        self.handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+        self.handler.setLevel(logging.INFO)
+        self.addCleanup(self.handler.close)
+        
+        self.queue = queue.SimpleQueue()
+        self.listener = BatchQueueListener(self.queue, self.handler, batch_size=16)
+        self.listener.start()
+        self.addCleanup(self.stop_listener)
+        
+        self.log = logging.getLogger(f"test-logger-{id(self)}")
+        self.log.propagate = False
+        self.log.setLevel(logging.DEBUG)
+        self.log.handlers = [RawQueueHandler(self.queue)]
+    
+    def stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+    
+    def flush(self):
+        request = FlushRequest()
+        self.queue.put_nowait(request)
+        self.assertTrue(request.done.wait(5))
+    
+    def read(self, path=None):
+        with open(path or self.path) as f:
+            return f.read().splitlines()
+    
+    def test_order_and_level(self):
+        for number in range(100):
+            self.log.info("line %03d", number)
+        self.log.debug("hidden")
+        self.flush()
+        # DEBUG отсекается уровнем обработчика
+        self.assertEqual(self.read(), [f"[INFO] line {number:03d}" for number in range(100)])
+    
+    def test_formatted_in_writer_thread(self):
+        # Аргументы форматируются обработчиком, а не в вызывающем потоке
+        record = logging.LogRecord('x', logging.INFO, __file__, 1, "value %s", ('a',), None)
+        self.assertIs(RawQueueHandler(self.queue).prepare(record), record)
+        self.assertEqual(record.args, ('a',))
+    
+    def test_rotation(self):
+        for number in range(200):
+            self.log.info("rotated line %03d", number)
+        self.flush()
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertEqual(self.read()[-1], "[INFO] rotated line 199")
+    
+    def test_stop_writes_pending(self):
+        self.log.warning("last words")
+        self.listener.stop()
+        self.handler.flush()
+        self.assertEqual(self.read(), ["[WARNING] last words"])
+
+class FormattingTest(unittest.TestCase):
+
+    def test_color_only_in_console_copy(self):
+        record = logging.LogRecord('x', logging.ERROR, __file__, 1, "boom", None, None)
+        console = ColoredFormatter('%(levelname)s %(message)s').format(record)
+        self.assertIn('\033[31mERROR\033[0m', console)
+        self.assertEqual(logging.Formatter('%(levelname)s %(message)s').format(record), 'ERROR boom')
+    
+    def test_excerpt(self):
+        output = '\n'.join(str(number) for number in range(100))
+        excerpt = _excerpt(output, lines=3).split('\n')
+        self.assertEqual(excerpt, ['0', '1', '2', '... [94 lines omitted] ...', '97', '98', '99'])
+        self.assertEqual(_excerpt('short\noutput', lines=3), 'short\noutput')
+
+class LazySetupTest(unittest.TestCase):
+
+    def test_import_does_not_start_writer(self):
+        code = (
+            "import utils.logger as l, threading; "
+            "print(l._listener is None, l.logger._logger is None, threading.active_count())"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=REPO, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.split(), ['True', 'True', '1'])
+
+if __name__ == '__main__':
+    unittest.main()
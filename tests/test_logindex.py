@@ -0,0 +1,121 @@
+"""
+Индекс лога вместе с ротированными копиями (utils.logindex).
+"""
+
+import logging
+import logging.handlers
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.logindex import LogIndex, RotatedLogIndex
+
+FORMAT = '[%(asctime)s] [%(levelname)s] %(name)s: %(message)s'
+
+class RotatedLogIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'archinstall.log')
+        # Как в utils.logger: ротация по размеру, три копии
+        self.handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=2000, backupCount=3)
+        self.handler.setFormatter(logging.Formatter(FORMAT))
+        self.log = logging.getLogger(f"test-logindex-{id(self)}")
+        self.log.propagate = False
+        self.log.setLevel(logging.DEBUG)
+        self.log.addHandler(self.handler)
+        self.index = RotatedLogIndex(self.path, backup_count=3)
+    
+    def tearDown(self):
+        self.index.close()
+        self.log.removeHandler(self.handler)
+        self.handler.close()
+        shutil.rmtree(self.directory)
+    
+    def write(self, count, prefix):
+        for number in range(count):
+            self.log.info(f"{prefix} line {number:03d}")
+    
+    def test_earlier_stages_survive_rotation(self):
+        self.log.info("Stage 1/3: partitioning")
+        self.write(20, 'disk')
+        self.log.error("disk failure")
+        self.log.info("Stage 2/3: base_system")
+        self.write(20, 'base')
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        
+        self.index.refresh()
+        self.assertEqual(self.index.line_count, 43)
+        self.assertIn('Stage 1/3: partitioning', self.index.line(0))
+        self.assertEqual([name for name, _ in self.index.stages], ['partitioning', 'base_system'])
+        
+        first, last = self.index.stage_range('partitioning')
+        self.assertEqual((first, last), (0, 22))
+        self.assertIn('disk line 019', self.index.line(last - 2))
+        self.assertEqual(self.index.next_error(0), 21)
+        self.assertIn('disk failure', self.index.line(21))
+        self.assertEqual(self.index.search('BASE LINE 010'), 33)
+        self.assertEqual(self.index.search('disk line', 40, backwards=True), 20)
+    
+    def test_rotation_while_viewing(self):
+        self.write(10, 'early')
+        self.index.refresh()
+        self.assertEqual(self.index.line_count, 10)
+        
+        # Дописанные строки в том же файле
+        self.write(5, 'more')
+        self.assertEqual(self.index.refresh(), 5)
+        
+        # Ротация: старые строки переходят в копию и остаются видны
+        self.write(60, 'late')
+        self.index.refresh()
+        self.assertEqual(self.index.line_count, 75)
+        self.assertEqual(self.index.dropped_lines, 0)
+        self.assertIn('early line 000', self.index.line(0))
+        self.assertIn('late line 059', self.index.line(74))
+    
+    def test_oldest_backup_dropped(self):
+        self.write(200, 'bulk')
+        self.assertTrue(os.path.exists(f"{self.path}.3"))
+        self.index.refresh()
+        count = self.index.line_count
+        first = self.index.line(0)
+        
+        # Еще несколько ротаций: самая старая копия удаляется
+        self.write(40, 'next')
+        self.index.refresh()
+        self.assertGreater(self.index.dropped_lines, 0)
+        self.assertEqual(self.index.line_count, count + 40 - self.index.dropped_lines)
+        self.assertNotEqual(self.index.line(0), first)
+        self.assertIn('next line 039', self.index.line(self.index.line_count - 1))
+    
+    def test_same_navigation_as_single_file(self):
+        self.log.info("Stage 1/2: partitioning")
+        self.write(25, 'disk')
+        self.log.error("disk failure")
+        self.log.info("Stage 2/2: base_system")
+        self.write(25, 'base')
+        self.log.error("pacstrap failure")
+        self.index.refresh()
+        
+        # Тот же лог одним файлом: навигация должна совпадать
+        joined = os.path.join(self.directory, 'joined.log')
+        with open(joined, 'w', encoding='utf-8') as output:
+            for number in range(self.index.line_count):
+                output.write(self.index.line(number) + '\n')
+        single = LogIndex(joined)
+        self.addCleanup(single.close)
+        single.refresh()
+        
+        self.assertEqual(single.line_count, self.index.line_count)
+        self.assertEqual(single.errors, self.index.errors)
+        for name in ('partitioning', 'base_system', 'missing'):
+            self.assertEqual(single.stage_range(name), self.index.stage_range(name))
+        for number in (0, 26, 27, 54):
+            self.assertEqual(single.next_error(number), self.index.next_error(number))
+            self.assertEqual(single.previous_error(number), self.index.previous_error(number))
+        self.assertEqual(single.lines(20, 10), self.index.lines(20, 10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Проверка сети и выбор зеркал (utils.netprobe) на локальном http.server.
+"""
+
+import http.server
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from utils.cassette import start_recording, start_replay, stop_cassette
+from utils.netprobe import (
+    check_connectivity, last_results, mirror_probe_url, probe_endpoints, probe_url, rank_mirrors
+)
+
+SAMPLE = 16 * 1024
+TIMEOUT = 0.5
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """Зеркала с разной скоростью: /fast, /slow, /missing, /hang."""
+    
+    def do_GET(self):
+        mirror = self.path.split('/')[1]
+        if mirror == 'hang':
+            # Заголовки позже таймаута проверки
+            time.sleep(TIMEOUT * 4)
+        if mirror == 'missing':
+            self.send_error(404)
+            return
+        
+        self.send_response(206)
+        self.send_header('Content-Length', str(SAMPLE))
+        self.end_headers()
+        if mirror == 'slow':
+            for _ in range(4):
+                self.wfile.write(b'x' * (SAMPLE // 4))
+                self.wfile.flush()
+                time.sleep(0.05)
+        else:
+            self.wfile.write(b'x' * SAMPLE)
+    
+    def log_message(self, format, *args):
+        pass
+
+class NetprobeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), MirrorHandler)
+        cls.server.daemon_threads = True
+        cls.server.block_on_close = False
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        
+        # Порт, на котором никто не слушает
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            cls.closed_port = sock.getsockname()[1]
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def mirror(self, name):
+        return f"{self.base}/{name}/$repo/os/$arch"
+    
+    def probe(self, *names):
+        targets = [(mirror_probe_url(self.mirror(name)), self.mirror(name)) for name in names]
+        return probe_endpoints(targets, timeout=TIMEOUT, sample_bytes=SAMPLE)
+    
+    def test_mirror_probe_url(self):
+        self.assertEqual(
+            mirror_probe_url('https://host/archlinux/$repo/os/$arch/', arch='x86_64'),
+            'https://host/archlinux/core/os/x86_64/core.db'
+        )
+    
+    def test_probe_url(self):
+        result = probe_url(f"{self.base}/fast/core.db", timeout=TIMEOUT, sample_bytes=SAMPLE)
+        self.assertTrue(result.ok)
+        self.assertEqual((result.status, result.bytes), (206, SAMPLE))
+        self.assertIsNotNone(result.connect_ms)
+        self.assertIsNotNone(result.response_ms)
+        self.assertGreater(result.throughput_bps, 0)
+        
+        result = probe_url(f"tcp://127.0.0.1:{self.server.server_address[1]}", timeout=TIMEOUT)
+        self.assertTrue(result.ok)
+        self.assertIsNone(result.status)
+    
+    def test_failures(self):
+        missing = probe_url(f"{self.base}/missing/core.db", timeout=TIMEOUT)
+        self.assertTrue(missing.reachable)
+        self.assertFalse(missing.ok)
+        self.assertEqual(missing.error, 'HTTP 404')
+        
+        refused = probe_url(f"http://127.0.0.1:{self.closed_port}/", timeout=TIMEOUT)
+        self.assertFalse(refused.reachable)
+        self.assertIsNotNone(refused.error)
+        
+        self.assertEqual(probe_url('ftp://host/').error, 'unsupported URL: ftp://host/')
+    
+    def test_endpoints_probed_concurrently(self):
+        started = time.monotonic()
+        results = self.probe('hang', 'hang', 'hang', 'fast')
+        # Три зависших зеркала ждутся одновременно, а не по очереди
+        self.assertLess(time.monotonic() - started, TIMEOUT * 3)
+        self.assertEqual([r.ok for r in results], [False, False, False, True])
+        self.assertTrue(all(r.error for r in results[:3]))
+    
+    def test_rank_mirrors(self):
+        results = self.probe('slow', 'missing', 'fast', 'hang')
+        self.assertEqual(
+            [r.server for r in results],
+            [self.mirror(name) for name in ('slow', 'missing', 'fast', 'hang')]
+        )
+        # Недоступные зеркала в рейтинг не попадают, быстрое - первое
+        self.assertEqual(rank_mirrors(results), [self.mirror('fast'), self.mirror('slow')])
+    
+    def test_check_connectivity_cassette(self):
+        endpoints = [f"tcp://127.0.0.1:{self.server.server_address[1]}"]
+        mirrors = [self.mirror('fast'), self.mirror('missing')]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette.jsonl')
+            start_recording(path)
+            try:
+                recorded = check_connectivity(endpoints, mirrors, timeout=TIMEOUT, sample_bytes=SAMPLE)
+            finally:
+                stop_cassette()
+            self.assertEqual([r.ok for r in recorded], [True, True, False])
+            self.assertEqual(len(last_results()), 3)
+            
+            # Воспроизведение без обращения к сети
+            start_replay(path)
+            try:
+                with mock.patch('socket.create_connection', side_effect=AssertionError('network used')):
+                    replayed = check_connectivity(
+                        endpoints, mirrors, timeout=TIMEOUT, sample_bytes=SAMPLE
+                    )
+            finally:
+                stop_cassette()
+        self.assertEqual([r.to_dict() for r in replayed], [r.to_dict() for r in recorded])
+        self.assertEqual(rank_mirrors(replayed), [self.mirror('fast')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Кэш read-only проб и его сброс мутирующими командами (utils.executor).
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.executor import Cmd, ProbeCache, mutation_tags, probe_cache, run_command, run_probe
+
+class MutationTagsTest(unittest.TestCase):
+
+    def test_classes(self):
+        self.assertEqual(mutation_tags('sgdisk --zap-all /dev/sda'), {'disk'})
+        self.assertEqual(mutation_tags('/usr/bin/mkfs.ext4 -F /dev/sda2'), {'disk'})
+        self.assertEqual(mutation_tags('pacstrap -K /mnt base'), {'packages'})
+        self.assertEqual(mutation_tags('mount /dev/sda2 /mnt && pacman -Sy'), {'disk', 'packages'})
+    
+    def test_read_only(self):
+        self.assertEqual(mutation_tags('lsblk -J'), set())
+        # Совпадение только целым словом
+        self.assertEqual(mutation_tags('mountpoint -q /mnt'), set())
+        self.assertEqual(mutation_tags('pacman-key --list-keys'), set())
+
+class ProbeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ProbeCache()
+        self.cache.put('lsblk', (0, 'sda'), ttl=None, tags=['disk'])
+        self.cache.put('pacman -Q', (0, 'base'), ttl=None, tags=['packages'])
+        self.cache.put('lspci', (0, 'gpu'), ttl=None)
+    
+    def test_invalidate_by_tag(self):
+        self.cache.invalidate(['disk'])
+        self.assertIsNone(self.cache.get('lsblk'))
+        self.assertEqual(self.cache.get('pacman -Q'), (0, 'base'))
+        self.assertEqual(self.cache.get('lspci'), (0, 'gpu'))
+    
+    def test_invalidate_for_command(self):
+        self.cache.invalidate_for('pacstrap /mnt base')
+        self.assertEqual(self.cache.get('lsblk'), (0, 'sda'))
+        self.assertIsNone(self.cache.get('pacman -Q'))
+        
+        # Read-only команда ничего не сбрасывает
+        self.cache.invalidate_for('lsblk -J')
+        self.assertEqual(self.cache.get('lsblk'), (0, 'sda'))
+    
+    def test_invalidate_all(self):
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('lspci'))
+    
+    def test_ttl(self):
+        with mock.patch('utils.executor.time.monotonic', return_value=1000.0):
+            self.cache.put('which grub-install', (0, '/usr/bin/grub-install'), ttl=5)
+        with mock.patch('utils.executor.time.monotonic', return_value=1004.0):
+            self.assertIsNotNone(self.cache.get('which grub-install'))
+        with mock.patch('utils.executor.time.monotonic', return_value=1005.0):
+            self.assertIsNone(self.cache.get('which grub-install'))
+
+class RunProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        probe_cache.invalidate()
+        self.addCleanup(probe_cache.invalidate)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.counter = os.path.join(directory.name, 'runs')
+        # Проба печатает, сколько раз она запускалась
+        self.probe = Cmd(['sh', '-c', f"echo run >> {self.counter}; wc -l < {self.counter}"])
+    
+    def runs(self):
+        return int(run_probe(self.probe, tags=['disk'])[1])
+    
+    def test_cached_until_mutation(self):
+        self.assertEqual(self.runs(), 1)
+        self.assertEqual(self.runs(), 1)
+        
+        # Команда другого класса запись не трогает
+        run_command('echo pacman', log=False)
+        self.assertEqual(self.runs(), 1)
+        
+        # Команда класса disk (здесь только слово в echo) сбрасывает запись
+        run_command('echo mkfs.ext4', log=False)
+        self.assertEqual(self.runs(), 2)
+        self.assertEqual(self.runs(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
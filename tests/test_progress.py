@@ -0,0 +1,129 @@
+"""
+Перерисовка gauge в ui.progress.
+"""
+
+import unittest
+from unittest import mock
+
+from ui import dialogs, progress
+
+class FakeDialog:
+    """Запоминает вызовы gauge_* и открыт ли gauge."""
+    
+    def __init__(self):
+        self.calls = []
+        self.gauge_open = False
+    
+    def gauge_start(self, key='', percent=0):
+        self.calls.append(('start', percent))
+        self.gauge_open = True
+    
+    def gauge_update(self, percent, key='', detail=''):
+        if not self.gauge_open:
+            raise AssertionError('gauge_update without an open gauge')
+        self.calls.append(('update', percent, key, detail))
+    
+    def gauge_stop(self):
+        self.calls.append(('stop',))
+        self.gauge_open = False
+
+class ProgressBarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dialog = FakeDialog()
+        with mock.patch.object(progress, 'get_dialog', return_value=self.dialog):
+            self.bar = progress.ProgressBar(total_steps=10)
+    
+    def test_no_redraw_before_start(self):
+        self.bar.set_detail('net 1.0M/s')
+        self.assertEqual(self.dialog.calls, [])
+    
+    def test_no_redraw_while_suspended(self):
+        self.bar.start('title')
+        self.bar.set_percent(50, 'installing_bootloader')
+        with self.bar.suspend():
+            calls = len(self.dialog.calls)
+            self.bar.set_detail('net 1.0M/s')
+            self.assertEqual(len(self.dialog.calls), calls)
+            self.assertFalse(self.dialog.gauge_open)
+        self.assertTrue(self.dialog.gauge_open)
+        self.assertEqual(self.dialog.calls[-1], ('update', 50, 'installing_bootloader', 'net 1.0M/s'))
+    
+    def test_stop_while_suspended(self):
+        self.bar.start('title')
+        with self.bar.suspend():
+            self.bar.stop()
+        self.assertFalse(self.dialog.gauge_open)
+        self.assertEqual([c for c in self.dialog.calls if c[0] == 'stop'], [('stop',)])
+
+class FakePythonDialog:
+    """Подмена dialog.Dialog: gauge и окна пишут в общий журнал."""
+    
+    OK = 'ok'
+    
+    def __init__(self, dialog='', autowidgetsize=True):
+        self.calls = []
+        self.gauge_open = False
+    
+    def set_background_title(self, title):
+        pass
+    
+    def gauge_start(self, text='', percent=0, height=10, width=70):
+        self.calls.append('gauge_start')
+        self.gauge_open = True
+    
+    def gauge_update(self, percent, text='', update_text=False):
+        self.calls.append('gauge_update')
+    
+    def gauge_stop(self):
+        self.calls.append('gauge_stop')
+        self.gauge_open = False
+    
+    def msgbox(self, text, height=10, width=70):
+        # Окно поверх открытого gauge было бы перерисовано
+        self.calls.append(('msgbox', self.gauge_open))
+        return self.OK
+    
+    def radiolist(self, text, choices, height=20, width=70):
+        self.calls.append(('radiolist', self.gauge_open))
+        return self.OK, choices[0][0]
+
+class DialogSuspendTest(unittest.TestCase):
+
+    def setUp(self):
+        fake_module = mock.Mock(Dialog=FakePythonDialog)
+        with mock.patch.object(dialogs, 'dialog_module', fake_module):
+            self.dialog = dialogs.InstallerDialog(lang='en')
+        self.d = self.dialog.d
+        with mock.patch.object(progress, 'get_dialog', return_value=self.dialog):
+            self.bar = progress.ProgressBar(total_steps=10)
+    
+    def test_any_window_hides_gauge(self):
+        self.bar.start('title')
+        self.bar.set_percent(40, 'installing_base')
+        self.dialog.msgbox('error')
+        self.assertEqual(self.dialog.radiolist('bootloader', [('grub', 'GRUB', 1)]), 'grub')
+        
+        windows = [call for call in self.d.calls if isinstance(call, tuple)]
+        self.assertEqual(windows, [('msgbox', False), ('radiolist', False)])
+        # После каждого окна gauge показан снова
+        self.assertTrue(self.d.gauge_open)
+        self.assertEqual(self.d.calls[-2:], ['gauge_start', 'gauge_update'])
+    
+    def test_no_gauge_after_stop(self):
+        self.bar.start('title')
+        self.bar.stop()
+        self.assertIsNone(self.dialog.active_gauge)
+        calls = len(self.d.calls)
+        self.dialog.msgbox('done')
+        self.assertEqual(self.d.calls[calls:], [('msgbox', False)])
+    
+    def test_explicit_suspend_still_nests(self):
+        self.bar.start('title')
+        with self.bar.suspend():
+            self.dialog.msgbox('error')
+        self.assertEqual(self.d.calls.count('gauge_stop'), 1)
+        self.assertTrue(self.d.gauge_open)
+
+if __name__ == '__main__':
+    unittest.main()
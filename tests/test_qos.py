@@ -0,0 +1,97 @@
+"""
+Классы приоритета команд (utils.qos).
+"""
+
+import os
+import subprocess
+import unittest
+from unittest import mock
+
+from utils import qos
+from utils.executor import ChrootSession, Cmd, run_command
+from utils.qos import QOS_BACKGROUND, QOS_FOREGROUND, QOS_IDLE, qos_prefix, validate_qos
+
+class QosPrefixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tools = {'nice', 'ionice', 'systemd-run'}
+        self.systemd = True
+        patchers = (
+            mock.patch.object(qos, '_has_tool', lambda name: name in self.tools),
+            mock.patch.object(qos, '_systemd_available', lambda: self.systemd),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_foreground(self):
+        self.assertEqual(qos_prefix(QOS_FOREGROUND), [])
+    
+    def test_background_with_systemd(self):
+        self.assertEqual(qos_prefix(QOS_BACKGROUND), [
+            'systemd-run', '--scope', '--quiet', '--collect',
+            '-p', 'CPUWeight=20', '-p', 'IOWeight=20', '--',
+            'nice', '-n', '10', 'ionice', '-c', '2', '-n', '7',
+        ])
+    
+    def test_idle_without_systemd(self):
+        self.systemd = False
+        self.assertEqual(qos_prefix(QOS_IDLE), ['nice', '-n', '19', 'ionice', '-c', '3'])
+    
+    def test_missing_tools_skipped(self):
+        self.systemd = False
+        self.tools = {'nice'}
+        self.assertEqual(qos_prefix(QOS_BACKGROUND), ['nice', '-n', '10'])
+    
+    def test_chroot_uses_base_tools_only(self):
+        # Утилиты хоста не важны, systemd-run в chroot не используется
+        self.tools = set()
+        self.assertEqual(
+            qos_prefix(QOS_BACKGROUND, chroot=True),
+            ['nice', '-n', '10', 'ionice', '-c', '2', '-n', '7']
+        )
+    
+    def test_unknown_class(self):
+        self.assertEqual(validate_qos(QOS_IDLE), QOS_IDLE)
+        with self.assertRaises(ValueError):
+            qos_prefix('realtime')
+        with self.assertRaises(ValueError):
+            run_command(Cmd(['true']), log=False, qos='realtime')
+
+class QosExecutionTest(unittest.TestCase):
+
+    def setUp(self):
+        # Без systemd-run: проверяется только nice
+        patcher = mock.patch.object(qos, '_systemd_available', lambda: False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.base = os.nice(0)
+    
+    def test_run_command(self):
+        _, output = run_command(Cmd(['nice']), log=False, qos=QOS_BACKGROUND)
+        self.assertEqual(int(output), min(self.base + 10, 19))
+        _, output = run_command('nice', log=False, qos=QOS_IDLE)
+        self.assertEqual(int(output), 19)
+        _, output = run_command(Cmd(['nice']), log=False)
+        self.assertEqual(int(output), self.base)
+    
+    def test_chroot_session(self):
+        # Протокол сессии без chroot и монтирования: shell в текущем корне
+        session = ChrootSession('/')
+        session.proc = subprocess.Popen(
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        try:
+            _, output = session.run('nice; cat', input='data', log=False, qos=QOS_BACKGROUND)
+            self.assertEqual(output, f"{min(self.base + 10, 19)}\ndata\n")
+            # Приоритет только у команды, shell сессии не меняется
+            self.assertEqual(int(session.run('nice', log=False)[1]), self.base)
+        finally:
+            session.proc.stdin.close()
+            session.proc.wait()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Учет ресурсов команд (utils.resources, run_command).
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import executor
+from utils.executor import Cmd, run_command, run_probe, add_command_listener, remove_command_listener
+from utils.resources import ResourceSampler
+
+class ResourceAccountingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = []
+        add_command_listener(self.records.append)
+    
+    def tearDown(self):
+        remove_command_listener(self.records.append)
+    
+    def test_disabled_by_default(self):
+        run_command(Cmd(['true']), log=False)
+        self.assertIsNone(self.records[-1].usage)
+    
+    def test_usage_of_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data')
+            script = f"head -c 1048576 /dev/zero > {path} && sync {path}"
+            run_command(Cmd(['sh', '-c', script]), log=False, accounting=True)
+        usage = self.records[-1].usage
+        self.assertIsNotNone(usage)
+        self.assertIsNotNone(usage.cpu_time)
+        self.assertGreater(usage.max_rss, 0)
+        self.assertIsNotNone(usage.write_bytes)
+    
+    def test_probe_not_sampled(self):
+        with mock.patch.object(executor, 'RESOURCE_ACCOUNTING', True), \
+                mock.patch.object(ResourceSampler, 'start') as start:
+            run_probe(Cmd(['echo', 'resource-accounting-probe']), ttl=None)
+        start.assert_not_called()
+        self.assertIsNone(self.records[-1].usage)
+    
+    def test_sampler_reads_only_own_process(self):
+        sampler = ResourceSampler(os.getpid())
+        with mock.patch('utils.resources.descendants') as descendants:
+            sampler.sample()
+        descendants.assert_not_called()
+        self.assertIsNotNone(sampler.read_bytes)
+        self.assertGreater(sampler.max_rss, 0)
+
+if __name__ == '__main__':
+    unittest.main()
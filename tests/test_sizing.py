@@ -0,0 +1,108 @@
+"""
+Оценка места на диске (installer.sizing).
+"""
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+
+from config import InstallationConfig
+from installer.sizing import SyncDatabase, root_partition_bytes, estimate_disk_usage, MB
+from installer.disk import EFI_PARTITION_MB
+
+GB = 1024 * MB
+
+def desc(name, version='1-1', csize=0, isize=0, depends=(), provides=(), groups=()):
+    """Текст desc в формате базы pacman."""
+    fields = [('NAME', [name]), ('VERSION', [version]), ('CSIZE', [str(csize)]), ('ISIZE', [str(isize)])]
+    fields += [('DEPENDS', list(depends)), ('PROVIDES', list(provides)), ('GROUPS', list(groups))]
+    return ''.join(f"%{key}%\n" + ''.join(f"{v}\n" for v in values) + "\n" for key, values in fields if values)
+
+def write_db(path, packages):
+    """Записать базу синхронизации (tar.gz с каталогом на пакет)."""
+    with tarfile.open(path, 'w:gz') as archive:
+        for name, text in packages.items():
+            data = text.encode()
+            info = tarfile.TarInfo(f"{name}-1-1/desc")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+class SyncDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_db(os.path.join(self.tmp.name, 'core.db'), {
+            'base': desc('base', csize=10, isize=100, depends=['glibc>=2.38', 'sh']),
+            'glibc': desc('glibc', csize=20, isize=200),
+            'bash': desc('bash', csize=30, isize=300, depends=['glibc'], provides=['sh']),
+            'vim': desc('vim', csize=1, isize=1, depends=['libmissing']),
+        })
+        write_db(os.path.join(self.tmp.name, 'extra.db'), {
+            'vim': desc('vim', version='9-1', csize=2, isize=2),
+            'xterm': desc('xterm', csize=5, isize=50, groups=['xorg']),
+            'xclock': desc('xclock', csize=6, isize=60, groups=['xorg']),
+        })
+        self.db = SyncDatabase(self.tmp.name)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_dependencies_and_provides(self):
+        resolved, missing = self.db.resolve(['base'])
+        self.assertEqual(sorted(resolved), ['base', 'bash', 'glibc'])
+        self.assertEqual(missing, [])
+    
+    def test_groups_and_missing(self):
+        resolved, missing = self.db.resolve(['xorg', 'nosuchpackage'])
+        self.assertEqual(sorted(resolved), ['xclock', 'xterm'])
+        self.assertEqual(missing, ['nosuchpackage'])
+    
+    def test_earlier_repository_wins(self):
+        resolved, missing = self.db.resolve(['vim'])
+        self.assertEqual(resolved['vim'].repo, 'core')
+        self.assertEqual(missing, ['libmissing'])
+    
+    def test_estimate_from_sync_db(self):
+        cfg = InstallationConfig()
+        cfg.partition_scheme = 'auto_ext4'
+        cfg.installation_profile = 'minimal'
+        estimate = estimate_disk_usage(cfg, db=self.db, disk_bytes=64 * GB)
+        self.assertTrue(estimate.from_sync_db)
+        self.assertEqual(estimate.installed_bytes, 100 + 200 + 300)
+        self.assertEqual(estimate.download_bytes, 10 + 20 + 30)
+        self.assertTrue(estimate.fits)
+    
+    def test_no_databases(self):
+        self.assertFalse(SyncDatabase(os.path.join(self.tmp.name, 'missing')).load())
+
+class RootPartitionTest(unittest.TestCase):
+
+    def config(self, scheme='auto_ext4', uefi=False, swap_size=16):
+        cfg = InstallationConfig()
+        cfg.partition_scheme = scheme
+        cfg.is_uefi = uefi
+        cfg.swap_type = 'file'
+        cfg.swap_size = swap_size
+        return cfg
+    
+    def test_swap_not_subtracted(self):
+        # Автоматические схемы не создают swap - его размер не влияет на оценку
+        small = root_partition_bytes(20 * GB, self.config(swap_size=0))
+        large = root_partition_bytes(20 * GB, self.config(swap_size=16))
+        self.assertEqual(small, large)
+        self.assertEqual(large, 20 * GB - int(20 * GB * 0.02))
+    
+    def test_efi_and_btrfs(self):
+        available = root_partition_bytes(20 * GB, self.config('auto_btrfs', uefi=True))
+        expected = 20 * GB - EFI_PARTITION_MB * MB
+        self.assertEqual(available, expected - int(expected * 0.03))
+    
+    def test_manual_scheme_unknown(self):
+        self.assertIsNone(root_partition_bytes(20 * GB, self.config('manual')))
+        estimate = estimate_disk_usage(self.config('manual'), db=SyncDatabase('/nonexistent'), disk_bytes=1 * GB)
+        self.assertIsNone(estimate.fits)
+
+if __name__ == '__main__':
+    unittest.main()
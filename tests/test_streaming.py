@@ -0,0 +1,65 @@
+"""
+Потоковый режим run_command и обработчики строк (utils.executor).
+"""
+
+import sys
+import time
+import unittest
+
+from utils.executor import Cmd, add_line_handler, remove_line_handler, run_command
+
+class StreamingTest(unittest.TestCase):
+
+    def test_lines_arrive_while_running(self):
+        arrived = []
+        run_command(
+            Cmd(['sh', '-c', 'echo first; sleep 0.5; echo second']),
+            log=False, stream=True,
+            on_line=lambda line, stream: arrived.append((line, time.monotonic()))
+        )
+        self.assertEqual([line for line, _ in arrived], ['first', 'second'])
+        # Первая строка пришла до завершения команды
+        self.assertGreater(arrived[1][1] - arrived[0][1], 0.3)
+    
+    def test_streams_and_last_line(self):
+        lines = []
+        run_command(
+            Cmd(['sh', '-c', 'echo out; echo err >&2; printf "без перевода"']),
+            log=False, stream=True,
+            on_line=lambda line, stream: lines.append((stream, line))
+        )
+        self.assertEqual(sorted(lines), [('stderr', 'err'), ('stdout', 'out'), ('stdout', 'без перевода')])
+    
+    def test_multibyte_split_across_reads(self):
+        lines = []
+        # Символ в 3 байта: границы чтения попадают внутрь символов
+        run_command(
+            Cmd([sys.executable, '-c', "import sys; sys.stdout.write('€' * 100000 + '\\n')"]),
+            log=False, stream=True, on_line=lambda line, stream: lines.append(line)
+        )
+        self.assertEqual(lines, ['€' * 100000])
+    
+    def test_global_handler(self):
+        lines = []
+        handler = lambda line, stream: lines.append(line)
+        add_line_handler(handler)
+        add_line_handler(handler)
+        try:
+            run_command(Cmd(['echo', 'streamed']), log=False, stream=True)
+            # Обычный режим обработчики не вызывает
+            run_command(Cmd(['echo', 'captured']), log=False)
+        finally:
+            remove_line_handler(handler)
+        run_command(Cmd(['echo', 'removed']), log=False, stream=True)
+        self.assertEqual(lines, ['streamed'])
+    
+    def test_failing_handler_does_not_stop_command(self):
+        def broken(line, stream):
+            raise ValueError(line)
+        returncode, output = run_command(
+            Cmd(['printf', 'a\\nb\\n']), log=False, stream=True, on_line=broken
+        )
+        self.assertEqual((returncode, output), (0, 'a\nb'))
+
+if __name__ == '__main__':
+    unittest.main()
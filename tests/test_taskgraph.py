@@ -0,0 +1,50 @@
+"""
+Граф задач utils.taskgraph.
+"""
+
+import threading
+import unittest
+
+from utils.taskgraph import TaskGraph, PASSED, FAILED, SKIPPED, TIMED_OUT
+
+class TaskGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+    
+    def tearDown(self):
+        # Отпустить зависшие потоки задач
+        self.release.set()
+    
+    def test_dependents_of_failed_task_skipped(self):
+        graph = TaskGraph()
+        graph.add('a', lambda: False)
+        graph.add('b', lambda: True, deps=['a'])
+        self.assertFalse(graph.run(deadline=5))
+        self.assertEqual(graph.tasks['a'].status, FAILED)
+        self.assertEqual(graph.tasks['b'].status, SKIPPED)
+    
+    def test_dependents_of_timed_out_task_skipped(self):
+        graph = TaskGraph()
+        graph.add('slow', lambda: self.release.wait(10))
+        graph.add('child', lambda: True, deps=['slow'])
+        graph.add('grandchild', lambda: True, deps=['child'], critical=False, background=True)
+        self.assertFalse(graph.run(deadline=0.1))
+        self.assertEqual(graph.tasks['slow'].status, TIMED_OUT)
+        self.assertEqual(graph.tasks['child'].status, SKIPPED)
+        self.assertEqual(graph.tasks['grandchild'].status, SKIPPED)
+        # Фоновая задача за пропущенной зависимостью не блокирует wait()
+        self.assertFalse(graph.wait('grandchild', timeout=1))
+    
+    def test_background_task_outlives_deadline(self):
+        graph = TaskGraph()
+        graph.add('fast', lambda: True)
+        graph.add('background', lambda: self.release.wait(10), deps=['fast'], background=True)
+        self.assertTrue(graph.run(deadline=0.1))
+        self.assertIsNone(graph.wait('background', timeout=0.05))
+        self.release.set()
+        self.assertTrue(graph.wait('background', timeout=5))
+        self.assertEqual(graph.tasks['background'].status, PASSED)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Трасса команд и этапов в формате Chrome trace-event (utils.tracing).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from utils.executor import Cmd, add_command_listener, remove_command_listener, run_command
+from utils.tracing import STAGES_TID, Tracer
+
+class TracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracer = Tracer()
+    
+    def spans(self, cat=None):
+        return [e for e in self.tracer.events if e['ph'] == 'X' and cat in (None, e['cat'])]
+    
+    def test_commands_inside_stages(self):
+        add_command_listener(self.tracer.record_command)
+        try:
+            self.tracer.begin_stage('installing_base', index=3)
+            run_command(Cmd(['sh', '-c', 'echo out; exit 3']), check=False, log=False)
+            self.tracer.begin_stage('generating_fstab')
+            self.tracer.end_stage()
+        finally:
+            remove_command_listener(self.tracer.record_command)
+        
+        command, = self.spans('command')
+        self.assertEqual(command['name'], "sh -c 'echo out; exit 3'")
+        self.assertEqual(command['args']['returncode'], 3)
+        self.assertEqual(command['args']['output_bytes'], 4)
+        self.assertEqual(command['args']['stage'], 'installing_base')
+        
+        stages = self.spans('stage')
+        self.assertEqual([s['name'] for s in stages], ['installing_base', 'generating_fstab'])
+        self.assertEqual({s['tid'] for s in stages}, {STAGES_TID})
+        self.assertEqual(stages[0]['args'], {'index': 3})
+        # Команда лежит внутри своего этапа
+        self.assertGreaterEqual(command['ts'], stages[0]['ts'])
+        self.assertLessEqual(command['ts'] + command['dur'], stages[0]['ts'] + stages[0]['dur'])
+        durations = self.tracer.stage_durations()
+        self.assertEqual([name for name, _ in durations], ['installing_base', 'generating_fstab'])
+        self.assertIsNone(self.tracer.current_stage)
+    
+    def test_threads_get_own_tracks(self):
+        with self.tracer.span('main'):
+            pass
+        worker = threading.Thread(
+            target=lambda: self.tracer.complete('worker', 0.0, 0.1), name='inventory'
+        )
+        worker.start()
+        worker.join()
+        
+        main, other = self.spans()
+        self.assertNotEqual(main['tid'], other['tid'])
+        names = {e['tid']: e['args']['name'] for e in self.tracer.events if e['ph'] == 'M'}
+        self.assertEqual(names[STAGES_TID], 'stages')
+        self.assertEqual(names[other['tid']], 'inventory')
+    
+    def test_save(self):
+        with self.tracer.span('partitioning', cat='disk', disk='/dev/sda'):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            self.assertTrue(self.tracer.save(path))
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(os.listdir(directory), ['trace.json'])
+            self.assertFalse(self.tracer.save(os.path.join(directory, 'missing', 'trace.json')))
+        
+        self.assertEqual(data['displayTimeUnit'], 'ms')
+        span, = [e for e in data['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual(
+            (span['name'], span['cat'], span['args']),
+            ('partitioning', 'disk', {'disk': '/dev/sda'})
+        )
+        self.assertTrue(all(key in span for key in ('ts', 'dur', 'pid', 'tid')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Дедлайн и детектор зависания команд (utils.executor).
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils.executor import ChrootSession, Cmd, CommandTimeoutError, run_command
+
+class RunCommandWatchdogTest(unittest.TestCase):
+
+    def test_deadline(self):
+        started = time.monotonic()
+        with self.assertRaises(CommandTimeoutError) as caught:
+            run_command(Cmd(['sh', '-c', 'echo started; sleep 30']), log=False, timeout=0.5)
+        self.assertLess(time.monotonic() - started, 5)
+        error = caught.exception
+        self.assertEqual((error.reason, error.timeout), ('deadline', 0.5))
+        self.assertIn('started', error.output)
+        self.assertIn('timed out', str(error))
+    
+    def test_stall(self):
+        with self.assertRaises(CommandTimeoutError) as caught:
+            run_command(Cmd(['sh', '-c', 'echo a; sleep 30']), log=False, stall_timeout=0.5)
+        self.assertEqual(caught.exception.reason, 'stall')
+        self.assertIn('no output', str(caught.exception))
+    
+    def test_steady_output_is_not_a_stall(self):
+        # Работает дольше stall_timeout, но пауза между строками меньше
+        script = 'for i in 1 2 3 4 5 6; do echo $i; sleep 0.15; done'
+        returncode, _ = run_command(Cmd(['sh', '-c', script]), log=False, stall_timeout=0.6)
+        self.assertEqual(returncode, 0)
+    
+    def test_children_stopped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pidfile = os.path.join(directory, 'child')
+            with self.assertRaises(CommandTimeoutError):
+                run_command(
+                    Cmd(['sh', '-c', f"sleep 30 & echo $! > {pidfile}; wait"]),
+                    log=False, timeout=0.5
+                )
+            with open(pidfile) as f:
+                child = int(f.read())
+        self.assertFalse(self.alive(child))
+    
+    def test_sigkill_after_ignored_sigterm(self):
+        script = "trap '' TERM; echo ready; while :; do sleep 0.1; done"
+        started = time.monotonic()
+        with mock.patch('utils.executor.TERM_GRACE', 0.3):
+            with self.assertRaises(CommandTimeoutError) as caught:
+                run_command(Cmd(['bash', '-c', script]), log=False, timeout=0.3)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(caught.exception.returncode, -9)
+    
+    def alive(self, pid):
+        # Зомби тоже считается остановленным
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+        except FileNotFoundError:
+            return False
+
+class ChrootSessionWatchdogTest(unittest.TestCase):
+
+    def setUp(self):
+        # Протокол сессии без chroot и монтирования: shell в текущем корне
+        self.session = ChrootSession('/')
+        self.session.proc = subprocess.Popen(
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    
+    def tearDown(self):
+        self.session.proc.stdin.close()
+        self.session.proc.wait()
+    
+    def test_session_survives_timeout(self):
+        with self.assertRaises(CommandTimeoutError) as caught:
+            self.session.run('sleep 30', log=False, timeout=0.5)
+        self.assertEqual(caught.exception.reason, 'deadline')
+        # Остановлена только команда, shell сессии работает дальше
+        self.assertTrue(self.session.active)
+        self.assertEqual(self.session.run('echo alive', log=False), (0, 'alive\n'))
+
+if __name__ == '__main__':
+    unittest.main()
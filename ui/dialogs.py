@@ -2,18 +2,22 @@
 UI диалоги - обертка над pythondialog с преднастроенным стилем.
 """
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, ContextManager
+from contextlib import nullcontext
 from config import t, CURRENT_LANG
 
-try:
-    from dialog import Dialog
-except ImportError:
-    Dialog = None
+from utils.lazy import lazy_module
+
+# pythondialog загружается при создании первого окна
+dialog_module = lazy_module('dialog')
 
 class InstallerDialog:
     """
     Обертка над pythondialog для установщика.
     Все методы используют текущий язык из конфигурации.
+    
+    Пока открыт прогресс-бар (active_gauge), каждое интерактивное окно
+    сначала убирает gauge, а после закрытия показывает его снова.
     """
     
     def __init__(self, lang: str = 'ru', autowidgetsize: bool = True):
@@ -24,7 +28,9 @@ class InstallerDialog:
             lang: Язык интерфейса
             autowidgetsize: Автоматический размер окна
         """
-        if Dialog is None:
+        try:
+            Dialog = dialog_module.Dialog
+        except ImportError:
             raise ImportError(
                 "pythondialog is not installed. "
                 "Install with: pip install pythondialog"
@@ -33,6 +39,13 @@ class InstallerDialog:
         self.d = Dialog(dialog="dialog", autowidgetsize=autowidgetsize)
         self.d.set_background_title("Arch Linux Installer v2.0")
         self.lang = lang
+        # ProgressBar, чей gauge сейчас на экране (ставит ui.progress)
+        self.active_gauge = None
+    
+    def _interactive(self) -> ContextManager[None]:
+        """Убрать активный gauge на время интерактивного окна."""
+        gauge = self.active_gauge
+        return gauge.suspend() if gauge is not None else nullcontext()
     
     def msgbox(self, key: str, height: int = 10, width: int = 70) -> int:
         """
@@ -47,7 +60,8 @@ class InstallerDialog:
             Код результата
         """
         text = t(key, self.lang)
-        return self.d.msgbox(text, height=height, width=width)
+        with self._interactive():
+            return self.d.msgbox(text, height=height, width=width)
     
     def yesno(self, key: str, height: int = 10, width: int = 70) -> bool:
         """
@@ -62,7 +76,8 @@ class InstallerDialog:
             True если ответ "Yes"
         """
         text = t(key, self.lang)
-        code = self.d.yesno(text, height=height, width=width)
+        with self._interactive():
+            code = self.d.yesno(text, height=height, width=width)
         return code == self.d.OK
     
     def inputbox(self, key: str, init: str = '', height: int = 10, width: int = 70) -> Optional[str]:
@@ -79,7 +94,8 @@ class InstallerDialog:
             Введенный текст или None если отмена
         """
         text = t(key, self.lang)
-        code, value = self.d.inputbox(text, init=init, height=height, width=width)
+        with self._interactive():
+            code, value = self.d.inputbox(text, init=init, height=height, width=width)
         return value if code == self.d.OK else None
     
     def passwordbox(self, key: str, height: int = 10, width: int = 70) -> Optional[str]:
@@ -95,7 +111,8 @@ class InstallerDialog:
             Введенный пароль или None если отмена
         """
         text = t(key, self.lang)
-        code, value = self.d.passwordbox(text, height=height, width=width)
+        with self._interactive():
+            code, value = self.d.passwordbox(text, height=height, width=width)
         return value if code == self.d.OK else None
     
     def radiolist(
@@ -120,7 +137,8 @@ class InstallerDialog:
             Выбранный tag или None если отмена
         """
         text = t(key, self.lang)
-        code, tag = self.d.radiolist(text, choices, height=height, width=width)
+        with self._interactive():
+            code, tag = self.d.radiolist(text, choices, height=height, width=width)
         return tag if code == self.d.OK else None
     
     def checklist(
@@ -145,7 +163,8 @@ class InstallerDialog:
             Список выбранных tags или None если отмена
         """
         text = t(key, self.lang)
-        code, tags = self.d.checklist(text, choices, height=height, width=width)
+        with self._interactive():
+            code, tags = self.d.checklist(text, choices, height=height, width=width)
         return tags if code == self.d.OK else None
     
     def menu(
@@ -169,7 +188,8 @@ class InstallerDialog:
             Выбранный tag или None если отмена
         """
         text = t(key, self.lang)
-        code, tag = self.d.menu(text, choices, height=height, width=width)
+        with self._interactive():
+            code, tag = self.d.menu(text, choices, height=height, width=width)
         return tag if code == self.d.OK else None
     
     def gauge_start(self, key: str = '', percent: int = 0) -> None:
@@ -183,16 +203,19 @@ class InstallerDialog:
         text = t(key, self.lang) if key else ""
         self.d.gauge_start(text, percent=percent, height=10, width=70)
     
-    def gauge_update(self, percent: int, key: str = '') -> None:
+    def gauge_update(self, percent: int, key: str = '', detail: str = '') -> None:
         """
         Обновить прогресс-бар.
         
         Args:
             percent: Процент выполнения (0-100)
             key: Ключ перевода текста
+            detail: Дополнительная строка под текстом (например, ресурсы)
         """
         text = t(key, self.lang) if key else ""
-        self.d.gauge_update(percent, text=text)
+        if detail:
+            text = f"{text}\n\n{detail}" if text else detail
+        self.d.gauge_update(percent, text=text, update_text=bool(text))
     
     def gauge_stop(self) -> None:
         """Остановить прогресс-бар."""
@@ -215,7 +238,49 @@ class InstallerDialog:
         Returns:
             Код результата
         """
-        return self.d.textbox(filepath, height=height, width=width)
+        with self._interactive():
+            return self.d.textbox(filepath, height=height, width=width)
+    
+    def pager(
+        self,
+        text: str,
+        title: str = '',
+        height: int = 24,
+        width: int = 100
+    ) -> str:
+        """
+        Страница текста с кнопками навигации.
+        
+        Args:
+            text: Текст страницы
+            title: Заголовок окна
+            height: Высота окна
+            width: Ширина окна
+        
+        Returns:
+            'next', 'prev', 'actions' или 'close'
+        """
+        with self._interactive():
+            code = self.d.yesno(
+                text,
+                height=height,
+                width=width,
+                title=title,
+                yes_label=t('log_next_page', self.lang),
+                no_label=t('log_close', self.lang),
+                extra_button=True,
+                extra_label=t('log_prev_page', self.lang),
+                help_button=True,
+                help_label=t('log_actions', self.lang),
+                no_collapse=True
+            )
+        if code == self.d.OK:
+            return 'next'
+        if code == self.d.EXTRA:
+            return 'prev'
+        if code == self.d.HELP:
+            return 'actions'
+        return 'close'
     
     def set_background_title(self, title: str) -> None:
         """
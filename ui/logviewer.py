@@ -0,0 +1,202 @@
+"""
+Просмотр лога установки.
+
+Вместо dialog --textbox (который читает весь файл) показывает лог
+постранично через utils.logindex: на каждой странице индекс
+дочитывает только новую часть файла, а из mmap берутся лишь видимые
+строки. Ротированные копии лога (archinstall.log.1 ...) показываются
+перед текущим файлом, так что ранние этапы длинной установки не
+теряются. Через меню "Действия" можно перейти к следующей/предыдущей
+ошибке, найти текст и ограничить просмотр одним этапом установки.
+"""
+
+from typing import Optional, Tuple
+from config import t, LOG_FILE, LOG_VIEWER_PAGE_LINES
+from ui.dialogs import InstallerDialog
+from utils.logindex import RotatedLogIndex
+
+class LogViewer:
+    """Постраничный просмотр лога."""
+    
+    def __init__(
+        self,
+        dialog: InstallerDialog,
+        path: str = LOG_FILE,
+        page_lines: int = LOG_VIEWER_PAGE_LINES,
+        width: int = 100
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            dialog: Диалоговый интерфейс
+            path: Путь к файлу лога
+            page_lines: Строк на странице
+            width: Ширина окна
+        """
+        self.dialog = dialog
+        self.index = RotatedLogIndex(path)
+        self.page_lines = page_lines
+        self.width = width
+        self.position = 0
+        self.stage: Optional[str] = None
+        self.query = ''
+    
+    def bounds(self) -> Tuple[int, int]:
+        """Диапазон строк с учетом фильтра по этапу."""
+        if self.stage is not None:
+            stage_range = self.index.stage_range(self.stage)
+            if stage_range is not None:
+                return stage_range
+        return 0, self.index.line_count
+    
+    def clamp(self) -> None:
+        """Удержать позицию внутри диапазона."""
+        low, high = self.bounds()
+        self.position = max(low, min(self.position, max(low, high - self.page_lines)))
+    
+    def page_text(self) -> str:
+        """Текст текущей страницы с номерами строк."""
+        low, high = self.bounds()
+        count = min(self.page_lines, high - self.position)
+        digits = len(str(high))
+        text_width = self.width - digits - 6
+        
+        rows = []
+        for offset, line in enumerate(self.index.lines(self.position, count)):
+            if len(line) > text_width:
+                line = line[:text_width - 1] + '~'
+            rows.append(f"{self.position + offset + 1:>{digits}} {line}")
+        return '\n'.join(rows)
+    
+    def title(self) -> str:
+        """Заголовок: файл, видимые строки, этап."""
+        low, high = self.bounds()
+        last = min(self.position + self.page_lines, high)
+        title = f"{self.index.path} [{self.position + 1}-{last}/{high}]"
+        if self.stage is not None:
+            title += f" {self.stage}"
+        return title
+    
+    def jump(self, line: Optional[int], missing_key: str) -> None:
+        """
+        Перейти к строке (страница начинается с нее).
+        
+        Args:
+            line: Номер строки или None
+            missing_key: Ключ сообщения, если строки нет
+        """
+        if line is None:
+            self.dialog.msgbox(missing_key, height=7, width=40)
+            return
+        
+        low, high = self.bounds()
+        if not low <= line < high:
+            self.stage = None  # строка вне выбранного этапа - снимаем фильтр
+        self.position = line
+    
+    def search(self, again: bool = False) -> None:
+        """
+        Поиск текста вперед от текущей страницы.
+        
+        Args:
+            again: Повторить прошлый запрос
+        """
+        if not again or not self.query:
+            query = self.dialog.inputbox('log_search_prompt', init=self.query)
+            if not query:
+                return
+            self.query = query
+        
+        low, high = self.bounds()
+        start = self.position + 1 if again else self.position
+        found = self.index.search(self.query, start, high)
+        if found is None:
+            found = self.index.search(self.query, low, start)  # с начала диапазона
+        self.jump(found, 'log_not_found')
+    
+    def select_stage(self) -> None:
+        """Выбрать этап для фильтра."""
+        if not self.index.stages:
+            self.dialog.msgbox('log_no_stages', height=7, width=40)
+            return
+        
+        choices = [('*', t('log_show_all', self.dialog.lang))]
+        choices += [(name, f"{t(name, self.dialog.lang)} ({line + 1})") for name, line in self.index.stages]
+        tag = self.dialog.menu('log_filter_stage', choices)
+        if tag is None:
+            return
+        self.stage = None if tag == '*' else tag
+        self.position = self.bounds()[0]
+    
+    def actions(self) -> None:
+        """Меню действий."""
+        lang = self.dialog.lang
+        choices = [
+            ('next_error', t('log_next_error', lang)),
+            ('prev_error', t('log_prev_error', lang)),
+            ('search', t('log_search', lang)),
+        ]
+        if self.query:
+            choices.append(('search_next', f"{t('log_search_next', lang)}: {self.query}"))
+        choices += [
+            ('stage', t('log_filter_stage', lang)),
+            ('first', t('log_first_page', lang)),
+            ('last', t('log_last_page', lang)),
+        ]
+        
+        action = self.dialog.menu('log_actions_title', choices)
+        if action == 'next_error':
+            self.jump(self.index.next_error(self.position), 'log_no_errors')
+        elif action == 'prev_error':
+            self.jump(self.index.previous_error(self.position), 'log_no_errors')
+        elif action == 'search':
+            self.search()
+        elif action == 'search_next':
+            self.search(again=True)
+        elif action == 'stage':
+            self.select_stage()
+        elif action == 'first':
+            self.position = self.bounds()[0]
+        elif action == 'last':
+            self.position = self.bounds()[1]
+    
+    def run(self) -> None:
+        """Цикл просмотра до закрытия."""
+        try:
+            self.index.refresh()
+            if self.index.line_count == 0:
+                self.dialog.msgbox('log_empty', height=7, width=40)
+                return
+            
+            while True:
+                self.index.refresh()
+                # После ротации самая старая копия удалена - строки сдвинулись
+                self.position -= self.index.dropped_lines
+                self.clamp()
+                result = self.dialog.pager(
+                    self.page_text(),
+                    title=self.title(),
+                    height=self.page_lines + 6,
+                    width=self.width
+                )
+                if result == 'next':
+                    self.position += self.page_lines
+                elif result == 'prev':
+                    self.position -= self.page_lines
+                elif result == 'actions':
+                    self.actions()
+                else:
+                    break
+        finally:
+            self.index.close()
+
+def view_log(dialog: InstallerDialog, path: str = LOG_FILE) -> None:
+    """
+    Показать лог установки.
+    
+    Args:
+        dialog: Диалоговый интерфейс
+        path: Путь к файлу лога
+    """
+    LogViewer(dialog, path).run()
@@ -3,8 +3,14 @@
 """
 
 from ui.dialogs import get_dialog
-from config import t
-from typing import Optional, Callable
+from utils.logger import logger
+from utils.tracing import tracer
+from utils.events import events
+from utils.monitor import monitor
+from config import t, config
+from typing import Optional, Callable, Iterator
+from contextlib import contextmanager
+import threading
 
 class ProgressBar:
     """Менеджер прогресс-бара."""
@@ -20,6 +26,13 @@ class ProgressBar:
         self.current_step = 0
         self.dialog = get_dialog()
         self.active = False
+        # gauge убран на время интерактивного диалога (suspend)
+        self.suspended = False
+        self.percent = 0
+        self.message_key = ''
+        self.detail = ''
+        # gauge обновляется и из основного потока, и из монитора ресурсов
+        self._lock = threading.Lock()
     
     def start(self, title_key: str = '') -> None:
         """
@@ -29,8 +42,12 @@ class ProgressBar:
             title_key: Ключ перевода заголовка
         """
         self.current_step = 0
-        self.active = True
-        self.dialog.gauge_start(title_key, percent=0)
+        with self._lock:
+            self.dialog.gauge_start(title_key, percent=0)
+            self.active = True
+            self.suspended = False
+        # Интерактивные окна InstallerDialog сами вызывают suspend()
+        self.dialog.active_gauge = self
     
     def update(self, steps: int = 1, message_key: str = '') -> None:
         """
@@ -45,7 +62,7 @@ class ProgressBar:
         
         self.current_step = min(self.current_step + steps, self.total_steps)
         percent = int((self.current_step / self.total_steps) * 100)
-        self.dialog.gauge_update(percent, message_key)
+        self._render(percent, message_key)
     
     def set_percent(self, percent: int, message_key: str = '') -> None:
         """
@@ -60,12 +77,64 @@ class ProgressBar:
         
         percent = max(0, min(percent, 100))
         self.current_step = int((percent / 100) * self.total_steps)
-        self.dialog.gauge_update(percent, message_key)
+        self._render(percent, message_key)
+    
+    def set_detail(self, detail: str) -> None:
+        """
+        Обновить строку под текущим сообщением, не меняя процент.
+        
+        Args:
+            detail: Текст строки
+        """
+        if not self.active:
+            return
+        self.detail = detail
+        self._render(self.percent, self.message_key)
+    
+    def _render(self, percent: int, message_key: str) -> None:
+        """Перерисовать gauge (при suspend только запомнить состояние)."""
+        with self._lock:
+            if not self.active:
+                return
+            self.percent = percent
+            self.message_key = message_key
+            if not self.suspended:
+                self.dialog.gauge_update(percent, message_key, detail=self.detail)
+    
+    @contextmanager
+    def suspend(self) -> Iterator[None]:
+        """
+        Убрать gauge на время интерактивного диалога.
+        
+        Окна InstallerDialog вызывают его сами; вложенный suspend ничего
+        не делает.
+        
+        Пока gauge убран, перерисовки (в том числе строка ресурсов из
+        потока монитора) не выводятся; после выхода gauge показывается
+        снова с последними процентом, сообщением и строкой ресурсов.
+        """
+        with self._lock:
+            hidden = self.active and not self.suspended
+            if hidden:
+                self.dialog.gauge_stop()
+                self.suspended = True
+        try:
+            yield
+        finally:
+            with self._lock:
+                if hidden:
+                    if self.active:
+                        self.dialog.gauge_start(percent=self.percent)
+                        self.dialog.gauge_update(self.percent, self.message_key, detail=self.detail)
+                    self.suspended = False
     
     def stop(self) -> None:
         """Остановить прогресс-бар."""
-        if self.active:
-            self.dialog.gauge_stop()
+        if getattr(self.dialog, 'active_gauge', None) is self:
+            self.dialog.active_gauge = None
+        with self._lock:
+            if self.active and not self.suspended:
+                self.dialog.gauge_stop()
             self.active = False
 
 class InstallationProgress(ProgressBar):
@@ -95,12 +164,39 @@ class InstallationProgress(ProgressBar):
         super().__init__(total_steps=len(self.STAGES))
         self.stage_index = 0
     
+    def start(self, title_key: str = '') -> None:
+        """
+        Начать прогресс-бар и монитор ресурсов (строка ресурсов в gauge).
+        
+        Args:
+            title_key: Ключ перевода заголовка
+        """
+        super().start(title_key)
+        monitor.add_listener(self._show_resources)
+        monitor.start(device=config.disk)
+    
+    def _show_resources(self, sample) -> None:
+        """Показать последний отсчет монитора под текстом этапа."""
+        self.set_detail(monitor.format_line(sample))
+    
     def next_stage(self) -> None:
         """Перейти к следующему этапу установки."""
         if self.stage_index < len(self.STAGES):
             stage_key, percent = self.STAGES[self.stage_index]
+            # Отметка этапа в логе (по ней фильтрует utils.logindex)
+            logger.info(f"Stage {self.stage_index + 1}/{len(self.STAGES)}: {stage_key}")
+            tracer.begin_stage(stage_key, index=self.stage_index, percent=percent)
+            events.begin_stage(stage_key, index=self.stage_index, percent=percent)
             self.set_percent(percent, stage_key)
             self.stage_index += 1
+    
+    def stop(self) -> None:
+        """Остановить прогресс-бар, монитор и завершить последний этап в трассе."""
+        monitor.remove_listener(self._show_resources)
+        monitor.stop()
+        tracer.end_stage()
+        events.end_stage()
+        super().stop()
 
 # Глобальный экземпляр
 _progress_instance: Optional[ProgressBar] = None
@@ -0,0 +1,158 @@
+"""
+Сводка потребленных ресурсов по этапам установки.
+
+Наблюдатель executor складывает ResourceUsage каждой команды в этап,
+текущий в трассировщике (utils.tracing), и в конце установки выводит
+таблицу: какие этапы упираются в процессор, а какие в диск.
+"""
+
+import threading
+from typing import Dict, List, Optional, Any
+from utils.logger import logger
+from utils.executor import CommandRecord, add_command_listener
+from utils.tracing import tracer
+
+# Этап для команд вне этапов установки (проверки, выбор диска и т.п.)
+NO_STAGE = '-'
+
+def _format_bytes(size: int) -> str:
+    """Размер в байтах в виде '12.3M'."""
+    if size < 1024:
+        return f"{size}B"
+    value = size / 1024
+    for unit in ('K', 'M'):
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}G"
+
+class StageUsage:
+    """Суммарные ресурсы команд одного этапа."""
+    
+    def __init__(self, stage: str):
+        """
+        Инициализация.
+        
+        Args:
+            stage: Ключ этапа
+        """
+        self.stage = stage
+        self.commands = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.max_rss = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.slowest: Optional[CommandRecord] = None
+    
+    def add(self, record: CommandRecord) -> None:
+        """
+        Учесть команду.
+        
+        Args:
+            record: Сведения о команде
+        """
+        self.commands += 1
+        self.wall_time += record.duration
+        if self.slowest is None or record.duration > self.slowest.duration:
+            self.slowest = record
+        
+        usage = record.usage
+        if usage is None:
+            return
+        self.cpu_time += usage.cpu_time or 0.0
+        self.max_rss = max(self.max_rss, usage.max_rss or 0)
+        self.read_bytes += usage.read_bytes or 0
+        self.write_bytes += usage.write_bytes or 0
+    
+    @property
+    def cpu_share(self) -> float:
+        """Доля процессорного времени от времени выполнения команд."""
+        return self.cpu_time / self.wall_time if self.wall_time > 0 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Поля этапа для отчетов."""
+        return {
+            'stage': self.stage,
+            'commands': self.commands,
+            'wall_s': round(self.wall_time, 3),
+            'cpu_s': round(self.cpu_time, 3),
+            'max_rss_kb': self.max_rss,
+            'read_bytes': self.read_bytes,
+            'write_bytes': self.write_bytes,
+            'slowest': self.slowest.cmd if self.slowest is not None else None,
+        }
+
+class ResourceAccounting:
+    """Сборщик ресурсов команд по этапам установки."""
+    
+    def __init__(self):
+        """Инициализация пустой сводки."""
+        self.stages: Dict[str, StageUsage] = {}
+        self._lock = threading.Lock()
+    
+    def record_command(self, record: CommandRecord) -> None:
+        """
+        Учесть выполненную команду (наблюдатель executor).
+        
+        Шаги пакета команд не учитываются отдельно: их ресурсы уже входят
+        в команду, выполнившую пакет.
+        
+        Args:
+            record: Сведения о команде
+        """
+        if record.kind == 'batch-step':
+            return
+        
+        stage = tracer.current_stage or NO_STAGE
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageUsage(stage)
+            self.stages[stage].add(record)
+    
+    def summary(self) -> List[Dict[str, Any]]:
+        """Сводка по этапам в порядке их появления."""
+        with self._lock:
+            return [usage.to_dict() for usage in self.stages.values()]
+    
+    def format_table(self) -> str:
+        """
+        Таблица ресурсов по этапам.
+        
+        Returns:
+            Текст таблицы (пустая строка если команд не было)
+        """
+        with self._lock:
+            stages = list(self.stages.values())
+        if not stages:
+            return ''
+        
+        header = f"{'stage':<24} {'cmds':>5} {'wall':>9} {'cpu':>9} {'cpu%':>5} {'peak rss':>9} {'read':>8} {'write':>8}"
+        lines = [header, '-' * len(header)]
+        for usage in stages:
+            lines.append(
+                f"{usage.stage[:24]:<24} {usage.commands:>5} "
+                f"{usage.wall_time:>8.1f}s {usage.cpu_time:>8.1f}s "
+                f"{usage.cpu_share * 100:>4.0f}% "
+                f"{_format_bytes(usage.max_rss * 1024):>9} "
+                f"{_format_bytes(usage.read_bytes):>8} {_format_bytes(usage.write_bytes):>8}"
+            )
+        return '\n'.join(lines)
+    
+    def log_summary(self) -> None:
+        """Записать таблицу ресурсов по этапам в лог."""
+        table = self.format_table()
+        if not table:
+            return
+        logger.info("Resource usage by stage:")
+        for line in table.split('\n'):
+            logger.info(line)
+    
+    def reset(self) -> None:
+        """Очистить сводку."""
+        with self._lock:
+            self.stages.clear()
+
+# Глобальный сборщик
+accounting = ResourceAccounting()
+add_command_listener(accounting.record_command)
@@ -0,0 +1,182 @@
+"""
+Захват вывода команд с ограничением памяти.
+
+В памяти хранятся только начало и хвост вывода. Как только вывод
+превышает лимит, полный текст пишется во временный файл в CAPTURE_DIR,
+а середина из памяти выбрасывается. Так память не растет с размером
+вывода (большие транзакции pacman), а полный вывод упавшей команды
+остается в файле.
+
+Ограничение относится к выводу для лога и исключений. stdout, который
+run_command возвращает в обычном режиме, по-прежнему собирается в памяти
+целиком: вызывающий код его разбирает. Память ограничена для всей
+команды только в потоковом режиме (stream=True), где возвращается хвост.
+"""
+
+import os
+import re
+from collections import deque
+from typing import Optional, List, Deque
+from config import CAPTURE_DIR, CAPTURE_MEMORY_LIMIT
+from utils.lazy import lazy_module
+
+# Нужен только при переполнении буфера
+tempfile = lazy_module('tempfile')
+
+# Сколько строк начала и хвоста попадает в лог при ошибке
+EXCERPT_LINES = 20
+
+class CaptureBuffer:
+    """
+    Объединенный вывод одной команды: начало, хвост и файл с полным текстом.
+    
+    Используется как обработчик строк: buffer(line, stream).
+    """
+    
+    def __init__(
+        self,
+        label: str = 'command',
+        limit: int = CAPTURE_MEMORY_LIMIT,
+        spill_dir: str = CAPTURE_DIR
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            label: Метка для имени файла (обычно команда)
+            limit: Лимит памяти в символах (поровну на начало и хвост)
+            spill_dir: Каталог для файлов с полным выводом
+        """
+        self.label = label
+        self.spill_dir = spill_dir
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head: List[str] = []
+        self.tail: Deque[str] = deque()
+        self.head_size = 0
+        self.tail_size = 0
+        self.lines = 0
+        self.size = 0
+        self.omitted_lines = 0
+        self.path: Optional[str] = None
+        self.spill_error: Optional[str] = None
+        self._file = None
+    
+    def __call__(self, line: str, stream: str) -> None:
+        self.append(line)
+    
+    def __str__(self) -> str:
+        return self.text()
+    
+    def append(self, line: str) -> None:
+        """
+        Добавить строку вывода.
+        
+        Args:
+            line: Строка без перевода строки
+        """
+        size = len(line) + 1
+        self.lines += 1
+        self.size += size
+        
+        if self._file is not None:
+            self._file.write(line + '\n')
+        
+        if not self.tail and self.head_size + size <= self.head_limit:
+            self.head.append(line)
+            self.head_size += size
+            return
+        
+        self.tail.append(line)
+        self.tail_size += size
+        
+        while self.tail_size > self.tail_limit and len(self.tail) > 1:
+            if self._file is None and self.spill_error is None:
+                self._spill()
+            dropped = self.tail.popleft()
+            self.tail_size -= len(dropped) + 1
+            self.omitted_lines += 1
+    
+    def _spill(self) -> None:
+        """Открыть файл и записать в него весь вывод, накопленный в памяти."""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.label)[:40].strip('_') or 'command'
+            fd, self.path = tempfile.mkstemp(prefix=f"{name}-", suffix='.log', dir=self.spill_dir)
+            self._file = os.fdopen(fd, 'w', encoding='utf-8', errors='replace')
+            for line in self.head:
+                self._file.write(line + '\n')
+            for line in self.tail:
+                self._file.write(line + '\n')
+        except OSError as e:
+            # Без файла середина вывода просто теряется, память все равно ограничена
+            self.spill_error = str(e)
+            self.path = None
+            self._file = None
+    
+    def close(self, keep: bool = True) -> None:
+        """
+        Закрыть файл с полным выводом.
+        
+        Args:
+            keep: Оставить файл (иначе удалить, например для успешной команды)
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        
+        if not keep and self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+    
+    def _omitted(self, count: int) -> str:
+        """Строка-заглушка вместо пропущенных строк."""
+        where = f", full output: {self.path}" if self.path else ""
+        return f"... [{count} lines omitted{where}] ..."
+    
+    def preview(self, chars: int) -> str:
+        """
+        Начало вывода.
+        
+        Args:
+            chars: Максимум символов
+        
+        Returns:
+            Первые chars символов
+        """
+        parts = []
+        size = 0
+        for line in self.head:
+            if size >= chars:
+                break
+            parts.append(line)
+            size += len(line) + 1
+        return '\n'.join(parts)[:chars]
+    
+    def text(self) -> str:
+        """Вывод, хранящийся в памяти (начало и хвост)."""
+        parts = list(self.head)
+        if self.omitted_lines:
+            parts.append(self._omitted(self.omitted_lines))
+        parts.extend(self.tail)
+        return '\n'.join(parts)
+    
+    def excerpt(self, lines: int = EXCERPT_LINES) -> str:
+        """
+        Короткий отрывок для лога: первые и последние строки и путь к файлу.
+        
+        Args:
+            lines: Сколько строк взять из начала и из конца
+        
+        Returns:
+            Текст отрывка
+        """
+        kept = self.head + list(self.tail)
+        if len(kept) <= 2 * lines:
+            return self.text()
+        
+        omitted = self.lines - 2 * lines
+        return '\n'.join(kept[:lines] + [self._omitted(omitted)] + kept[-lines:])
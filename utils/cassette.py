@@ -0,0 +1,362 @@
+"""
+Запись и воспроизведение выполненных команд (кассета).
+
+В режиме записи каждая команда, выполненная через utils.executor,
+сохраняется в файл JSON Lines: команда, код возврата, stdout, stderr
+и длительность. В режиме воспроизведения результаты берутся из файла
+без запуска процессов - так полную установку можно прогнать без диска
+и сети и измерить накладные расходы самого установщика.
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Deque, List, Tuple, Any, Iterator
+from utils.logger import logger
+
+CASSETTE_VERSION = 1
+
+class CassetteEntry:
+    """Одна записанная команда."""
+    
+    def __init__(
+        self,
+        kind: str,
+        cmd: str,
+        returncode: int,
+        stdout: str = '',
+        stderr: str = '',
+        duration: float = 0.0,
+        timed_out: Optional[str] = None
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            kind: Тип выполнения ('command', 'chroot', 'async', 'write', 'session', 'netprobe')
+            cmd: Команда в строковом виде
+            returncode: Код возврата
+            stdout: Полный stdout
+            stderr: Полный stderr
+            duration: Длительность в секундах
+            timed_out: Причина остановки по таймауту ('deadline', 'stall') или None
+        """
+        self.kind = kind
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'kind': self.kind,
+            'cmd': self.cmd,
+            'returncode': self.returncode,
+            'stdout': self.stdout,
+            'stderr': self.stderr,
+            'duration': round(self.duration, 6),
+        }
+        if self.timed_out is not None:
+            data['timed_out'] = self.timed_out
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CassetteEntry':
+        return cls(
+            data['kind'],
+            data['cmd'],
+            data['returncode'],
+            data.get('stdout', ''),
+            data.get('stderr', ''),
+            data.get('duration', 0.0),
+            data.get('timed_out')
+        )
+
+class CassetteMiss(RuntimeError):
+    """Команды нет в кассете (установщик выполняет не то, что было записано)."""
+
+class Cassette:
+    """
+    Кассета с командами установки.
+    
+    Воспроизведение сопоставляет команды по (тип, текст команды) в порядке
+    записи, поэтому порядок параллельных команд не важен. Повторы одной и
+    той же команды отдаются по очереди.
+    """
+    
+    def __init__(self, path: str, mode: str, speed: float = 0.0, strict: bool = True):
+        """
+        Инициализация.
+        
+        Args:
+            path: Путь к файлу кассеты
+            mode: 'record' или 'replay'
+            speed: Скорость воспроизведения: 0 - без задержек,
+                   1.0 - с записанными задержками, 2.0 - вдвое быстрее
+            strict: При воспроизведении генерировать CassetteMiss для
+                    незаписанной команды (иначе вернуть код 0 без вывода)
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.strict = strict
+        self.issued = 0
+        self.misses: List[str] = []
+        self.delay = 0.0
+        self.recorded_duration = 0.0
+        self._entries: Dict[Tuple[str, str], Deque[CassetteEntry]] = {}
+        self._total_entries = 0
+        self._file = None
+        self._paused = 0
+        self._lock = threading.Lock()
+        self._opened = time.monotonic()
+    
+    @property
+    def recording(self) -> bool:
+        """True если идет запись (и она не приостановлена)."""
+        return self.mode == 'record' and self._file is not None and not self._paused
+    
+    @property
+    def replaying(self) -> bool:
+        """True если команды берутся из кассеты."""
+        return self.mode == 'replay'
+    
+    def open(self) -> 'Cassette':
+        """Открыть файл для записи или загрузить записанные команды."""
+        self._opened = time.monotonic()
+        
+        if self.mode == 'record':
+            self._file = open(self.path, 'w', encoding='utf-8')
+            header = {'version': CASSETTE_VERSION, 'created': datetime.now().isoformat()}
+            self._file.write(json.dumps(header) + '\n')
+            self._file.flush()
+            logger.info(f"Recording commands to cassette {self.path}")
+            return self
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline() or '{}')
+            if header.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version: {header.get('version')}")
+            
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = CassetteEntry.from_dict(json.loads(line))
+                self._entries.setdefault((entry.kind, entry.cmd), deque()).append(entry)
+                self._total_entries += 1
+        
+        logger.info(f"Replaying {self._total_entries} commands from cassette {self.path}")
+        return self
+    
+    def close(self) -> Dict[str, Any]:
+        """
+        Закрыть кассету.
+        
+        Returns:
+            Итоги (см. summary)
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        
+        summary = self.summary()
+        logger.info(f"Cassette {self.mode} summary: {json.dumps(summary)}")
+        return summary
+    
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Не записывать команды внутри блока (служебные действия)."""
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+    
+    def record(
+        self,
+        kind: str,
+        cmd: str,
+        returncode: int,
+        stdout: str = '',
+        stderr: str = '',
+        duration: float = 0.0,
+        timed_out: Optional[str] = None
+    ) -> None:
+        """
+        Записать выполненную команду.
+        
+        Args:
+            kind: Тип выполнения
+            cmd: Команда
+            returncode: Код возврата
+            stdout: Полный stdout
+            stderr: Полный stderr
+            duration: Длительность в секундах
+            timed_out: Причина остановки по таймауту
+        """
+        if not self.recording:
+            return
+        
+        entry = CassetteEntry(kind, cmd, returncode, stdout, stderr, duration, timed_out)
+        with self._lock:
+            # Построчная запись: кассета упавшей установки тоже пригодна
+            self._file.write(json.dumps(entry.to_dict(), ensure_ascii=False) + '\n')
+            self._file.flush()
+            self.issued += 1
+            self.recorded_duration += duration
+    
+    def replay(self, kind: str, cmd: str) -> CassetteEntry:
+        """
+        Взять результат следующего выполнения команды.
+        
+        Задержка не выполняется здесь: вызывающий код ждет replay_delay()
+        сам (time.sleep или asyncio.sleep).
+        
+        Args:
+            kind: Тип выполнения
+            cmd: Команда
+        
+        Returns:
+            Записанный результат
+        
+        Raises:
+            CassetteMiss: Если команды нет в кассете и strict=True
+        """
+        with self._lock:
+            self.issued += 1
+            queue = self._entries.get((kind, cmd))
+            if queue:
+                entry = queue.popleft()
+                self.recorded_duration += entry.duration
+                return entry
+            
+            self.misses.append(f"{kind}: {cmd}")
+        
+        logger.warning(f"Cassette miss ({kind}): {cmd}")
+        if self.strict:
+            raise CassetteMiss(f"Command not found in cassette: {cmd}")
+        return CassetteEntry(kind, cmd, 0)
+    
+    def replay_delay(self, entry: CassetteEntry) -> float:
+        """
+        Сколько ждать перед выдачей результата.
+        
+        Args:
+            entry: Результат из replay()
+        
+        Returns:
+            Задержка в секундах
+        """
+        if self.speed <= 0:
+            return 0.0
+        
+        delay = entry.duration / self.speed
+        with self._lock:
+            self.delay += delay
+        return delay
+    
+    def unused(self) -> List[str]:
+        """Записанные команды, которые так и не были выполнены."""
+        with self._lock:
+            return [
+                f"{kind}: {cmd}"
+                for (kind, cmd), queue in self._entries.items()
+                for _ in queue
+            ]
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Итоги записи или воспроизведения.
+        
+        overhead - время работы установщика без учета времени команд
+        (при воспроизведении - без учета искусственных задержек).
+        
+        Returns:
+            Словарь с итогами
+        """
+        wall = time.monotonic() - self._opened
+        summary = {
+            'mode': self.mode,
+            'path': self.path,
+            'commands': self.issued,
+            'recorded_duration': round(self.recorded_duration, 3),
+            'wall': round(wall, 3),
+        }
+        
+        if self.mode == 'record':
+            summary['overhead'] = round(max(0.0, wall - self.recorded_duration), 3)
+        else:
+            unused = self.unused()
+            summary.update({
+                'recorded_commands': self._total_entries,
+                'delay': round(self.delay, 3),
+                'overhead': round(max(0.0, wall - self.delay), 3),
+                'misses': self.misses,
+                'unused': unused,
+                'matched': not self.misses and not unused,
+            })
+        
+        return summary
+
+# Активная кассета
+_cassette_instance: Optional[Cassette] = None
+
+def get_cassette() -> Optional[Cassette]:
+    """Получить активную кассету (None если запись/воспроизведение выключены)."""
+    return _cassette_instance
+
+def start_recording(path: str) -> Cassette:
+    """
+    Начать запись всех команд в кассету.
+    
+    Args:
+        path: Путь к файлу кассеты
+    
+    Returns:
+        Кассета
+    """
+    global _cassette_instance
+    stop_cassette()
+    _cassette_instance = Cassette(path, 'record').open()
+    return _cassette_instance
+
+def start_replay(path: str, speed: float = 0.0, strict: bool = True) -> Cassette:
+    """
+    Начать воспроизведение команд из кассеты.
+    
+    Args:
+        path: Путь к файлу кассеты
+        speed: Скорость (0 - без задержек, 1.0 - реальное время)
+        strict: Ошибка на незаписанную команду
+    
+    Returns:
+        Кассета
+    """
+    global _cassette_instance
+    stop_cassette()
+    _cassette_instance = Cassette(path, 'replay', speed=speed, strict=strict).open()
+    return _cassette_instance
+
+def stop_cassette() -> Optional[Dict[str, Any]]:
+    """
+    Остановить запись/воспроизведение.
+    
+    Returns:
+        Итоги или None если кассета не была активна
+    """
+    global _cassette_instance
+    if _cassette_instance is None:
+        return None
+    
+    cassette, _cassette_instance = _cassette_instance, None
+    return cassette.close()
@@ -0,0 +1,212 @@
+"""
+Машиночитаемый журнал событий установки (JSON Lines).
+
+Рядом с текстовым /var/log/archinstall.log пишется
+/var/log/archinstall.events.jsonl: по одному JSON-объекту на строку.
+Каждое событие содержит монотонное время t (секунды от начала журнала),
+порядковый номер seq и тип event:
+
+    session_start - версия, хост, время начала по часам
+    stage_start / stage_end - этапы InstallationProgress (длительность,
+                  принято байт по сети за этап)
+    command     - каждая выполненная команда (длительность, код, ресурсы)
+    packages    - устанавливаемые пакеты (количество, источник)
+    error       - сообщения уровня ERROR из лога
+
+Сериализация в JSON и запись выполняются в фоновом потоке, как и для
+обычного лога (utils.log_writer). Файл открывается при первом событии.
+"""
+
+import os
+import json
+import atexit
+import queue
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+from config import EVENT_LOG_FILE, APP_VERSION
+from utils.logger import logger
+from utils.executor import CommandRecord, add_command_listener
+
+def _net_rx_bytes() -> Optional[int]:
+    """Принято байт всеми сетевыми интерфейсами, кроме lo (/proc/net/dev)."""
+    try:
+        with open('/proc/net/dev', 'r') as f:
+            lines = f.readlines()[2:]
+    except OSError:
+        return None
+    
+    total = 0
+    for line in lines:
+        name, _, counters = line.partition(':')
+        if name.strip() != 'lo' and counters.split():
+            total += int(counters.split()[0])
+    return total
+
+class _JsonFormatter(logging.Formatter):
+    """Форматер: сообщение записи - словарь события."""
+    
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+class _ErrorHandler(logging.Handler):
+    """Переносит сообщения уровня ERROR из основного лога в журнал событий."""
+    
+    def __init__(self, events: 'EventLog'):
+        super().__init__(logging.ERROR)
+        self.events = events
+    
+    def emit(self, record):
+        self.events.emit('error', message=record.getMessage(), source=record.module)
+
+class EventLog:
+    """Журнал событий установки."""
+    
+    def __init__(self, path: str = EVENT_LOG_FILE):
+        """
+        Инициализация.
+        
+        Args:
+            path: Путь к файлу JSON Lines
+        """
+        self.path = path
+        self.origin = time.monotonic()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._stage_rx: Optional[int] = None
+        # Итоги запуска для utils.history
+        self.stage_net_rx: Dict[str, int] = {}
+        self.package_count = 0
+        self._listener = None
+        self._error_handler: Optional[_ErrorHandler] = None
+        self._opened = False
+        # Свой логгер у каждого журнала (не из logging.getLogger): очередь
+        # записи одного журнала не подменяется другим
+        self._logger = logging.Logger('archinstall.events')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+    
+    def open(self) -> 'EventLog':
+        """Открыть файл и запустить фоновую запись (повторный вызов ничего не делает)."""
+        if self._opened:
+            return self
+        self._opened = True
+        
+        from utils.log_writer import BatchQueueListener, BufferedRotatingFileHandler, RawQueueHandler
+        try:
+            handler = BufferedRotatingFileHandler(self.path)
+        except OSError as e:
+            logger.warning(f"Event log disabled: {e}")
+            return self
+        handler.setFormatter(_JsonFormatter())
+        
+        log_queue = queue.SimpleQueue()
+        self._logger.handlers = [RawQueueHandler(log_queue)]
+        self._listener = BatchQueueListener(log_queue, handler)
+        self._listener.start()
+        self._error_handler = _ErrorHandler(self)
+        logger.addHandler(self._error_handler)
+        
+        self.emit(
+            'session_start',
+            version=APP_VERSION,
+            host=os.uname().nodename,
+            wall=datetime.now().isoformat()
+        )
+        return self
+    
+    def close(self) -> None:
+        """Записать оставшиеся события и закрыть файл."""
+        self.end_stage()
+        if self._listener is None:
+            return
+        
+        listener, self._listener = self._listener, None
+        logger.removeHandler(self._error_handler)
+        self._error_handler = None
+        self._logger.handlers = []
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    
+    def emit(self, event: str, **fields: Any) -> None:
+        """
+        Записать событие.
+        
+        Args:
+            event: Тип события
+            **fields: Поля события (значения должны сериализоваться в JSON)
+        """
+        if event == 'packages':
+            self.package_count += fields.get('count', 0)
+        if not self._opened:
+            self.open()
+        if self._listener is None:
+            return
+        
+        with self._lock:
+            self._seq += 1
+            data: Dict[str, Any] = {
+                't': round(time.monotonic() - self.origin, 6),
+                'seq': self._seq,
+                'event': event,
+            }
+        if self._stage is not None and 'stage' not in fields:
+            data['stage'] = self._stage
+        data.update(fields)
+        self._logger.info(data)
+    
+    def begin_stage(self, name: str, **fields: Any) -> None:
+        """
+        Начать этап (предыдущий этап завершается).
+        
+        Args:
+            name: Ключ этапа
+            **fields: Дополнительные поля события stage_start
+        """
+        self.end_stage()
+        self._stage = name
+        self._stage_started = time.monotonic()
+        self._stage_rx = _net_rx_bytes()
+        self.emit('stage_start', **fields)
+    
+    def end_stage(self) -> None:
+        """Завершить текущий этап, если он есть."""
+        if self._stage is None:
+            return
+        
+        fields: Dict[str, Any] = {'duration': round(time.monotonic() - self._stage_started, 6)}
+        rx = _net_rx_bytes()
+        if rx is not None and self._stage_rx is not None:
+            fields['net_rx_bytes'] = rx - self._stage_rx
+            self.stage_net_rx[self._stage] = fields['net_rx_bytes']
+        self.emit('stage_end', **fields)
+        self._stage = None
+    
+    def record_command(self, record: CommandRecord) -> None:
+        """
+        Записать выполненную команду (наблюдатель executor).
+        
+        Args:
+            record: Сведения о команде
+        """
+        fields: Dict[str, Any] = {
+            'kind': record.kind,
+            'cmd': record.cmd,
+            'returncode': record.returncode,
+            'duration': round(record.duration, 6),
+            'started': round(record.started - self.origin, 6),
+            'output_bytes': record.output_bytes,
+        }
+        if record.usage is not None:
+            fields['usage'] = record.usage.to_dict()
+        self.emit('command', **fields)
+
+# Глобальный журнал событий
+events = EventLog()
+add_command_listener(events.record_command)
+atexit.register(events.close)
@@ -2,80 +2,1543 @@
 Выполнение bash команд безопасно с логированием.
 """
 
+import os
+import re
+import time
+import threading
+import codecs
+import selectors
 import subprocess
 import shlex
-from typing import Tuple, Optional
+import signal
+from collections import deque
+from typing import Tuple, Optional, Callable, List, Deque, Dict, Iterable, Set, Union
+from contextlib import nullcontext
 from utils.logger import logger, log_command
+from utils.cassette import Cassette, get_cassette
+from utils.capture import CaptureBuffer
+from utils.resources import ResourceSampler, ResourceUsage, descendants
+from utils.qos import QOS_FOREGROUND, qos_prefix
+from utils.lazy import lazy_module
 
-def run_command(
+# Нужны только async-командам и chroot-сессии, не при каждом запуске
+asyncio = lazy_module('asyncio')
+uuid = lazy_module('uuid')
+hashlib = lazy_module('hashlib')
+from config import RESOURCE_ACCOUNTING
+
+# Обработчик строки вывода: handler(line, stream), stream - 'stdout' или 'stderr'
+LineHandler = Callable[[str, str], None]
+
+# Сколько последних строк stdout возвращается в потоковом режиме
+STREAM_TAIL_LINES = 50
+
+# Размер одного чтения из pipe
+_READ_CHUNK = 64 * 1024
+
+# Эскалация при таймауте: SIGTERM, через TERM_GRACE секунд SIGKILL,
+# через KILL_GRACE секунд после него перестать ждать вывод
+TERM_GRACE = 10.0
+KILL_GRACE = 5.0
+
+# Глобальные обработчики строк (логгер, парсер прогресса, трассировка)
+_line_handlers: List[LineHandler] = []
+
+class Cmd:
+    """
+    Команда в виде argv, выполняемая напрямую без /bin/sh.
+    
+    Не требует экранирования аргументов, stdin передается из процесса
+    установщика (вместо конвейеров вида "echo ... | chpasswd").
+    
+    Пример:
+        run_command(Cmd(['useradd', '-m', '-G', groups, username]))
+        run_in_chroot(Cmd(['chpasswd'], stdin=f"{user}:{password}"))
+    """
+    
+    def __init__(
+        self,
+        argv: List[str],
+        stdin: Optional[str] = None,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            argv: Программа и аргументы
+            stdin: Данные для stdin
+            cwd: Рабочий каталог
+            env: Дополнительные переменные окружения
+        """
+        if not argv:
+            raise ValueError("Cmd requires a non-empty argv")
+        self.argv = [str(arg) for arg in argv]
+        self.stdin = stdin
+        self.cwd = cwd
+        self.env = env
+    
+    def __str__(self) -> str:
+        """Строка для логов (stdin в нее не попадает)."""
+        return shlex.join(self.argv)
+    
+    def __repr__(self) -> str:
+        return f"Cmd({self.argv!r})"
+    
+    def env_argv(self) -> List[str]:
+        """
+        argv с cwd и env через env(1) - для выполнения в другом окружении
+        (chroot), где cwd/env процесса установщика неприменимы.
+        
+        Returns:
+            argv
+        """
+        prefix = []
+        if self.cwd or self.env:
+            prefix.append('env')
+            if self.cwd:
+                prefix.extend(['-C', self.cwd])
+            if self.env:
+                prefix.extend(f"{key}={value}" for key, value in self.env.items())
+        return prefix + self.argv
+
+# Команда: строка для shell или Cmd
+Command = Union[str, Cmd]
+
+def _popen_kwargs(
+    cmd: Command,
+    shell: bool,
+    qos: str = QOS_FOREGROUND
+) -> Tuple[dict, Optional[bytes]]:
+    """
+    Аргументы subprocess.Popen для команды.
+    
+    Returns:
+        (kwargs, данные для stdin)
+    """
+    prefix = qos_prefix(qos)
+    if isinstance(cmd, Cmd):
+        env = None
+        if cmd.env:
+            env = dict(os.environ)
+            env.update(cmd.env)
+        kwargs = {'args': prefix + cmd.argv, 'shell': False, 'cwd': cmd.cwd, 'env': env}
+        data = cmd.stdin.encode('utf-8') if cmd.stdin is not None else None
+    elif prefix:
+        argv = ['/bin/sh', '-c', cmd] if shell else shlex.split(cmd)
+        kwargs = {'args': prefix + argv, 'shell': False}
+        data = None
+    else:
+        kwargs = {'args': cmd if shell else shlex.split(cmd), 'shell': shell}
+        data = None
+    
+    kwargs['stdin'] = subprocess.PIPE if data is not None else subprocess.DEVNULL
+    kwargs['stdout'] = subprocess.PIPE
+    kwargs['stderr'] = subprocess.PIPE
+    return kwargs, data
+
+def _feed_stdin(proc: subprocess.Popen, data: Optional[bytes]) -> Optional[threading.Thread]:
+    """Передать данные в stdin процесса в фоне, чтобы не блокировать чтение вывода."""
+    if data is None:
+        return None
+    
+    def writer() -> None:
+        try:
+            proc.stdin.write(data)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    return thread
+
+class CommandTimeoutError(subprocess.TimeoutExpired):
+    """
+    Команда превысила дедлайн или слишком долго ничего не выводила
+    и была остановлена (SIGTERM, затем SIGKILL).
+    """
+    
+    def __init__(
+        self,
+        cmd: str,
+        timeout: float,
+        reason: str,
+        returncode: Optional[int] = None,
+        output: Optional[str] = None
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            cmd: Команда
+            timeout: Сработавший лимит в секундах
+            reason: 'deadline' или 'stall'
+            returncode: Код возврата остановленного процесса
+            output: Вывод команды до остановки
+        """
+        super().__init__(cmd, timeout, output=output)
+        self.reason = reason
+        self.returncode = returncode
+    
+    def __str__(self) -> str:
+        if self.reason == 'stall':
+            return f"Command '{self.cmd}' produced no output for {self.timeout} seconds"
+        return f"Command '{self.cmd}' timed out after {self.timeout} seconds"
+
+def _signal_tree(pid: int, sig: int, include_root: bool = True) -> None:
+    """
+    Послать сигнал процессу и всем его потомкам.
+    
+    Args:
+        pid: Корневой процесс
+        sig: Сигнал
+        include_root: Сигнал и самому корневому процессу
+    """
+    targets = descendants(pid)
+    if include_root:
+        targets.insert(0, pid)
+    
+    for target in targets:
+        try:
+            os.kill(target, sig)
+        except ProcessLookupError:
+            pass
+        except PermissionError as e:
+            logger.debug(f"Cannot signal process {target}: {e}")
+
+class _Watchdog:
+    """
+    Дедлайн и детектор зависания одной команды.
+    
+    Цикл чтения вывода вызывает activity() на каждую порцию данных и
+    check() при каждом пробуждении. При срабатывании процессу и его
+    потомкам посылается SIGTERM, через TERM_GRACE - SIGKILL.
+    """
+    
+    def __init__(
+        self,
+        cmd: str,
+        pid: int,
+        timeout: Optional[float],
+        stall_timeout: Optional[float],
+        include_root: bool = True
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            cmd: Команда (для лога)
+            pid: Процесс, дерево которого останавливается
+            timeout: Дедлайн на всю команду в секундах
+            stall_timeout: Максимум секунд без вывода
+            include_root: Останавливать и сам pid (False - только потомков)
+        """
+        now = time.monotonic()
+        self.cmd = cmd
+        self.pid = pid
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.include_root = include_root
+        self.deadline = now + timeout if timeout else None
+        self.last_activity = now
+        self.reason: Optional[str] = None
+        self._kill_at: Optional[float] = None
+        self._give_up_at: Optional[float] = None
+    
+    @property
+    def limit(self) -> Optional[float]:
+        """Сработавший лимит в секундах."""
+        return self.timeout if self.reason == 'deadline' else self.stall_timeout
+    
+    def activity(self) -> None:
+        """Команда что-то вывела."""
+        self.last_activity = time.monotonic()
+    
+    def next_wakeup(self) -> Optional[float]:
+        """Через сколько секунд нужно вызвать check() (None - не нужно)."""
+        now = time.monotonic()
+        moments = [self._kill_at, self._give_up_at]
+        if self.reason is None:
+            moments.append(self.deadline)
+            if self.stall_timeout:
+                moments.append(self.last_activity + self.stall_timeout)
+        
+        moments = [moment for moment in moments if moment is not None]
+        if not moments:
+            return None
+        return max(0.0, min(moments) - now)
+    
+    def check(self) -> bool:
+        """
+        Проверить лимиты и выполнить очередной шаг эскалации.
+        
+        Returns:
+            True если ждать вывод дальше бессмысленно
+        """
+        now = time.monotonic()
+        if self.reason is None:
+            if self.deadline is not None and now >= self.deadline:
+                self._fire('deadline')
+            elif self.stall_timeout and now - self.last_activity >= self.stall_timeout:
+                self._fire('stall')
+        elif self._kill_at is not None and now >= self._kill_at:
+            logger.warning(f"Command did not stop after SIGTERM, sending SIGKILL: {self.cmd}")
+            _signal_tree(self.pid, signal.SIGKILL, self.include_root)
+            self._kill_at = None
+            self._give_up_at = now + KILL_GRACE
+        
+        return self._give_up_at is not None and now >= self._give_up_at
+    
+    def _fire(self, reason: str) -> None:
+        self.reason = reason
+        what = 'deadline exceeded' if reason == 'deadline' else 'no output'
+        logger.warning(f"Command {what} ({self.limit}s), sending SIGTERM: {self.cmd}")
+        _signal_tree(self.pid, signal.SIGTERM, self.include_root)
+        self._kill_at = time.monotonic() + TERM_GRACE
+
+# Время жизни результата пробы по умолчанию (секунды)
+PROBE_TTL_DEFAULT = 30.0
+
+# Классы мутирующих команд: тег пробы -> программы, которые его инвалидируют.
+# Имя совпадает с программой целиком или как префикс "mkfs." у mkfs.ext4.
+MUTATION_CLASSES: Dict[str, List[str]] = {
+    'disk': ['sgdisk', 'parted', 'fdisk', 'cfdisk', 'sfdisk', 'wipefs',
+             'mkfs', 'mkswap', 'mount', 'umount', 'btrfs', 'partprobe',
+             'cryptsetup', 'swapon', 'swapoff'],
+    'packages': ['pacman', 'pacstrap', 'makepkg'],
+}
+
+class ProbeCache:
+    """
+    Кэш результатов read-only команд (lsblk, lspci, which, ...).
+    
+    Запись хранится до истечения TTL или до выполнения мутирующей команды
+    из класса, совпадающего с одним из тегов записи (см. MUTATION_CLASSES).
+    """
+    
+    def __init__(self):
+        """Инициализация пустого кэша."""
+        self._entries: Dict[str, Tuple[Optional[float], Set[str], Tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, cmd: str) -> Optional[Tuple[int, str]]:
+        """
+        Получить результат из кэша.
+        
+        Args:
+            cmd: Команда пробы
+        
+        Returns:
+            (returncode, output) или None если записи нет или она устарела
+        """
+        with self._lock:
+            entry = self._entries.get(cmd)
+            if entry is None:
+                return None
+            expires, _, result = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[cmd]
+                return None
+            return result
+    
+    def put(
+        self,
+        cmd: str,
+        result: Tuple[int, str],
+        ttl: Optional[float],
+        tags: Iterable[str] = ()
+    ) -> None:
+        """
+        Сохранить результат пробы.
+        
+        Args:
+            cmd: Команда пробы
+            result: (returncode, output)
+            ttl: Время жизни в секундах, None - до инвалидации
+            tags: Классы, при мутации которых запись сбрасывается
+        """
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[cmd] = (expires, set(tags), result)
+    
+    def invalidate(self, tags: Optional[Iterable[str]] = None) -> None:
+        """
+        Сбросить записи с указанными тегами (все записи если tags=None).
+        
+        Args:
+            tags: Теги для сброса
+        """
+        with self._lock:
+            if tags is None:
+                self._entries.clear()
+                return
+            tags = set(tags)
+            for cmd in [c for c, (_, t, _) in self._entries.items() if t & tags]:
+                del self._entries[cmd]
+    
+    def invalidate_for(self, cmd: str) -> None:
+        """
+        Сбросить записи, которые может изменить выполнение команды cmd.
+        
+        Args:
+            cmd: Выполняемая команда
+        """
+        if not self._entries:
+            return
+        tags = mutation_tags(cmd)
+        if tags:
+            logger.debug(f"Invalidating probes {sorted(tags)} after: {cmd[:80]}")
+            self.invalidate(tags)
+
+# Глобальный кэш проб
+probe_cache = ProbeCache()
+
+def mutation_tags(cmd: str) -> Set[str]:
+    """
+    Определить, какие классы проб может изменить команда.
+    
+    Проверка намеренно грубая: каждое слово команды сравнивается с
+    программами из MUTATION_CLASSES, лишняя инвалидация безопаснее
+    устаревшего результата.
+    
+    Args:
+        cmd: Команда
+    
+    Returns:
+        Множество тегов
+    """
+    words = {os.path.basename(w) for w in re.findall(r'[\w./+-]+', cmd)}
+    tags = set()
+    for tag, programs in MUTATION_CLASSES.items():
+        for word in words:
+            if any(word == p or word.startswith(p + '.') for p in programs):
+                tags.add(tag)
+                break
+    return tags
+
+def run_probe(
+    cmd: Command,
+    ttl: Optional[float] = PROBE_TTL_DEFAULT,
+    tags: Iterable[str] = ()
+) -> Tuple[int, str]:
+    """
+    Выполнить read-only команду с кэшированием результата.
+    
+    Повторный вызов в пределах TTL не запускает процесс. Запись сбрасывается
+    мутирующими командами соответствующего класса (см. MUTATION_CLASSES).
+    Пробы короткие, поэтому ресурсы для них не учитываются.
+    
+    Args:
+        cmd: Команда пробы (строка или Cmd)
+        ttl: Время жизни результата в секундах, None - до инвалидации
+        tags: Классы проб ('disk', 'packages', ...)
+    
+    Returns:
+        (returncode, output)
+    """
+    key = str(cmd)
+    cached = probe_cache.get(key)
+    if cached is not None:
+        logger.debug(f"Probe cache hit: {key}")
+        return cached
+    
+    result = run_command(cmd, check=False, log=False, accounting=False)
+    probe_cache.put(key, result, ttl, tags)
+    return result
+
+class CommandRecord:
+    """Сведения о выполненной команде для наблюдателей (трассировка и т.п.)."""
+    
+    def __init__(
+        self,
+        cmd: str,
+        pid: Optional[int],
+        returncode: Optional[int],
+        started: float,
+        duration: float,
+        output_bytes: int,
+        kind: str = 'command',
+        usage: Optional[ResourceUsage] = None
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            cmd: Команда
+            pid: PID процесса (для chroot-сессии - PID shell)
+            returncode: Код возврата
+            started: Время запуска по time.monotonic()
+            duration: Длительность в секундах
+            output_bytes: Объем вывода (stdout + stderr) в байтах
+            kind: 'command', 'chroot', 'async' или 'batch-step'
+            usage: Потребленные ресурсы (None если не измерялись)
+        """
+        self.cmd = cmd
+        self.pid = pid
+        self.returncode = returncode
+        self.started = started
+        self.duration = duration
+        self.output_bytes = output_bytes
+        self.kind = kind
+        self.usage = usage
+
+# Наблюдатели за выполненными командами
+CommandListener = Callable[[CommandRecord], None]
+_command_listeners: List[CommandListener] = []
+
+def add_command_listener(listener: CommandListener) -> None:
+    """
+    Зарегистрировать наблюдателя, получающего CommandRecord каждой команды.
+    
+    Args:
+        listener: Функция listener(record)
+    """
+    if listener not in _command_listeners:
+        _command_listeners.append(listener)
+
+def remove_command_listener(listener: CommandListener) -> None:
+    """
+    Удалить наблюдателя.
+    
+    Args:
+        listener: Ранее зарегистрированный наблюдатель
+    """
+    if listener in _command_listeners:
+        _command_listeners.remove(listener)
+
+def _notify_command(record: CommandRecord) -> None:
+    """Передать запись наблюдателям, не прерывая выполнение из-за их ошибок."""
+    for listener in list(_command_listeners):
+        try:
+            listener(record)
+        except Exception as e:
+            logger.debug(f"Command listener {listener!r} failed: {e}")
+
+def add_line_handler(handler: LineHandler) -> None:
+    """
+    Зарегистрировать глобальный обработчик строк потокового вывода.
+    
+    Args:
+        handler: Функция handler(line, stream)
+    """
+    if handler not in _line_handlers:
+        _line_handlers.append(handler)
+
+def remove_line_handler(handler: LineHandler) -> None:
+    """
+    Удалить глобальный обработчик строк.
+    
+    Args:
+        handler: Ранее зарегистрированный обработчик
+    """
+    if handler in _line_handlers:
+        _line_handlers.remove(handler)
+
+def _dispatch_line(line: str, stream: str, handlers: List[LineHandler]) -> None:
+    """Передать строку всем обработчикам, не прерывая команду из-за их ошибок."""
+    for handler in handlers:
+        try:
+            handler(line, stream)
+        except Exception as e:
+            logger.debug(f"Line handler {handler!r} failed: {e}")
+
+def _log_line(line: str, stream: str) -> None:
+    """Обработчик строк, пишущий вывод команды в лог по мере поступления."""
+    # Отложенное форматирование: строк много, а запись уходит в очередь
+    logger.debug("[%s] %s", stream, line)
+
+def _stream_handlers(log: bool, on_line: Optional[LineHandler]) -> List[LineHandler]:
+    """Обработчики строк потоковой команды: глобальные, лог и on_line."""
+    handlers = list(_line_handlers)
+    if log:
+        handlers.append(_log_line)
+    if on_line is not None:
+        handlers.append(on_line)
+    return handlers
+
+class _FullCapture:
+    """Полный stdout и stderr команды как есть (для записи в кассету)."""
+    
+    def __init__(self):
+        self.stdout: List[str] = []
+        self.stderr: List[str] = []
+    
+    def __call__(self, text: str, stream: str) -> None:
+        (self.stdout if stream == 'stdout' else self.stderr).append(text)
+    
+    def result(self) -> Tuple[str, str]:
+        """(stdout, stderr) текстом."""
+        return ''.join(self.stdout), ''.join(self.stderr)
+
+class _CommandOutput:
+    """
+    Сборщики вывода одной команды.
+    
+    stdout возвращается вызывающему коду целиком и без изменений
+    (обычный режим) или последними STREAM_TAIL_LINES строками (потоковый
+    режим). Текст без разбиения на строки приходит в on_text. Объединенный
+    вывод для лога и исключений хранится в CaptureBuffer с ограничением
+    памяти; в обычном режиме stdout_text при этом растет вместе с выводом.
+    """
+    
+    def __init__(self, label: str, stream: bool, record: bool):
+        """
+        Инициализация.
+        
+        Args:
+            label: Команда (для имени файла с полным выводом)
+            stream: Потоковый режим
+            record: Собирать полный вывод для кассеты
+        """
+        self.stream = stream
+        self.stdout_lines: Deque[str] = deque(maxlen=STREAM_TAIL_LINES)
+        self.stdout_text: List[str] = []
+        self.output = CaptureBuffer(label)
+        self.recorder = _FullCapture() if record else None
+    
+    def handlers(self) -> List[LineHandler]:
+        """Обработчики строк, наполняющие сборщики."""
+        handlers = [self.output]
+        if self.stream:
+            handlers.append(self._collect_stdout)
+        return handlers
+    
+    def _collect_stdout(self, line: str, stream: str) -> None:
+        if stream == 'stdout':
+            self.stdout_lines.append(line)
+    
+    def on_text(self, text: str, stream: str) -> None:
+        """Декодированный вывод как есть: stdout обычного режима и кассета."""
+        if stream == 'stdout' and not self.stream:
+            self.stdout_text.append(text)
+        if self.recorder is not None:
+            self.recorder(text, stream)
+    
+    def stdout(self) -> str:
+        """stdout для возврата из run_command."""
+        if self.stream:
+            return '\n'.join(self.stdout_lines)
+        return ''.join(self.stdout_text)
+    
+    def close(self, returncode: Optional[int]) -> None:
+        """Закрыть буфер: файл с полным выводом остается только при ошибке."""
+        self.output.close(keep=returncode != 0)
+
+def _replay_command(
+    cassette: Cassette,
+    kind: str,
     cmd: str,
+    handlers: List[LineHandler],
+    on_text: Optional[LineHandler] = None
+) -> Tuple[int, int, Optional[str]]:
+    """
+    Выдать результат команды из кассеты вместо запуска процесса.
+    
+    Строки вывода передаются обработчикам так же, как при реальном
+    выполнении (сначала stdout, затем stderr), весь текст - в on_text.
+    
+    Returns:
+        (returncode, байт вывода, причина таймаута или None)
+    """
+    entry = cassette.replay(kind, cmd)
+    delay = cassette.replay_delay(entry)
+    if delay:
+        time.sleep(delay)
+    
+    for line in entry.stdout.splitlines():
+        _dispatch_line(line, 'stdout', handlers)
+    for line in entry.stderr.splitlines():
+        _dispatch_line(line, 'stderr', handlers)
+    if on_text is not None:
+        on_text(entry.stdout, 'stdout')
+        on_text(entry.stderr, 'stderr')
+    
+    output_bytes = len(entry.stdout.encode('utf-8')) + len(entry.stderr.encode('utf-8'))
+    return entry.returncode, output_bytes, entry.timed_out
+
+def _pump_streams(
+    proc: subprocess.Popen,
+    handlers: List[LineHandler],
+    watchdog: Optional[_Watchdog] = None,
+    on_text: Optional[LineHandler] = None
+) -> int:
+    """
+    Читать stdout и stderr процесса по мере заполнения pipe.
+    
+    Каждая полная строка сразу передается обработчикам, сам вывод
+    здесь не накапливается.
+    
+    Args:
+        proc: Запущенный процесс с stdout/stderr=PIPE
+        handlers: Обработчики строк
+        watchdog: Дедлайн и детектор зависания
+        on_text: Получает декодированный текст как есть (без разбиения)
+    
+    Returns:
+        Количество прочитанных байт
+    """
+    selector = selectors.DefaultSelector()
+    pending = {}
+    decoders = {}
+    total_bytes = 0
+    
+    for name, pipe in (('stdout', proc.stdout), ('stderr', proc.stderr)):
+        selector.register(pipe, selectors.EVENT_READ, name)
+        pending[name] = ''
+        decoders[name] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    
+    try:
+        while selector.get_map():
+            wakeup = watchdog.next_wakeup() if watchdog is not None else None
+            for key, _ in selector.select(wakeup):
+                name = key.data
+                chunk = os.read(key.fileobj.fileno(), _READ_CHUNK)
+                
+                if not chunk:
+                    # EOF - отдать незавершенную последнюю строку
+                    selector.unregister(key.fileobj)
+                    tail = decoders[name].decode(b'', final=True)
+                    if tail and on_text is not None:
+                        on_text(tail, name)
+                    rest = pending[name] + tail
+                    if rest:
+                        _dispatch_line(rest, name, handlers)
+                    continue
+                
+                total_bytes += len(chunk)
+                if watchdog is not None:
+                    watchdog.activity()
+                text = decoders[name].decode(chunk)
+                if text and on_text is not None:
+                    on_text(text, name)
+                data = pending[name] + text
+                *lines, pending[name] = data.split('\n')
+                for line in lines:
+                    _dispatch_line(line, name, handlers)
+            
+            # Pipe может держать открытым отвязавшийся потомок - не ждать его вечно
+            if watchdog is not None and watchdog.check():
+                break
+    finally:
+        selector.close()
+    
+    return total_bytes
+
+def _run_process(
+    cmd: Command,
+    shell: bool,
+    handlers: List[LineHandler],
+    timeout: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    qos: str = QOS_FOREGROUND,
+    on_text: Optional[LineHandler] = None,
+    accounting: bool = RESOURCE_ACCOUNTING
+) -> Tuple[int, int, int, Optional[_Watchdog], Optional[ResourceUsage]]:
+    """
+    Запустить процесс и передать его вывод обработчикам строк
+    (и целиком - on_text).
+    
+    При accounting процесс ожидается через os.wait4, чтобы получить его rusage.
+    
+    Returns:
+        (pid, returncode, байт вывода, watchdog или None без лимитов,
+         ресурсы или None если учет выключен)
+    """
+    kwargs, data = _popen_kwargs(cmd, shell, qos)
+    with subprocess.Popen(**kwargs) as proc:
+        watchdog = None
+        if timeout or stall_timeout:
+            watchdog = _Watchdog(str(cmd), proc.pid, timeout, stall_timeout)
+        sampler = ResourceSampler(proc.pid).start() if accounting else None
+        writer = _feed_stdin(proc, data)
+        output_bytes = _pump_streams(proc, handlers, watchdog, on_text)
+        
+        usage = None
+        if sampler is not None:
+            # Последний опрос до wait4: после него /proc/<pid> исчезает
+            sampler.stop()
+            try:
+                _, status, rusage = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+            except ChildProcessError:
+                rusage = None
+            usage = sampler.usage(rusage)
+        returncode = proc.wait()
+        if writer is not None:
+            writer.join()
+    
+    return proc.pid, returncode, output_bytes, watchdog, usage
+
+def run_command(
+    cmd: Command,
     check: bool = True,
     log: bool = True,
-    shell: bool = True
+    shell: bool = True,
+    stream: bool = False,
+    on_line: Optional[LineHandler] = None,
+    timeout: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    qos: str = QOS_FOREGROUND,
+    accounting: Optional[bool] = None
 ) -> Tuple[int, str]:
     """
     Безопасное выполнение bash команды.
     
+    В потоковом режиме (stream=True) stdout и stderr читаются по мере
+    поступления и построчно передаются зарегистрированным обработчикам
+    (add_line_handler) и on_line, при log=True каждая строка сразу пишется
+    в лог. Возвращается только хвост stdout из STREAM_TAIL_LINES строк.
+    
+    Объединенный вывод (для лога и исключения) хранится в CaptureBuffer:
+    в памяти только начало и хвост, полный текст при превышении
+    CAPTURE_MEMORY_LIMIT пишется в файл в CAPTURE_DIR. Файл остается
+    только для упавших команд, путь к нему указывается в логе.
+    
+    Память команды ограничена только в потоковом режиме. В обычном режиме
+    возвращаемый stdout хранится в памяти целиком, поэтому команды с
+    большим выводом (транзакции pacman, makepkg) запускаются с stream=True.
+    
+    timeout ограничивает время всей команды, stall_timeout - время без
+    единой строки вывода. При срабатывании процесс и его потомки
+    получают SIGTERM, затем SIGKILL, и генерируется CommandTimeoutError
+    (независимо от check).
+    
+    qos задает класс приоритета (utils.qos): фоновые команды запускаются
+    через nice/ionice и, если есть systemd, в scope с низкими весами
+    CPU и I/O, чтобы не замедлять критический путь установки.
+    
+    Каждое выполнение передается наблюдателям (add_command_listener)
+    в виде CommandRecord. Ресурсы команды (utils.resources) в нем есть
+    только при включенном учете.
+    
+    Cmd выполняется напрямую через exec (параметр shell игнорируется),
+    его stdin передается из процесса установщика.
+    
+    При активной кассете (utils.cassette) команда записывается в нее или,
+    в режиме воспроизведения, не запускается вовсе.
+    
     Args:
-        cmd: Команда для выполнения
+        cmd: Команда для выполнения (строка или Cmd)
         check: Генерировать исключение при ошибке
         log: Логировать ли команду
-        shell: Выполнять через shell
+        shell: Выполнять строковую команду через shell
+        stream: Потоковый режим с построчными обработчиками
+        on_line: Дополнительный обработчик строк только для этой команды
+        timeout: Дедлайн на команду в секундах
+        stall_timeout: Максимум секунд без вывода
+        qos: Класс приоритета ('foreground', 'background', 'idle')
+        accounting: Учет ресурсов (None - RESOURCE_ACCOUNTING)
     
     Returns:
         (returncode, output)
     
     Raises:
         subprocess.CalledProcessError: Если check=True и команда вернула ошибку
+        CommandTimeoutError: Если команда остановлена по таймауту
     """
+    # Мутирующая команда делает недействительными соответствующие пробы
+    cmd_str = str(cmd)
+    probe_cache.invalidate_for(cmd_str)
+    
+    cassette = get_cassette()
+    collected = _CommandOutput(cmd_str, stream, cassette is not None and cassette.recording)
+    returncode = None
+    
     try:
-        if shell:
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False
+        started = time.monotonic()
+        handlers = _stream_handlers(log, on_line) if stream else []
+        handlers.extend(collected.handlers())
+        if cassette is not None and cassette.replaying:
+            pid = usage = None
+            returncode, output_bytes, timed_out = _replay_command(
+                cassette, 'command', cmd_str, handlers, collected.on_text
             )
         else:
-            result = subprocess.run(
-                shlex.split(cmd),
-                capture_output=True,
-                text=True,
-                check=False
+            pid, returncode, output_bytes, watchdog, usage = _run_process(
+                cmd, shell, handlers, timeout, stall_timeout, qos, collected.on_text,
+                RESOURCE_ACCOUNTING if accounting is None else accounting
+            )
+            timed_out = watchdog.reason if watchdog is not None else None
+        duration = time.monotonic() - started
+        
+        if collected.recorder is not None:
+            cassette.record(
+                'command', cmd_str, returncode, *collected.recorder.result(), duration,
+                timed_out=timed_out
             )
         
-        output = result.stdout + result.stderr
+        probe_cache.invalidate_for(cmd_str)
+        _notify_command(CommandRecord(
+            cmd_str, pid, returncode, started, duration, output_bytes, usage=usage
+        ))
         
         if log:
-            log_command(cmd, output, result.returncode)
+            log_command(cmd_str, collected.output, returncode)
+        
+        if timed_out is not None:
+            raise CommandTimeoutError(
+                cmd_str,
+                timeout if timed_out == 'deadline' else stall_timeout,
+                timed_out,
+                returncode,
+                output=collected.output.text()
+            )
         
-        if check and result.returncode != 0:
+        if check and returncode != 0:
             raise subprocess.CalledProcessError(
-                result.returncode,
-                cmd,
-                output=output
+                returncode,
+                cmd_str,
+                output=collected.output.text()
             )
         
-        return result.returncode, result.stdout
+        return returncode, collected.stdout()
     
     except Exception as e:
-        logger.error(f"Failed to execute command '{cmd}': {str(e)}")
+        logger.error(f"Failed to execute command '{cmd_str}': {str(e)}")
         raise
+    
+    finally:
+        collected.close(returncode)
+
+# Файловые системы, которые монтирует arch-chroot: (путь в target, тип, источник, опции)
+_CHROOT_MOUNTS = [
+    ('proc', 'proc', 'proc', 'nosuid,noexec,nodev'),
+    ('sys', 'sysfs', 'sys', 'nosuid,noexec,nodev,ro'),
+    ('sys/firmware/efi/efivars', 'efivarfs', 'efivarfs', 'nosuid,noexec,nodev'),
+    ('dev', 'devtmpfs', 'udev', 'mode=0755,nosuid'),
+    ('dev/pts', 'devpts', 'devpts', 'mode=0620,gid=5,nosuid,noexec'),
+    ('dev/shm', 'tmpfs', 'shm', 'mode=1777,nosuid,nodev'),
+    ('run', 'tmpfs', 'run', 'nosuid,nodev,mode=0755'),
+    ('tmp', 'tmpfs', 'tmp', 'mode=1777,strictatime,nodev,nosuid'),
+]
+
+# Активные chroot-сессии по точке монтирования
+_chroot_sessions: Dict[str, 'ChrootSession'] = {}
+
+class ChrootSession:
+    """
+    Долгоживущая shell-сессия внутри устанавливаемой системы.
+    
+    Служебные файловые системы (proc, sys, dev, run, ...) монтируются один
+    раз на всю установку, а команды выполняются одним процессом bash внутри
+    chroot вместо нового arch-chroot на каждую команду.
+    
+    Протокол: каждая команда выполняется в подоболочке, после нее bash
+    печатает в stdout строку "<marker> <returncode>", а в stderr строку
+    "<marker>". Маркер уникален для сессии, поэтому вывод и код возврата
+    каждой команды отделяются надежно.
+    """
+    
+    def __init__(self, mount_point: str = '/mnt'):
+        """
+        Инициализация.
+        
+        Args:
+            mount_point: Точка монтирования системы
+        """
+        self.mount_point = mount_point
+        self.proc: Optional[subprocess.Popen] = None
+        self._mounts: List[str] = []
+        self._marker = f"__archinstall_{uuid.uuid4().hex}__"
+        # Воспроизведение из кассеты: shell не запускается
+        self._replaying = False
+    
+    def __enter__(self) -> 'ChrootSession':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    @property
+    def active(self) -> bool:
+        """True если shell внутри chroot запущен и жив."""
+        if self._replaying:
+            return True
+        return self.proc is not None and self.proc.poll() is None
+    
+    def start(self) -> None:
+        """Смонтировать служебные ФС и запустить shell внутри chroot."""
+        if self.active:
+            return
+        
+        logger.info(f"Starting chroot session in {self.mount_point}")
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            cassette.replay('session', f"start {self.mount_point}")
+            self._replaying = True
+            _chroot_sessions[self.mount_point] = self
+            return
+        
+        # Монтирование - часть жизненного цикла сессии, в кассету пишется
+        # только сам факт старта
+        with cassette.paused() if cassette is not None else nullcontext():
+            self._mount_api_filesystems()
+        
+        try:
+            self.proc = subprocess.Popen(
+                ['chroot', self.mount_point, '/bin/bash', '--noprofile', '--norc'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except Exception:
+            self._unmount_api_filesystems()
+            raise
+        
+        if cassette is not None:
+            cassette.record('session', f"start {self.mount_point}", 0)
+        _chroot_sessions[self.mount_point] = self
+    
+    def close(self) -> None:
+        """Завершить shell и размонтировать служебные ФС."""
+        if _chroot_sessions.get(self.mount_point) is self:
+            del _chroot_sessions[self.mount_point]
+        
+        cassette = get_cassette()
+        if self._replaying:
+            self._replaying = False
+            if cassette is not None and cassette.replaying:
+                cassette.replay('session', f"close {self.mount_point}")
+            logger.info(f"Chroot session in {self.mount_point} closed")
+            return
+        
+        if self.proc is None and not self._mounts:
+            return
+        
+        if self.proc is not None:
+            try:
+                if self.proc.poll() is None:
+                    self.proc.stdin.write(b"exit 0\n")
+                    self.proc.stdin.flush()
+                self.proc.communicate(timeout=10)
+            except Exception as e:
+                logger.warning(f"Chroot shell did not exit cleanly: {e}")
+                self.proc.kill()
+                self.proc.wait()
+            self.proc = None
+        
+        with cassette.paused() if cassette is not None else nullcontext():
+            self._unmount_api_filesystems()
+        if cassette is not None:
+            cassette.record('session', f"close {self.mount_point}", 0)
+        logger.info(f"Chroot session in {self.mount_point} closed")
+    
+    def run(
+        self,
+        cmd: Command,
+        check: bool = True,
+        log: bool = True,
+        stream: bool = False,
+        on_line: Optional[LineHandler] = None,
+        input: Optional[str] = None,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        qos: str = QOS_FOREGROUND
+    ) -> Tuple[int, str]:
+        """
+        Выполнить команду в сессии.
+        
+        Cmd передается shell сессии в экранированном виде, его stdin
+        используется вместо input.
+        
+        По таймауту останавливаются только процессы команды, shell сессии
+        продолжает работать.
+        
+        Args:
+            cmd: Команда (shell-синтаксис или Cmd)
+            check: Генерировать исключение при ошибке
+            log: Логировать ли команду
+            stream: Потоковый режим (см. run_command)
+            on_line: Дополнительный обработчик строк
+            input: Данные для stdin команды
+            timeout: Дедлайн на команду в секундах
+            stall_timeout: Максимум секунд без вывода
+            qos: Класс приоритета (только nice/ionice, без cgroup)
+        
+        Returns:
+            (returncode, output)
+        
+        Raises:
+            subprocess.CalledProcessError: Если check=True и команда вернула ошибку
+            CommandTimeoutError: Если команда остановлена по таймауту
+            RuntimeError: Если shell сессии завершился
+        """
+        if not self.active:
+            raise RuntimeError(f"Chroot session in {self.mount_point} is not running")
+        
+        prefix = qos_prefix(qos, chroot=True)
+        if isinstance(cmd, Cmd):
+            if cmd.stdin is not None:
+                input = cmd.stdin
+            script = shlex.join(prefix + cmd.env_argv())
+            cmd = str(cmd)
+        elif prefix:
+            script = shlex.join(prefix + ['bash', '-c', cmd])
+        else:
+            script = cmd
+        
+        cassette = get_cassette()
+        collected = _CommandOutput(cmd, stream, cassette is not None and cassette.recording)
+        handlers = _stream_handlers(log, on_line) if stream else []
+        handlers.extend(collected.handlers())
+        returncode = None
+        
+        try:
+            started = time.monotonic()
+            if self._replaying:
+                pid = usage = None
+                returncode, output_bytes, timed_out = _replay_command(
+                    cassette, 'chroot', cmd, handlers, collected.on_text
+                )
+            else:
+                pid = self.proc.pid
+                sampler = None
+                if RESOURCE_ACCOUNTING:
+                    # Ресурсы команды - прирост счетчиков shell сессии
+                    sampler = ResourceSampler(pid, include_root=False).start()
+                self.proc.stdin.write(self._frame(script, input).encode('utf-8'))
+                self.proc.stdin.flush()
+                watchdog = None
+                if timeout or stall_timeout:
+                    # Потомки shell сессии - это процессы текущей команды
+                    watchdog = _Watchdog(cmd, pid, timeout, stall_timeout, include_root=False)
+                try:
+                    returncode, output_bytes = self._read_frame(handlers, watchdog, collected.on_text)
+                finally:
+                    if sampler is not None:
+                        sampler.stop()
+                usage = sampler.usage() if sampler is not None else None
+                timed_out = watchdog.reason if watchdog is not None else None
+            duration = time.monotonic() - started
+            
+            if collected.recorder is not None:
+                cassette.record(
+                    'chroot', cmd, returncode, *collected.recorder.result(), duration,
+                    timed_out=timed_out
+                )
+            
+            _notify_command(CommandRecord(
+                cmd, pid, returncode, started, duration, output_bytes,
+                kind='chroot', usage=usage
+            ))
+            
+            if log:
+                log_command(f"[chroot] {cmd}", collected.output, returncode)
+            
+            if timed_out is not None:
+                raise CommandTimeoutError(
+                    cmd,
+                    timeout if timed_out == 'deadline' else stall_timeout,
+                    timed_out,
+                    returncode,
+                    output=collected.output.text()
+                )
+            
+            if check and returncode != 0:
+                raise subprocess.CalledProcessError(
+                    returncode, cmd, output=collected.output.text()
+                )
+            
+            return returncode, collected.stdout()
+        
+        finally:
+            collected.close(returncode)
+    
+    def _frame(self, cmd: str, input: Optional[str]) -> str:
+        """Сформировать текст для shell: команда и маркеры завершения."""
+        if input is None:
+            redirect = " </dev/null\n"
+        else:
+            if not input.endswith('\n'):
+                input += '\n'
+            redirect = f" <<'{self._marker}'\n{input}{self._marker}\n"
+        
+        return (
+            f"( {cmd}\n){redirect}"
+            f"printf '\\n%s %d\\n' '{self._marker}' \"$?\"\n"
+            f"printf '\\n%s\\n' '{self._marker}' >&2\n"
+        )
+    
+    def _read_frame(
+        self,
+        handlers: List[LineHandler],
+        watchdog: Optional[_Watchdog] = None,
+        on_text: Optional[LineHandler] = None
+    ) -> Tuple[int, int]:
+        """
+        Прочитать вывод одной команды до маркеров в stdout и stderr.
+        
+        on_text получает вывод команды как есть: строка перед маркером
+        передается без перевода строки, который добавил протокол.
+        
+        Returns:
+            (код возврата команды, байт вывода)
+        
+        Raises:
+            RuntimeError: Если shell сессии завершился или не вернул маркеры
+                          после остановки команды
+        """
+        selector = selectors.DefaultSelector()
+        pending = {}
+        decoders = {}
+        # Каждая строка придерживается до прихода следующей: пустая строка
+        # прямо перед маркером добавлена самим протоколом
+        held: Dict[str, Optional[str]] = {}
+        returncode = None
+        total_bytes = 0
+        
+        for name, pipe in (('stdout', self.proc.stdout), ('stderr', self.proc.stderr)):
+            selector.register(pipe, selectors.EVENT_READ, name)
+            pending[name] = ''
+            decoders[name] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            held[name] = None
+        
+        try:
+            while selector.get_map():
+                wakeup = watchdog.next_wakeup() if watchdog is not None else None
+                for key, _ in selector.select(wakeup):
+                    name = key.data
+                    chunk = os.read(key.fileobj.fileno(), _READ_CHUNK)
+                    if not chunk:
+                        raise RuntimeError("Chroot session shell terminated unexpectedly")
+                    
+                    total_bytes += len(chunk)
+                    if watchdog is not None:
+                        watchdog.activity()
+                    data = pending[name] + decoders[name].decode(chunk)
+                    *lines, pending[name] = data.split('\n')
+                    
+                    for line in lines:
+                        if line.startswith(self._marker):
+                            if held[name]:
+                                _dispatch_line(held[name], name, handlers)
+                                if on_text is not None:
+                                    on_text(held[name], name)
+                            held[name] = None
+                            if name == 'stdout':
+                                returncode = int(line.split()[1])
+                            selector.unregister(key.fileobj)
+                            break
+                        if held[name] is not None:
+                            _dispatch_line(held[name], name, handlers)
+                            if on_text is not None:
+                                on_text(held[name] + '\n', name)
+                        held[name] = line
+                
+                if watchdog is not None and watchdog.check():
+                    # Протокол рассинхронизирован - сессией больше пользоваться нельзя
+                    self.proc.kill()
+                    raise RuntimeError("Chroot session shell did not finish a stopped command")
+        finally:
+            selector.close()
+        
+        return returncode, total_bytes
+    
+    def _mount_api_filesystems(self) -> None:
+        """Смонтировать proc, sys, dev, run и tmp в target."""
+        try:
+            for target, fstype, source, options in _CHROOT_MOUNTS:
+                if target.startswith('sys/firmware/efi') and not os.path.isdir(f"/{target}"):
+                    continue
+                path = os.path.join(self.mount_point, target)
+                os.makedirs(path, exist_ok=True)
+                run_command(
+                    Cmd(['mount', '-t', fstype, source, path, '-o', options]),
+                    check=True,
+                    log=True
+                )
+                self._mounts.append(path)
+            
+            # DNS из live-окружения, как это делает arch-chroot
+            if os.path.exists('/etc/resolv.conf'):
+                resolv = os.path.join(self.mount_point, 'etc/resolv.conf')
+                if os.path.exists(resolv) or os.path.islink(resolv):
+                    run_command(Cmd(['mount', '--bind', '/etc/resolv.conf', resolv]), check=True, log=True)
+                    self._mounts.append(resolv)
+        except Exception:
+            self._unmount_api_filesystems()
+            raise
+    
+    def _unmount_api_filesystems(self) -> None:
+        """Размонтировать служебные ФС в обратном порядке."""
+        while self._mounts:
+            path = self._mounts.pop()
+            returncode, _ = run_command(Cmd(['umount', path]), check=False, log=True)
+            if returncode != 0:
+                run_command(Cmd(['umount', '-l', path]), check=False, log=True)
+
+class BatchStep:
+    """Шаг пакета команд с результатом выполнения."""
+    
+    def __init__(self, cmd: str, description: str = ''):
+        """
+        Инициализация.
+        
+        Args:
+            cmd: Команда (shell-синтаксис)
+            description: Описание шага для лога
+        """
+        self.cmd = cmd
+        self.description = description
+        self.returncode: Optional[int] = None
+        self.started: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.output = ''
+    
+    def __repr__(self) -> str:
+        return f"BatchStep({self.cmd!r}, returncode={self.returncode}, duration={self.duration})"
 
-def run_in_chroot(cmd: str, mount_point: str = '/mnt') -> Tuple[int, str]:
+class CommandBatchError(subprocess.CalledProcessError):
+    """Ошибка пакета команд с указанием упавшего шага."""
+    
+    def __init__(self, step: BatchStep, steps: List[BatchStep]):
+        super().__init__(step.returncode, step.cmd, output=step.output)
+        self.step = step
+        self.steps = steps
+
+class CommandBatch:
+    """
+    Пакет последовательных shell-команд, выполняемых одним процессом.
+    
+    Шаги собираются в один скрипт bash с "set -e" вместо отдельного
+    /bin/sh на каждую команду. Перед каждым шагом скрипт печатает маркер,
+    по моменту прихода маркеров считается время шага, а вывод
+    распределяется по шагам. При ошибке скрипт останавливается, и
+    исключение указывает на упавший шаг.
+    
+    Пример:
+        with CommandBatch('mount') as batch:
+            batch.add("mkdir -p /mnt")
+            batch.add(f"mount {root} /mnt")
+    """
+    
+    def __init__(self, name: str = 'batch', check: bool = True, log: bool = True):
+        """
+        Инициализация.
+        
+        Args:
+            name: Имя пакета для лога
+            check: Генерировать исключение при ошибке шага
+            log: Логировать ли шаги
+        """
+        self.name = name
+        self.check = check
+        self.log = log
+        self.steps: List[BatchStep] = []
+    
+    @property
+    def _marker(self) -> str:
+        """
+        Маркер шагов.
+        
+        Зависит только от содержимого пакета, поэтому скрипт одинаков при
+        записи и воспроизведении кассеты, а в обычном выводе не встречается.
+        """
+        content = '\n'.join([self.name] + [step.cmd for step in self.steps])
+        return f"__archinstall_batch_{hashlib.sha1(content.encode('utf-8')).hexdigest()}__"
+    
+    def __enter__(self) -> 'CommandBatch':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Если внутри блока возникло исключение - пакет не выполнять
+        if exc_type is None:
+            self.run()
+    
+    def add(self, cmd: Command, description: str = '') -> 'CommandBatch':
+        """
+        Добавить шаг.
+        
+        Args:
+            cmd: Команда (shell-синтаксис или Cmd без stdin)
+            description: Описание шага для лога
+        
+        Returns:
+            Этот же пакет
+        """
+        if isinstance(cmd, Cmd):
+            if cmd.stdin is not None:
+                raise ValueError("CommandBatch steps cannot take stdin")
+            cmd = shlex.join(cmd.env_argv())
+        self.steps.append(BatchStep(cmd, description))
+        return self
+    
+    def script(self) -> str:
+        """Собрать текст скрипта со всеми шагами."""
+        lines = [
+            "exec 2>&1",
+            f"trap 'printf \"\\n%s end %s\\n\" {self._marker} \"$?\"' EXIT",
+            "set -e",
+        ]
+        for index, step in enumerate(self.steps):
+            lines.append(f"printf '\\n%s step %d\\n' {self._marker} {index}")
+            lines.append(step.cmd)
+        return '\n'.join(lines) + '\n'
+    
+    def run(self) -> List[BatchStep]:
+        """
+        Выполнить все шаги одним процессом.
+        
+        Returns:
+            Список шагов с кодами возврата, временем и выводом
+        
+        Raises:
+            CommandBatchError: Если check=True и один из шагов упал
+        """
+        if not self.steps:
+            return self.steps
+        
+        current: Optional[BatchStep] = None
+        started = 0.0
+        buffer: Optional[CaptureBuffer] = None
+        # Строка придерживается до следующей: пустая строка прямо перед
+        # маркером добавлена самим printf
+        held: Optional[str] = None
+        
+        def close_step(returncode: int) -> None:
+            nonlocal held
+            if held:
+                buffer.append(held)
+            held = None
+            buffer.close(keep=returncode != 0)
+            current.output = buffer.text()
+            current.returncode = returncode
+            current.started = started
+            current.duration = time.monotonic() - started
+            _notify_command(CommandRecord(
+                current.cmd, None, returncode, started, current.duration,
+                buffer.size, kind='batch-step'
+            ))
+        
+        def on_line(line: str, stream: str) -> None:
+            nonlocal current, started, buffer, held
+            if not line.startswith(self._marker):
+                # До первого маркера приходит только пустая строка от printf
+                if current is not None:
+                    if held is not None:
+                        buffer.append(held)
+                    held = line
+                return
+            
+            _, kind, value = line.split()
+            if kind == 'step':
+                if current is not None:
+                    close_step(0)
+                current = self.steps[int(value)]
+                buffer = CaptureBuffer(current.cmd)
+                started = time.monotonic()
+            elif kind == 'end':
+                if current is not None:
+                    close_step(int(value))
+        
+        logger.debug(f"Running command batch '{self.name}' ({len(self.steps)} steps)")
+        returncode, _ = run_command(
+            f"bash -c {shlex.quote(self.script())}",
+            check=False,
+            log=False,
+            shell=False,
+            stream=True,
+            on_line=on_line
+        )
+        
+        # Процесс мог быть убит до маркера завершения
+        if current is not None and current.returncode is None:
+            close_step(returncode)
+        
+        failed = None
+        for step in self.steps:
+            if step.returncode is None:
+                continue
+            if self.log:
+                label = step.description or step.cmd
+                logger.debug(f"[{self.name}] {label}: {step.duration:.3f}s")
+                log_command(step.cmd, step.output, step.returncode)
+            if step.returncode != 0 and failed is None:
+                failed = step
+        
+        if failed is None and returncode != 0:
+            # Скрипт упал до первого шага
+            failed = self.steps[0]
+            failed.returncode = returncode
+        
+        if self.check and failed is not None:
+            raise CommandBatchError(failed, self.steps)
+        
+        return self.steps
+
+def get_chroot_session(mount_point: str = '/mnt') -> Optional[ChrootSession]:
+    """
+    Получить активную chroot-сессию для точки монтирования.
+    
+    Args:
+        mount_point: Точка монтирования системы
+    
+    Returns:
+        Активная сессия или None
+    """
+    session = _chroot_sessions.get(mount_point)
+    return session if session is not None and session.active else None
+
+def run_in_chroot(
+    cmd: Command,
+    mount_point: str = '/mnt',
+    check: bool = True,
+    log: bool = True,
+    stream: bool = False,
+    input: Optional[str] = None,
+    timeout: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    qos: str = QOS_FOREGROUND
+) -> Tuple[int, str]:
     """
     Выполнить команду в chroot окружении.
     
+    Если для mount_point открыта ChrootSession, команда выполняется в ней,
+    иначе через отдельный arch-chroot.
+    
     Args:
-        cmd: Команда для выполнения
+        cmd: Команда для выполнения (строка или Cmd)
         mount_point: Точка монтирования системы
+        check: Генерировать исключение при ошибке
+        log: Логировать ли команду
+        stream: Потоковый режим (см. run_command)
+        input: Данные для stdin команды
+        timeout: Дедлайн на команду в секундах
+        stall_timeout: Максимум секунд без вывода
+        qos: Класс приоритета (nice/ionice внутри chroot)
     
     Returns:
         (returncode, output)
+    
+    Raises:
+        CommandTimeoutError: Если команда остановлена по таймауту
     """
+    limits = {'timeout': timeout, 'stall_timeout': stall_timeout}
+    session = get_chroot_session(mount_point)
+    if session is not None:
+        return session.run(
+            cmd, check=check, log=log, stream=stream, input=input, qos=qos, **limits
+        )
+    
+    prefix = qos_prefix(qos, chroot=True)
+    if isinstance(cmd, Cmd):
+        stdin = input if input is not None else cmd.stdin
+        chroot_cmd = Cmd(['arch-chroot', mount_point, *prefix, *cmd.env_argv()], stdin=stdin)
+        return run_command(chroot_cmd, check=check, log=log, stream=stream, **limits)
+    
+    if prefix:
+        cmd = shlex.join(prefix + ['bash', '-c', cmd])
     full_cmd = f"arch-chroot {mount_point} {cmd}"
-    return run_command(full_cmd, check=True, log=True)
+    if input is not None:
+        full_cmd = f"printf '%s' {shlex.quote(input)} | {full_cmd}"
+    return run_command(full_cmd, check=check, log=log, stream=stream, **limits)
 
 def run_command_with_progress(cmd: str, description: str = "") -> Tuple[int, str]:
     """
@@ -93,6 +1556,138 @@ def run_command_with_progress(cmd: str, description: str = "") -> Tuple[int, str
     
     return run_command(cmd, check=True, log=True)
 
+async def async_run_command(
+    cmd: Command,
+    check: bool = True,
+    log: bool = True,
+    shell: bool = True,
+    qos: str = QOS_FOREGROUND
+) -> Tuple[int, str]:
+    """
+    Асинхронное выполнение команды (asyncio.create_subprocess_exec).
+    
+    Семантика та же, что у run_command: возвращается stdout, в лог
+    пишется объединенный вывод.
+    
+    Args:
+        cmd: Команда для выполнения (строка или Cmd)
+        check: Генерировать исключение при ошибке
+        log: Логировать ли команду
+        shell: Выполнять строковую команду через /bin/sh
+        qos: Класс приоритета (см. run_command)
+    
+    Returns:
+        (returncode, output)
+    
+    Raises:
+        subprocess.CalledProcessError: Если check=True и команда вернула ошибку
+    """
+    kwargs, data = _popen_kwargs(cmd, shell, qos)
+    argv = kwargs.pop('args')
+    if kwargs.pop('shell'):
+        argv = ['/bin/sh', '-c', argv]
+    cmd = str(cmd)
+    probe_cache.invalidate_for(cmd)
+    cassette = get_cassette()
+    
+    try:
+        started = time.monotonic()
+        if cassette is not None and cassette.replaying:
+            entry = cassette.replay('async', cmd)
+            delay = cassette.replay_delay(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            pid, returncode, stdout, stderr = None, entry.returncode, entry.stdout, entry.stderr
+        else:
+            proc = await asyncio.create_subprocess_exec(*argv, **kwargs)
+            stdout_bytes, stderr_bytes = await proc.communicate(data)
+            pid, returncode = proc.pid, proc.returncode
+            stdout = stdout_bytes.decode('utf-8', errors='replace')
+            stderr = stderr_bytes.decode('utf-8', errors='replace')
+        duration = time.monotonic() - started
+        
+        if cassette is not None:
+            cassette.record('async', cmd, returncode, stdout, stderr, duration)
+        
+        output = stdout + stderr
+        probe_cache.invalidate_for(cmd)
+        _notify_command(CommandRecord(
+            cmd, pid, returncode, started, duration,
+            len(output.encode('utf-8')), kind='async'
+        ))
+        
+        if log:
+            log_command(cmd, output, returncode)
+        
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode,
+                cmd,
+                output=output
+            )
+        
+        return returncode, stdout
+    
+    except Exception as e:
+        logger.error(f"Failed to execute command '{cmd}': {str(e)}")
+        raise
+
+async def gather_commands(
+    cmds: List[Command],
+    limit: int = 4,
+    check: bool = False,
+    log: bool = True,
+    shell: bool = True,
+    qos: str = QOS_FOREGROUND
+) -> List[Tuple[int, str]]:
+    """
+    Выполнить независимые команды параллельно, не более limit одновременно.
+    
+    Args:
+        cmds: Список команд
+        limit: Максимум одновременно запущенных процессов
+        check: Генерировать исключение при ошибке любой команды
+        log: Логировать ли команды
+        shell: Выполнять через /bin/sh
+        qos: Класс приоритета всех команд
+    
+    Returns:
+        Список (returncode, output) в порядке cmds
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    
+    async def run_one(cmd: Command) -> Tuple[int, str]:
+        async with semaphore:
+            return await async_run_command(cmd, check=check, log=log, shell=shell, qos=qos)
+    
+    return list(await asyncio.gather(*(run_one(cmd) for cmd in cmds)))
+
+def run_commands_parallel(
+    cmds: List[Command],
+    limit: int = 4,
+    check: bool = False,
+    log: bool = True,
+    shell: bool = True,
+    qos: str = QOS_FOREGROUND
+) -> List[Tuple[int, str]]:
+    """
+    Синхронная обертка над gather_commands для обычного (не async) кода.
+    
+    Args:
+        cmds: Список команд
+        limit: Максимум одновременно запущенных процессов
+        check: Генерировать исключение при ошибке любой команды
+        log: Логировать ли команды
+        shell: Выполнять через /bin/sh
+        qos: Класс приоритета всех команд
+    
+    Returns:
+        Список (returncode, output) в порядке cmds
+    """
+    return asyncio.run(
+        gather_commands(cmds, limit=limit, check=check, log=log, shell=shell, qos=qos)
+    )
+
 def command_exists(cmd: str) -> bool:
     """
     Проверить существует ли команда.
@@ -103,5 +1698,36 @@ def command_exists(cmd: str) -> bool:
     Returns:
         True если команда существует
     """
-    returncode, _ = run_command(f"which {cmd}", check=False, log=False)
+    returncode, _ = run_probe(Cmd(['which', cmd]), ttl=None, tags=('packages',))
     return returncode == 0
+
+def write_file(path: str, content: str, append: bool = False, log: bool = True) -> None:
+    """
+    Записать файл из процесса установщика (вместо "echo ... > file" и heredoc).
+    
+    При воспроизведении кассеты файл не записывается.
+    
+    Args:
+        path: Путь к файлу
+        content: Содержимое
+        append: Дописать в конец файла вместо перезаписи
+        log: Логировать ли запись
+    
+    Raises:
+        OSError: Если файл не удалось записать
+    """
+    if log:
+        logger.info(f"{'Appending to' if append else 'Writing'} {path} ({len(content)} bytes)")
+    
+    key = f"{'append' if append else 'write'} {path}"
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        cassette.replay('write', key)
+        return
+    
+    started = time.monotonic()
+    with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+        f.write(content)
+    
+    if cassette is not None:
+        cassette.record('write', key, 0, duration=time.monotonic() - started)
@@ -0,0 +1,420 @@
+"""
+История установок в SQLite.
+
+Каждый запуск установки дописывает в HISTORY_DB одну строку runs
+(выбранные профиль/DE/видеодрайвер, сводка железа, число пакетов,
+принятые по сети байты, итог) и строки stages с длительностью и
+ресурсами каждого этапа. На live-образе /var/log живет в памяти,
+поэтому в конце установки запуски дописываются в базу в /var/log
+целевой системы (save_to_target), а для сотен прогонов HISTORY_DB
+указывают на постоянный носитель (ARCHINSTALL_HISTORY_DB, --history-db).
+По накопленной истории main.py --history-report печатает перцентили
+длительности этапов по профилям и отмечает этапы последнего запуска,
+ставшие заметно медленнее предыдущих HISTORY_REGRESSION_RUNS запусков
+того же профиля.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+from config import (
+    config, APP_VERSION, HISTORY_DB, HISTORY_TARGET_DB, HISTORY_REGRESSION_RUNS,
+    HISTORY_REGRESSION_FACTOR, HISTORY_REGRESSION_MIN_SECONDS
+)
+from utils.logger import logger
+from utils.lazy import lazy_module
+from utils.tracing import tracer
+from utils.accounting import accounting
+from utils.events import events
+from utils.hwprobe import get_hardware_snapshot
+
+sqlite3 = lazy_module('sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    duration REAL NOT NULL,
+    success INTEGER NOT NULL,
+    error TEXT,
+    version TEXT,
+    profile TEXT,
+    desktop TEXT,
+    gpu_driver TEXT,
+    gpu_model TEXT,
+    bootloader TEXT,
+    is_uefi INTEGER,
+    packages INTEGER,
+    net_rx_bytes INTEGER,
+    hardware TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    duration REAL NOT NULL,
+    commands INTEGER,
+    cpu_s REAL,
+    read_bytes INTEGER,
+    write_bytes INTEGER,
+    net_rx_bytes INTEGER,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS runs_profile ON runs(profile, id);
+"""
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Перцентиль с линейной интерполяцией.
+    
+    Args:
+        values: Значения (непустой список)
+        percent: Перцентиль 0-100
+    
+    Returns:
+        Значение перцентиля
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def _hardware_summary() -> Dict[str, Any]:
+    """Сводка железа для записи в историю."""
+    summary = get_hardware_snapshot().to_dict()
+    summary['disk'] = config.disk
+    return summary
+
+class InstallHistory:
+    """Хранилище истории установок."""
+    
+    def __init__(self, path: str = HISTORY_DB):
+        """
+        Инициализация.
+        
+        Args:
+            path: Путь к файлу базы SQLite
+        """
+        self.path = path
+        self._started: Optional[datetime] = None
+        self._started_monotonic = 0.0
+    
+    def connect(self):
+        """
+        Открыть базу и создать таблицы.
+        
+        Returns:
+            Соединение sqlite3
+        """
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.executescript(SCHEMA)
+        return connection
+    
+    def start_run(self) -> None:
+        """Отметить начало установки."""
+        self._started = datetime.now()
+        self._started_monotonic = time.monotonic()
+    
+    def collect_stages(self) -> List[Dict[str, Any]]:
+        """
+        Этапы текущего запуска: длительность из трассы, ресурсы из
+        сводки accounting, сетевой трафик из журнала событий.
+        
+        Returns:
+            Список словарей в порядке выполнения этапов
+        """
+        usage = {stage['stage']: stage for stage in accounting.summary()}
+        stages = []
+        for name, duration in tracer.stage_durations():
+            stage_usage = usage.get(name, {})
+            stages.append({
+                'stage': name,
+                'duration': duration,
+                'commands': stage_usage.get('commands', 0),
+                'cpu_s': stage_usage.get('cpu_s', 0.0),
+                'read_bytes': stage_usage.get('read_bytes', 0),
+                'write_bytes': stage_usage.get('write_bytes', 0),
+                'net_rx_bytes': events.stage_net_rx.get(name),
+            })
+        return stages
+    
+    def record_run(self, success: bool, error: Optional[str] = None) -> Optional[int]:
+        """
+        Записать завершенный запуск установки.
+        
+        Args:
+            success: Установка завершилась успешно
+            error: Текст ошибки
+        
+        Returns:
+            id записи или None при ошибке
+        """
+        if self._started is None:
+            self.start_run()
+        stages = self.collect_stages()
+        net_rx = [stage['net_rx_bytes'] for stage in stages if stage['net_rx_bytes'] is not None]
+        
+        try:
+            connection = self.connect()
+            with connection:
+                cursor = connection.execute(
+                    'INSERT INTO runs (started, duration, success, error, version, profile, desktop, '
+                    'gpu_driver, gpu_model, bootloader, is_uefi, packages, net_rx_bytes, hardware) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        self._started.isoformat(timespec='seconds'),
+                        round(time.monotonic() - self._started_monotonic, 3),
+                        int(success),
+                        error,
+                        APP_VERSION,
+                        config.installation_profile,
+                        config.desktop_environment,
+                        config.gpu_driver,
+                        config.gpu_model,
+                        config.bootloader,
+                        int(config.is_uefi),
+                        events.package_count,
+                        sum(net_rx) if net_rx else None,
+                        json.dumps(_hardware_summary()),
+                    )
+                )
+                run_id = cursor.lastrowid
+                connection.executemany(
+                    'INSERT INTO stages (run_id, position, stage, duration, commands, cpu_s, '
+                    'read_bytes, write_bytes, net_rx_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (run_id, position, stage['stage'], stage['duration'], stage['commands'],
+                         stage['cpu_s'], stage['read_bytes'], stage['write_bytes'], stage['net_rx_bytes'])
+                        for position, stage in enumerate(stages)
+                    ]
+                )
+            connection.close()
+            logger.info(f"Installation run #{run_id} recorded in {self.path}")
+            return run_id
+        except Exception as e:
+            logger.warning(f"Failed to record installation history: {e}")
+            return None
+    
+    def merge_into(self, path: str) -> int:
+        """
+        Дописать в другую базу запуски, которых в ней еще нет.
+        
+        Запуск узнается по времени начала и длительности, id в целевой
+        базе назначаются заново.
+        
+        Args:
+            path: Путь к целевой базе (создается, если ее нет)
+        
+        Returns:
+            Количество скопированных запусков
+        """
+        if not os.path.exists(self.path) or os.path.abspath(path) == os.path.abspath(self.path):
+            return 0
+        
+        connection = InstallHistory(path).connect()
+        try:
+            connection.execute('ATTACH DATABASE ? AS source', (self.path,))
+            with connection:
+                rows = connection.execute(
+                    'SELECT * FROM source.runs AS s WHERE NOT EXISTS '
+                    '(SELECT 1 FROM main.runs AS r WHERE r.started = s.started AND r.duration = s.duration) '
+                    'ORDER BY s.id'
+                ).fetchall()
+                for row in rows:
+                    data = dict(row)
+                    source_id = data.pop('id')
+                    cursor = connection.execute(
+                        f"INSERT INTO main.runs ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+                        list(data.values())
+                    )
+                    connection.execute(
+                        'INSERT INTO main.stages SELECT ?, position, stage, duration, commands, cpu_s, '
+                        'read_bytes, write_bytes, net_rx_bytes FROM source.stages WHERE run_id = ?',
+                        (cursor.lastrowid, source_id)
+                    )
+        finally:
+            connection.close()
+        return len(rows)
+    
+    def save_to_target(self, mount_point: str = '/mnt') -> Optional[str]:
+        """
+        Дописать историю в /var/log установленной системы.
+        
+        Args:
+            mount_point: Точка монтирования системы
+        
+        Returns:
+            Путь к базе в целевой системе или None, если она не смонтирована
+            или запись не удалась
+        """
+        if not os.path.ismount(mount_point):
+            logger.debug(f"{mount_point} is not mounted, installation history stays in {self.path}")
+            return None
+        
+        path = os.path.join(mount_point, HISTORY_TARGET_DB)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            count = self.merge_into(path)
+            logger.info(f"Installation history: {count} runs copied to {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"Failed to copy installation history to {path}: {e}")
+            return None
+    
+    def stage_durations(
+        self,
+        profile: Optional[str],
+        before: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, List[float]]:
+        """
+        Длительности этапов успешных запусков профиля.
+        
+        Args:
+            profile: Профиль установки
+            before: Учитывать только запуски с id меньше этого
+            limit: Только последние limit запусков
+        
+        Returns:
+            Словарь этап -> список длительностей
+        """
+        query = 'SELECT id FROM runs WHERE success = 1 AND profile IS ?'
+        params: List[Any] = [profile]
+        if before is not None:
+            query += ' AND id < ?'
+            params.append(before)
+        query += ' ORDER BY id DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                f'SELECT stage, duration FROM stages WHERE run_id IN ({query}) ORDER BY run_id, position',
+                params
+            ).fetchall()
+        finally:
+            connection.close()
+        
+        durations: Dict[str, List[float]] = {}
+        for row in rows:
+            durations.setdefault(row['stage'], []).append(row['duration'])
+        return durations
+    
+    def find_regressions(
+        self,
+        run_id: int,
+        runs: int = HISTORY_REGRESSION_RUNS,
+        factor: float = HISTORY_REGRESSION_FACTOR,
+        min_seconds: float = HISTORY_REGRESSION_MIN_SECONDS
+    ) -> List[Dict[str, Any]]:
+        """
+        Этапы запуска, ставшие медленнее предыдущих запусков профиля.
+        
+        Этап считается регрессией, если он дольше медианы предыдущих
+        runs успешных запусков того же профиля в factor раз и при этом
+        хотя бы на min_seconds секунд (короткие этапы шумят).
+        
+        Args:
+            run_id: Проверяемый запуск
+            runs: Сколько предыдущих запусков брать за базу
+            factor: Порог отношения к медиане
+            min_seconds: Порог абсолютной разницы
+        
+        Returns:
+            Список {'stage', 'duration', 'median', 'ratio', 'runs'}
+        """
+        connection = self.connect()
+        try:
+            run = connection.execute('SELECT profile FROM runs WHERE id = ?', (run_id,)).fetchone()
+            current = connection.execute(
+                'SELECT stage, duration FROM stages WHERE run_id = ? ORDER BY position', (run_id,)
+            ).fetchall()
+        finally:
+            connection.close()
+        if run is None:
+            return []
+        
+        baseline = self.stage_durations(run['profile'], before=run_id, limit=runs)
+        regressions = []
+        for row in current:
+            previous = baseline.get(row['stage'])
+            if not previous:
+                continue
+            median = percentile(previous, 50)
+            if row['duration'] >= median * factor and row['duration'] - median >= min_seconds:
+                regressions.append({
+                    'stage': row['stage'],
+                    'duration': row['duration'],
+                    'median': median,
+                    'ratio': row['duration'] / median if median > 0 else float('inf'),
+                    'runs': len(previous),
+                })
+        return regressions
+    
+    def profiles(self) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Профили в истории.
+        
+        Returns:
+            Список (профиль, всего запусков, id последнего запуска)
+        """
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                'SELECT profile, COUNT(*) AS total, MAX(id) AS last FROM runs GROUP BY profile ORDER BY profile'
+            ).fetchall()
+        finally:
+            connection.close()
+        return [(row['profile'], row['total'], row['last']) for row in rows]
+
+def print_history_report(path: Optional[str] = None, runs: Optional[int] = None) -> bool:
+    """
+    Вывести отчет по истории установок.
+    
+    Args:
+        path: Путь к базе (None - HISTORY_DB)
+        runs: Сколько предыдущих запусков профиля брать для сравнения
+              (None - HISTORY_REGRESSION_RUNS)
+    
+    Returns:
+        True если у последних запусков профилей нет регрессий
+    """
+    path = path or HISTORY_DB
+    runs = runs or HISTORY_REGRESSION_RUNS
+    if not os.path.exists(path):
+        print(f"No installation history at {path}")
+        return True
+    
+    history = InstallHistory(path)
+    clean = True
+    for profile, total, last in history.profiles():
+        durations = history.stage_durations(profile)
+        print(f"Profile '{profile}': {total} runs, last #{last}")
+        print(f"  {'stage':<24} {'runs':>5} {'p50':>8} {'p90':>8} {'p95':>8} {'max':>8}")
+        for stage, values in durations.items():
+            print(
+                f"  {stage[:24]:<24} {len(values):>5} "
+                f"{percentile(values, 50):>7.1f}s {percentile(values, 90):>7.1f}s "
+                f"{percentile(values, 95):>7.1f}s {max(values):>7.1f}s"
+            )
+        
+        regressions = history.find_regressions(last, runs=runs)
+        for regression in regressions:
+            clean = False
+            print(
+                f"  REGRESSION in run #{last}: {regression['stage']} took {regression['duration']:.1f}s, "
+                f"median of previous {regression['runs']} runs {regression['median']:.1f}s "
+                f"(x{regression['ratio']:.1f})"
+            )
+        print()
+    return clean
+
+# Глобальная история
+history = InstallHistory()
@@ -0,0 +1,350 @@
+"""
+Пробы железа через procfs/sysfs без запуска процессов.
+
+/proc/cpuinfo, /proc/meminfo, /sys/firmware/efi, /sys/devices/system/cpu
+и /sys/class/dmi/id читаются и разбираются в самом процессе установщика
+один раз: результат - типизированный снимок HardwareSnapshot, который
+кэшируется (get_hardware_snapshot). Повторные вопросы о процессоре,
+памяти или режиме загрузки стоят обращения к атрибуту, а не запуска
+grep/cut/head.
+
+Все пути строятся от root, поэтому разбор можно проверить на копии
+дерева /proc и /sys.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Any, Set
+
+def _read(path: str) -> Optional[str]:
+    """Прочитать небольшой файл procfs/sysfs (None если нет или нет доступа)."""
+    try:
+        with open(path, 'r', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _read_value(path: str) -> Optional[str]:
+    """Значение из однострочного файла sysfs без пробелов по краям."""
+    text = _read(path)
+    if text is None:
+        return None
+    text = text.strip()
+    return text or None
+
+def parse_cpu_list(text: str) -> List[int]:
+    """
+    Разобрать список процессоров sysfs ("0-3,6,8-9").
+    
+    Args:
+        text: Содержимое online/present/possible
+    
+    Returns:
+        Номера процессоров
+    """
+    cpus: List[int] = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+def parse_cpuinfo(text: str) -> List[Dict[str, str]]:
+    """
+    Разобрать /proc/cpuinfo.
+    
+    Args:
+        text: Содержимое файла
+    
+    Returns:
+        Список словарей по логическим процессорам (ключи как в файле)
+    """
+    processors: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                processors.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition(':')
+        current[key.strip()] = value.strip()
+    if current:
+        processors.append(current)
+    return processors
+
+def parse_meminfo(text: str) -> Dict[str, int]:
+    """
+    Разобрать /proc/meminfo.
+    
+    Args:
+        text: Содержимое файла
+    
+    Returns:
+        Словарь поле -> значение в килобайтах (или штуках для HugePages_*)
+    """
+    values: Dict[str, int] = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            values[key.strip()] = int(parts[0])
+    return values
+
+class CpuInfo:
+    """Процессор: модель, флаги, топология."""
+    
+    def __init__(self, processors: List[Dict[str, str]], sys_cpu_dir: str):
+        """
+        Инициализация.
+        
+        Args:
+            processors: Результат parse_cpuinfo
+            sys_cpu_dir: Путь к /sys/devices/system/cpu
+        """
+        # На ARM Hardware/Model идут отдельным блоком после процессоров
+        common: Dict[str, str] = {}
+        for block in processors:
+            if 'processor' not in block:
+                common.update(block)
+        processors = [block for block in processors if 'processor' in block]
+        first = {**common, **processors[0]} if processors else common
+        # x86 - model name, ARM - Model/Hardware/Processor
+        self.brand = (
+            first.get('model name') or first.get('Model') or
+            first.get('Hardware') or first.get('Processor') or 'Unknown CPU'
+        )
+        self.vendor = first.get('vendor_id') or first.get('CPU implementer')
+        self.flags: Set[str] = set((first.get('flags') or first.get('Features') or '').split())
+        
+        online = _read_value(os.path.join(sys_cpu_dir, 'online'))
+        self.online = parse_cpu_list(online) if online else list(range(len(processors)))
+        self.logical = len(self.online) or os.cpu_count() or 1
+        
+        # Ядра и сокеты: topology в sysfs, иначе поля cpuinfo
+        cores = set()
+        packages = set()
+        for cpu in self.online:
+            topology = os.path.join(sys_cpu_dir, f"cpu{cpu}", 'topology')
+            core = _read_value(os.path.join(topology, 'core_id'))
+            package = _read_value(os.path.join(topology, 'physical_package_id'))
+            if core is None:
+                break
+            cores.add((package, core))
+            packages.add(package)
+        if not cores:
+            for processor in processors:
+                if 'core id' in processor:
+                    cores.add((processor.get('physical id'), processor['core id']))
+                    packages.add(processor.get('physical id'))
+        self.physical_cores = len(cores) or self.logical
+        self.sockets = len(packages) or 1
+        
+        max_freq = _read_value(os.path.join(sys_cpu_dir, 'cpu0', 'cpufreq', 'cpuinfo_max_freq'))
+        if max_freq and max_freq.isdigit():
+            self.max_mhz: Optional[float] = int(max_freq) / 1000
+        else:
+            mhz = first.get('cpu MHz')
+            self.max_mhz = float(mhz) if mhz else None
+    
+    @property
+    def virtualization(self) -> Optional[str]:
+        """Аппаратная виртуализация: 'vmx' (Intel), 'svm' (AMD) или None."""
+        for flag in ('vmx', 'svm'):
+            if flag in self.flags:
+                return flag
+        return None
+    
+    @property
+    def hypervisor(self) -> bool:
+        """True если установщик запущен в виртуальной машине."""
+        return 'hypervisor' in self.flags
+
+class MemoryInfo:
+    """Память и swap из /proc/meminfo."""
+    
+    def __init__(self, values: Dict[str, int]):
+        """
+        Инициализация.
+        
+        Args:
+            values: Результат parse_meminfo
+        """
+        self.total_kb = values.get('MemTotal', 0)
+        self.available_kb = values.get('MemAvailable', values.get('MemFree', 0))
+        self.swap_total_kb = values.get('SwapTotal', 0)
+        self.swap_free_kb = values.get('SwapFree', 0)
+    
+    @property
+    def total_gb(self) -> float:
+        """Общий объем RAM в GB."""
+        return self.total_kb / (1024 ** 2)
+    
+    @property
+    def available_gb(self) -> float:
+        """Доступный объем RAM в GB (на момент снимка)."""
+        return self.available_kb / (1024 ** 2)
+
+class FirmwareInfo:
+    """Режим загрузки."""
+    
+    def __init__(self, efi_dir: str):
+        """
+        Инициализация.
+        
+        Args:
+            efi_dir: Путь к /sys/firmware/efi
+        """
+        self.uefi = os.path.isdir(efi_dir)
+        # 32 на планшетах с 32-битным UEFI при 64-битном процессоре
+        size = _read_value(os.path.join(efi_dir, 'fw_platform_size')) if self.uefi else None
+        self.efi_bitness: Optional[int] = int(size) if size and size.isdigit() else None
+
+class DmiInfo:
+    """Производитель и модель машины из /sys/class/dmi/id."""
+    
+    FIELDS = (
+        'sys_vendor', 'product_name', 'product_version',
+        'board_vendor', 'board_name', 'bios_vendor', 'bios_version', 'chassis_type',
+    )
+    
+    def __init__(self, dmi_dir: str):
+        """
+        Инициализация.
+        
+        Args:
+            dmi_dir: Путь к /sys/class/dmi/id
+        """
+        for field in self.FIELDS:
+            setattr(self, field, _read_value(os.path.join(dmi_dir, field)))
+    
+    @property
+    def values(self) -> Dict[str, Optional[str]]:
+        """Все поля DMI."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+    
+    @property
+    def is_laptop(self) -> bool:
+        """Ноутбук по типу корпуса SMBIOS (8-10, 14 - portable/laptop/notebook/sub notebook)."""
+        return self.chassis_type in ('8', '9', '10', '14')
+
+class HardwareSnapshot:
+    """Снимок железа, собранный из procfs/sysfs за один проход."""
+    
+    def __init__(self, root: str = '/'):
+        """
+        Прочитать и разобрать все источники.
+        
+        Args:
+            root: Корень, от которого строятся пути /proc и /sys
+        """
+        self.root = root
+        self.cpu = CpuInfo(
+            parse_cpuinfo(_read(self._path('proc/cpuinfo')) or ''),
+            self._path('sys/devices/system/cpu')
+        )
+        self.memory = MemoryInfo(parse_meminfo(_read(self._path('proc/meminfo')) or ''))
+        self.firmware = FirmwareInfo(self._path('sys/firmware/efi'))
+        self.dmi = DmiInfo(self._path('sys/class/dmi/id'))
+        uname = os.uname()
+        self.platform = uname.machine
+        self.kernel = uname.release
+    
+    def _path(self, relative: str) -> str:
+        """Путь внутри root."""
+        return os.path.join(self.root, relative)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Снимок для логов и истории установок."""
+        return {
+            'cpu': {
+                'brand': self.cpu.brand,
+                'vendor': self.cpu.vendor,
+                'logical': self.cpu.logical,
+                'physical_cores': self.cpu.physical_cores,
+                'sockets': self.cpu.sockets,
+                'max_mhz': self.cpu.max_mhz,
+                'virtualization': self.cpu.virtualization,
+                'hypervisor': self.cpu.hypervisor,
+            },
+            'memory_gb': round(self.memory.total_gb, 2),
+            'swap_gb': round(self.memory.swap_total_kb / (1024 ** 2), 2),
+            'uefi': self.firmware.uefi,
+            'efi_bitness': self.firmware.efi_bitness,
+            'dmi': {field: value for field, value in self.dmi.values.items() if value is not None},
+            'platform': self.platform,
+            'kernel': self.kernel,
+        }
+
+class BlockDeviceInfo:
+    """Блочное устройство из /sys/block/<name>."""
+    
+    def __init__(self, device: str, root: str = '/'):
+        """
+        Инициализация.
+        
+        Args:
+            device: Устройство ('/dev/sda' или 'sda')
+            root: Корень дерева /sys
+        """
+        self.name = os.path.basename(device)
+        block_dir = os.path.join(root, 'sys/block', self.name)
+        self.exists = os.path.isdir(block_dir)
+        sectors = _read_value(os.path.join(block_dir, 'size'))
+        # size в sysfs всегда в 512-байтных секторах
+        self.size_bytes = int(sectors) * 512 if sectors and sectors.isdigit() else 0
+        self.rotational = _read_value(os.path.join(block_dir, 'queue', 'rotational')) == '1'
+        self.removable = _read_value(os.path.join(block_dir, 'removable')) == '1'
+        self.model = _read_value(os.path.join(block_dir, 'device', 'model'))
+    
+    @property
+    def size_gb(self) -> float:
+        """Размер в GB."""
+        return self.size_bytes / (1024 ** 3)
+
+def read_block_device(device: str, root: str = '/') -> BlockDeviceInfo:
+    """
+    Сведения о диске (без кэша - список дисков меняется).
+    
+    Args:
+        device: Устройство ('/dev/sda')
+        root: Корень дерева /sys
+    
+    Returns:
+        BlockDeviceInfo
+    """
+    return BlockDeviceInfo(device, root)
+
+def read_meminfo(root: str = '/') -> MemoryInfo:
+    """
+    Текущее состояние памяти (без кэша - для свободной памяти).
+    
+    Args:
+        root: Корень дерева /proc
+    
+    Returns:
+        MemoryInfo
+    """
+    return MemoryInfo(parse_meminfo(_read(os.path.join(root, 'proc/meminfo')) or ''))
+
+# Кэшированный снимок
+_snapshot_instance: Optional[HardwareSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+def get_hardware_snapshot(refresh: bool = False) -> HardwareSnapshot:
+    """
+    Получить снимок железа (собирается при первом вызове).
+    
+    Args:
+        refresh: Собрать снимок заново
+    
+    Returns:
+        HardwareSnapshot
+    """
+    global _snapshot_instance
+    
+    with _snapshot_lock:
+        if _snapshot_instance is None or refresh:
+            _snapshot_instance = HardwareSnapshot()
+        return _snapshot_instance
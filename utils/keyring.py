@@ -0,0 +1,178 @@
+"""
+Состояние связки ключей pacman.
+
+pacman-key --init и --populate archlinux при каждом запуске установщика
+занимают десятки секунд (gpg подписывает сотни ключей), хотя на живом
+образе связка обычно уже готова. Здесь состояние связки сводится к
+отпечатку:
+
+    версия пакета archlinux-keyring (из локальной базы pacman)
+    содержимое pubring и trustdb в /etc/pacman.d/gnupg
+    список закрытых ключей (мастер-ключ, созданный --init)
+
+Отпечаток после успешного --populate сохраняется в KEYRING_STATE_FILE.
+Если при следующем запуске он совпадает, связка не перестраивается.
+В целевую систему копируется уже проверенная связка хоста, а не
+создается новая.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Any
+from config import KEYRING_STATE_FILE
+from utils.logger import logger
+from utils.executor import Cmd, run_command
+
+GNUPG_DIR = 'etc/pacman.d/gnupg'
+PACMAN_LOCAL_DB = 'var/lib/pacman/local'
+KEYRING_PACKAGE = 'archlinux-keyring'
+
+# Файлы, от которых зависит проверка подписей
+KEYRING_FILES = ('pubring.gpg', 'pubring.kbx', 'trustdb.gpg')
+PRIVATE_KEYS_DIR = 'private-keys-v1.d'
+
+def read_package_version(name: str, root: str = '/') -> Optional[str]:
+    """
+    Версия установленного пакета из локальной базы pacman (без запуска pacman).
+    
+    Args:
+        name: Имя пакета
+        root: Корень системы
+    
+    Returns:
+        Версия ('20240520-1') или None если пакет не установлен
+    """
+    local_db = os.path.join(root, PACMAN_LOCAL_DB)
+    try:
+        entries = os.listdir(local_db)
+    except OSError:
+        return None
+    
+    # Каталоги называются <имя>-<версия>-<выпуск>; имя может содержать дефисы
+    for entry in entries:
+        if entry.rsplit('-', 2)[0] != name:
+            continue
+        try:
+            with open(os.path.join(local_db, entry, 'desc'), 'r') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        if '%VERSION%' in lines:
+            index = lines.index('%VERSION%') + 1
+            if index < len(lines):
+                return lines[index]
+    return None
+
+class KeyringState:
+    """Отпечаток связки ключей pacman в системе с корнем root."""
+    
+    def __init__(self, root: str = '/'):
+        """
+        Прочитать состояние.
+        
+        Args:
+            root: Корень системы ('/' - живой образ, '/mnt' - целевая)
+        """
+        self.root = root
+        self.gnupg_dir = os.path.join(root, GNUPG_DIR)
+        self.keyring_version = read_package_version(KEYRING_PACKAGE, root)
+        
+        self.files: Dict[str, Optional[str]] = {}
+        for name in KEYRING_FILES:
+            try:
+                with open(os.path.join(self.gnupg_dir, name), 'rb') as f:
+                    self.files[name] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                self.files[name] = None
+        
+        try:
+            self.private_keys = sorted(os.listdir(os.path.join(self.gnupg_dir, PRIVATE_KEYS_DIR)))
+        except OSError:
+            self.private_keys = []
+    
+    @property
+    def initialized(self) -> bool:
+        """Связка создана pacman-key --init: есть ключи, trustdb и мастер-ключ."""
+        has_pubring = bool(self.files['pubring.gpg'] or self.files['pubring.kbx'])
+        return has_pubring and bool(self.files['trustdb.gpg']) and bool(self.private_keys)
+    
+    @property
+    def fingerprint(self) -> str:
+        """SHA-256 от версии archlinux-keyring, файлов связки и списка закрытых ключей."""
+        data = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Состояние для логов и отпечатка."""
+        return {
+            'keyring_version': self.keyring_version,
+            'files': self.files,
+            'private_keys': self.private_keys,
+        }
+
+def load_keyring_state(path: str = KEYRING_STATE_FILE) -> Optional[str]:
+    """
+    Отпечаток связки после последнего успешного --populate.
+    
+    Args:
+        path: Файл состояния
+    
+    Returns:
+        Отпечаток или None если его нет
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
+
+def save_keyring_state(state: KeyringState, path: str = KEYRING_STATE_FILE) -> None:
+    """
+    Запомнить отпечаток готовой связки.
+    
+    Args:
+        state: Состояние после --populate
+        path: Файл состояния
+    """
+    try:
+        with open(path, 'w') as f:
+            json.dump({'fingerprint': state.fingerprint, **state.to_dict()}, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Failed to save keyring state: {e}")
+
+def copy_keyring(mount_point: str = '/mnt') -> bool:
+    """
+    Скопировать связку ключей хоста в целевую систему.
+    
+    Связка хоста уже проверена check_pacman_keys, поэтому в целевой
+    системе не нужно заново выполнять --init и --populate.
+    
+    Args:
+        mount_point: Точка монтирования системы
+    
+    Returns:
+        True если связка в целевой системе совпадает с хостом
+    """
+    host = KeyringState()
+    if not host.initialized:
+        logger.warning("Host pacman keyring is not initialized, not copying it")
+        return False
+    target_state = KeyringState(mount_point)
+    # Версию archlinux-keyring не сравниваем: в целевой системе пакета еще может не быть
+    if (target_state.files, target_state.private_keys) == (host.files, host.private_keys):
+        logger.info("Target pacman keyring matches the host, skipping copy")
+        return True
+    
+    target = os.path.join(mount_point, GNUPG_DIR)
+    try:
+        logger.info(f"Copying pacman keyring to {target}")
+        run_command(Cmd(['rm', '-rf', target]), check=True, log=False)
+        run_command(Cmd(['mkdir', '-p', os.path.dirname(target)]), check=True, log=False)
+        run_command(Cmd(['cp', '-a', host.gnupg_dir, target]), check=True, log=True)
+        # Сокеты gpg-agent хоста в целевой системе не нужны
+        run_command(Cmd(['find', target, '-type', 's', '-delete']), check=False, log=False)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to copy pacman keyring: {e}")
+        return False
@@ -0,0 +1,66 @@
+"""
+Отложенный импорт тяжелых модулей.
+
+lazy_module('psutil') сразу возвращает объект модуля, а сам модуль
+импортируется при первом обращении к его атрибуту. Так импорт модулей
+установщика (и запуск main.py --help) не платит за asyncio, psutil
+и другие модули, которые нужны только части команд.
+
+importlib.util.LazyLoader здесь не используется: он не потокобезопасен,
+а отложенные модули нужны и фоновым потокам (опрос оборудования,
+монитор, граф задач, проверка сети). Вместо него возвращается
+модуль-посредник, который под блокировкой выполняет обычный импорт и
+передает обращения настоящему модулю.
+"""
+
+import sys
+import types
+import threading
+import importlib
+import importlib.util
+
+_load_lock = threading.Lock()
+
+class _MissingModule(types.ModuleType):
+    """Заглушка для неустановленного модуля: ошибка при первом использовании."""
+    
+    def __getattr__(self, attr):
+        raise ImportError(f"No module named '{self.__name__}'")
+
+class _LazyModule(types.ModuleType):
+    """Посредник: импортирует модуль при первом обращении к атрибуту."""
+    
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+    
+    def __getattr__(self, attr):
+        # Сюда попадают только атрибуты, которых нет у самого посредника
+        module = self._module
+        if module is None:
+            with _load_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+                module = self._module
+        return getattr(module, attr)
+
+def lazy_module(name: str) -> types.ModuleType:
+    """
+    Модуль, загружаемый при первом обращении к атрибуту.
+    
+    Первое обращение безопасно из любого потока: остальные потоки ждут,
+    пока модуль будет импортирован.
+    
+    Args:
+        name: Полное имя модуля
+    
+    Returns:
+        Модуль (уже загруженный, отложенный или заглушка, если модуль
+        не установлен)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    
+    if importlib.util.find_spec(name) is None:
+        return _MissingModule(name)
+    return _LazyModule(name)
@@ -0,0 +1,98 @@
+"""
+Фоновая запись логов: обработчики без сброса на каждую запись и
+QueueListener, который пишет записи пачками.
+
+Вынесено из utils.logger, чтобы logging.handlers (и socket, pickle)
+импортировались только при первой записи в лог.
+"""
+
+import queue
+import logging
+import logging.handlers
+import threading
+from typing import List
+from config import LOG_BATCH_SIZE
+
+class RawQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, передающий запись как есть (форматирует обработчик в потоке записи)."""
+    
+    def prepare(self, record):
+        return record
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler без сброса на диск после каждой записи.
+    
+    Сброс выполняет BatchQueueListener после каждой пачки записей.
+    """
+    
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler без сброса после каждой записи (сброс - после пачки)."""
+    
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class FlushRequest:
+    """Маркер в очереди: все записи до него записаны и сброшены."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener, записывающий записи пачками.
+    
+    Фоновый поток забирает из очереди все накопившиеся записи (не более
+    batch_size), передает их обработчикам и один раз сбрасывает файлы.
+    В простое каждая запись сбрасывается сразу, под нагрузкой пачки растут.
+    """
+    
+    def __init__(self, log_queue, *handlers, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+    
+    def _drain(self, first) -> List:
+        """Забрать из очереди уже накопившиеся записи вслед за first."""
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _flush_handlers(self) -> None:
+        """Сбросить буферы всех обработчиков."""
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+    
+    def _monitor(self):
+        stop = False
+        while not stop:
+            flush_requests = []
+            for item in self._drain(self.dequeue(True)):
+                if item is self._sentinel:
+                    stop = True
+                elif isinstance(item, FlushRequest):
+                    flush_requests.append(item)
+                else:
+                    self.handle(item)
+            self._flush_handlers()
+            for request in flush_requests:
+                request.done.set()
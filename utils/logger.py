@@ -3,10 +3,16 @@
 Все операции логируются в /var/log/archinstall.log
 """
 
+import copy
+import queue
+import atexit
 import logging
 import os
+import threading
 from datetime import datetime
-from config import LOG_FILE, LOG_DIR
+from typing import Optional
+from config import LOG_FILE, LOG_DIR, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+from utils.capture import CaptureBuffer, EXCERPT_LINES
 
 class ColoredFormatter(logging.Formatter):
     """Форматер логов с цветным выводом."""
@@ -21,30 +27,50 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
+        # Запись общая для всех обработчиков - цвет ставится только в копии
         log_color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
+        record = copy.copy(record)
         record.levelname = f"{log_color}{record.levelname}{self.COLORS['RESET']}"
         return super().format(record)
 
+# Фоновая запись логов (utils.log_writer.BatchQueueListener)
+_listener = None
+
 def setup_logger(name='archinstall', log_level=logging.INFO):
     """
     Настройка логирования.
     
+    Логгер только кладет записи в очередь (RawQueueHandler, без
+    prepare() стандартного QueueHandler, который форматирует сообщение
+    в вызывающем потоке). Форматирование и запись в файл и на консоль
+    выполняет фоновый поток; каждый обработчик форматирует запись сам,
+    поэтому цвета попадают только на консоль.
+    
+    Вызывается при первом обращении к глобальному logger, а не при импорте.
+    
     Args:
         name: Имя логгера
-        log_level: Уровень логирования
+        log_level: Уровень логирования консоли (в файл пишется DEBUG)
     
     Returns:
         Конфигурированный logger
     """
+    global _listener
+    from utils.log_writer import BatchQueueListener, BufferedRotatingFileHandler, BufferedStreamHandler, RawQueueHandler
+    
     logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+    logger.setLevel(min(log_level, logging.DEBUG))
     
     # Создать директорию логов если не существует
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR, exist_ok=True)
     
     # Обработчик файла
-    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler = BufferedRotatingFileHandler(
+        LOG_FILE,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT
+    )
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter(
         '[%(asctime)s] [%(levelname)s] %(name)s: %(message)s',
@@ -53,7 +79,7 @@ def setup_logger(name='archinstall', log_level=logging.INFO):
     file_handler.setFormatter(file_formatter)
     
     # Обработчик консоли
-    console_handler = logging.StreamHandler()
+    console_handler = BufferedStreamHandler()
     console_handler.setLevel(log_level)
     console_formatter = ColoredFormatter(
         '[%(asctime)s] [%(levelname)s] %(message)s',
@@ -61,25 +87,99 @@ def setup_logger(name='archinstall', log_level=logging.INFO):
     )
     console_handler.setFormatter(console_formatter)
     
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    if _listener is not None:
+        _listener.stop()
+    
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [RawQueueHandler(log_queue)]
+    logger.propagate = False
+    
+    _listener = BatchQueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
     
     return logger
 
+def flush_logs(timeout: float = 5.0) -> bool:
+    """
+    Дождаться записи всех уже отправленных записей лога.
+    
+    Args:
+        timeout: Максимальное ожидание в секундах
+    
+    Returns:
+        True если все записи сброшены на диск
+    """
+    if _listener is None or _listener._thread is None:
+        return True
+    
+    from utils.log_writer import FlushRequest
+    request = FlushRequest()
+    _listener.queue.put_nowait(request)
+    return request.done.wait(timeout)
+
+@atexit.register
+def shutdown_logger() -> None:
+    """Записать оставшиеся записи и остановить фоновый поток."""
+    global _listener
+    if _listener is None:
+        return
+    
+    listener, _listener = _listener, None
+    if listener._thread is not None:
+        listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+class _LazyLogger:
+    """
+    Глобальный логгер, настраиваемый при первом использовании.
+    
+    Импорт модулей установщика не создает файлов в /var/log и не
+    запускает поток записи: это происходит при первом вызове logger.*.
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._logger: Optional[logging.Logger] = None
+        self._lock = threading.Lock()
+    
+    def _get(self) -> logging.Logger:
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    self._logger = setup_logger(self._name)
+        return self._logger
+    
+    def __getattr__(self, attr):
+        return getattr(self._get(), attr)
+
 # Глобальный логгер
-logger = setup_logger()
+logger = _LazyLogger('archinstall')
+
+def _excerpt(output: str, lines: int = EXCERPT_LINES) -> str:
+    """Первые и последние строки вывода."""
+    all_lines = output.split('\n')
+    if len(all_lines) <= 2 * lines:
+        return output
+    omitted = len(all_lines) - 2 * lines
+    return '\n'.join(all_lines[:lines] + [f"... [{omitted} lines omitted] ..."] + all_lines[-lines:])
 
 def log_command(cmd, output, returncode):
     """
     Логировать выполненную команду.
     
+    При ошибке в лог попадает ограниченный отрывок вывода; для
+    CaptureBuffer - с путем к файлу с полным выводом.
+    
     Args:
         cmd: Команда
-        output: Вывод команды
+        output: Вывод команды (строка или CaptureBuffer)
         returncode: Код возврата
     """
     logger.debug(f"Command executed: {cmd}")
     if returncode == 0:
-        logger.debug(f"Command output: {output[:200]}...")  # Первые 200 символов
+        preview = output.preview(200) if isinstance(output, CaptureBuffer) else output[:200]
+        logger.debug(f"Command output: {preview}...")  # Первые 200 символов
     else:
-        logger.error(f"Command failed with code {returncode}: {output}")
+        excerpt = output.excerpt() if isinstance(output, CaptureBuffer) else _excerpt(output)
+        logger.error(f"Command failed with code {returncode}: {excerpt}")
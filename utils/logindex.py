@@ -0,0 +1,406 @@
+"""
+Индекс строк лога поверх mmap.
+
+Файл лога не читается в память целиком: он отображается через mmap,
+а индекс хранит только смещения начала строк (array 'Q'), номера строк
+с ошибками и границы этапов установки. refresh() дописывает индекс
+только для новой части файла, поэтому растущий лог переиндексируется
+за время, пропорциональное приросту.
+
+Лог установки ротируется по размеру (LOG_MAX_BYTES), и ранние этапы
+длинной установки оказываются в archinstall.log.1 ... .N.
+RotatedLogIndex склеивает эти файлы и текущий лог в одну
+последовательность строк: от самой старой копии к текущему файлу.
+"""
+
+import os
+import re
+import mmap
+from array import array
+from bisect import bisect_right
+from typing import Optional, List, Tuple
+from config import LOG_BACKUP_COUNT
+
+_NEWLINE = re.compile(rb'\n')
+# Строка уровня ERROR/CRITICAL в формате файлового обработчика utils.logger
+_ERROR_LINE = re.compile(rb'^\[[^\]\n]*\] \[(?:ERROR|CRITICAL)\]', re.M)
+# Начало этапа (InstallationProgress.next_stage)
+_STAGE_LINE = re.compile(rb'^\[[^\]\n]*\] \[INFO\] [^\n]*?Stage \d+/\d+: (\w+)\r?$', re.M)
+
+class _LineIndex:
+    """
+    Общая часть индексов лога: страницы строк, этапы и ошибки.
+    
+    Подкласс задает line(), line_count, stages и errors (номера строк
+    по возрастанию), поэтому один и тот же лог с ротацией и без нее
+    читается одинаково.
+    """
+    
+    stages: List[Tuple[str, int]]
+    errors: List[int]
+    
+    @property
+    def line_count(self) -> int:
+        raise NotImplementedError
+    
+    def line(self, number: int) -> str:
+        raise NotImplementedError
+    
+    def lines(self, start: int, count: int) -> List[str]:
+        """
+        Несколько строк подряд.
+        
+        Args:
+            start: Первая строка
+            count: Количество
+        
+        Returns:
+            Список строк (короче count в конце лога)
+        """
+        end = min(start + count, self.line_count)
+        return [self.line(number) for number in range(max(0, start), end)]
+    
+    def stage_range(self, name: str) -> Optional[Tuple[int, int]]:
+        """
+        Строки этапа: от его начала до начала следующего этапа.
+        
+        Args:
+            name: Ключ этапа
+        
+        Returns:
+            (первая строка, строка после последней) или None
+        """
+        for position, (stage, first) in enumerate(self.stages):
+            if stage == name:
+                if position + 1 < len(self.stages):
+                    return first, self.stages[position + 1][1]
+                return first, self.line_count
+        return None
+    
+    def next_error(self, after: int) -> Optional[int]:
+        """Первая строка с ошибкой после строки after."""
+        position = bisect_right(self.errors, after)
+        return self.errors[position] if position < len(self.errors) else None
+    
+    def previous_error(self, before: int) -> Optional[int]:
+        """Последняя строка с ошибкой перед строкой before."""
+        position = bisect_right(self.errors, before - 1)
+        return self.errors[position - 1] if position > 0 else None
+
+class LogIndex(_LineIndex):
+    """Построчный доступ к большому файлу лога."""
+    
+    def __init__(self, path: str):
+        """
+        Инициализация (файл открывается при первом refresh).
+        
+        Args:
+            path: Путь к файлу лога
+        """
+        self.path = path
+        self.offsets = array('Q', [0])
+        self.errors: List[int] = []
+        self.stages: List[Tuple[str, int]] = []
+        self.size = 0
+        self._indexed = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._inode: Optional[int] = None
+    
+    def close(self) -> None:
+        """Закрыть mmap и файл."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _reset(self) -> None:
+        """Сбросить индекс (файл ротирован или усечен)."""
+        self.close()
+        self.offsets = array('Q', [0])
+        self.errors = []
+        self.stages = []
+        self.size = 0
+        self._indexed = 0
+        self._inode = None
+    
+    def refresh(self) -> int:
+        """
+        Проиндексировать новую часть файла.
+        
+        Returns:
+            Количество новых полных строк
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._reset()
+            return 0
+        
+        if stat.st_ino != self._inode or stat.st_size < self.size:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self.size:
+            return 0
+        
+        # mmap нельзя расширить - отображаем файл заново
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._map)
+        
+        before = len(self.offsets)
+        start = self._indexed
+        for match in _NEWLINE.finditer(self._map, start):
+            self.offsets.append(match.end())
+        end = self.offsets[-1]
+        if end <= start:
+            return 0
+        
+        # Ошибки и этапы - только в полных строках [start, end)
+        first_line = before - 1
+        for match in _ERROR_LINE.finditer(self._map, start, end):
+            self.errors.append(self._line_at(match.start(), first_line))
+        for match in _STAGE_LINE.finditer(self._map, start, end):
+            name = match.group(1).decode('ascii', 'replace')
+            self.stages.append((name, self._line_at(match.start(), first_line)))
+        
+        self._indexed = end
+        return len(self.offsets) - before
+    
+    def _line_at(self, offset: int, low: int = 0) -> int:
+        """Номер строки, содержащей байт offset."""
+        return bisect_right(self.offsets, offset, low) - 1
+    
+    @property
+    def line_count(self) -> int:
+        """Количество строк (включая недописанную последнюю)."""
+        count = len(self.offsets)
+        return count if self.offsets[-1] < self.size else count - 1
+    
+    def line(self, number: int) -> str:
+        """
+        Текст строки без перевода строки.
+        
+        Args:
+            number: Номер строки (с 0)
+        
+        Returns:
+            Строка
+        """
+        start = self.offsets[number]
+        end = self.offsets[number + 1] if number + 1 < len(self.offsets) else self.size
+        return self._map[start:end].decode('utf-8', 'replace').rstrip('\r\n')
+    
+    def search(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        backwards: bool = False
+    ) -> Optional[int]:
+        """
+        Найти строку с подстрокой (без учета регистра).
+        
+        Args:
+            text: Искомый текст
+            start: Строка, с которой начинается поиск
+            end: Строка, на которой поиск заканчивается (не включительно)
+            backwards: Искать назад от start (в пределах [0, start))
+        
+        Returns:
+            Номер найденной строки или None
+        """
+        if self._map is None or not text:
+            return None
+        
+        pattern = re.compile(re.escape(text.encode('utf-8')), re.I)
+        count = self.line_count
+        end = count if end is None else min(end, count)
+        if backwards:
+            low, high = 0, min(start, end)
+        else:
+            low, high = start, end
+        if low >= high:
+            return None
+        
+        low_offset = self.offsets[low]
+        high_offset = self.offsets[high] if high < len(self.offsets) else self.size
+        
+        if not backwards:
+            match = pattern.search(self._map, low_offset, high_offset)
+            return self._line_at(match.start()) if match else None
+        
+        last = None
+        for match in pattern.finditer(self._map, low_offset, high_offset):
+            last = match
+        return self._line_at(last.start()) if last else None
+
+class RotatedLogIndex(_LineIndex):
+    """
+    Построчный доступ к логу вместе с его ротированными копиями.
+    
+    Интерфейс совпадает с LogIndex; номера строк сквозные по всем файлам.
+    Копии после ротации не меняются, поэтому refresh() дописывает только
+    текущий файл. Если лог ротирован заново (изменился набор файлов),
+    индекс строится заново, а число строк, ушедших вместе с удаленной
+    самой старой копией, записывается в dropped_lines.
+    """
+    
+    def __init__(self, path: str, backup_count: int = LOG_BACKUP_COUNT):
+        """
+        Инициализация.
+        
+        Args:
+            path: Путь к текущему файлу лога
+            backup_count: Сколько ротированных копий (path.1 ... path.N) читать
+        """
+        self.path = path
+        self.backup_count = backup_count
+        self.segments: List[LogIndex] = []
+        self.bases: List[int] = []  # номер первой строки каждого файла
+        self.errors: List[int] = []
+        self.stages: List[Tuple[str, int]] = []
+        self.dropped_lines = 0
+        self._inodes: Tuple[int, ...] = ()
+        self._static_errors: List[int] = []
+        self._static_stages: List[Tuple[str, int]] = []
+    
+    def segment_paths(self) -> List[str]:
+        """Файлы лога от самой старой копии к текущему."""
+        paths = [f"{self.path}.{number}" for number in range(self.backup_count, 0, -1)]
+        return [path for path in paths if os.path.exists(path)] + [self.path]
+    
+    def close(self) -> None:
+        """Закрыть все файлы."""
+        for segment in self.segments:
+            segment.close()
+    
+    def _rebuild(self, paths: List[str], inodes: Tuple[int, ...]) -> None:
+        """Построить индекс всех файлов заново (после ротации)."""
+        # Строки файлов, которых больше нет (удалены при ротации). Копии
+        # появляются только переименованием, а inode удаленной копии может
+        # достаться новому текущему файлу - поэтому сравниваем только с копиями
+        self.dropped_lines = sum(
+            segment.line_count
+            for segment, inode in zip(self.segments, self._inodes)
+            if inode not in inodes[:-1]
+        )
+        self.close()
+        self.segments = [LogIndex(path) for path in paths]
+        self._inodes = inodes
+        
+        self.bases = []
+        self._static_errors = []
+        self._static_stages = []
+        base = 0
+        for segment in self.segments:
+            segment.refresh()
+            self.bases.append(base)
+            if segment is not self.segments[-1]:
+                self._static_errors += [base + line for line in segment.errors]
+                self._static_stages += [(name, base + line) for name, line in segment.stages]
+                base += segment.line_count
+    
+    def refresh(self) -> int:
+        """
+        Проиндексировать новые строки (и новые файлы после ротации).
+        
+        Returns:
+            Количество новых полных строк
+        """
+        before = self.line_count
+        paths = self.segment_paths()
+        inodes = []
+        for path in paths:
+            try:
+                inodes.append(os.stat(path).st_ino)
+            except OSError:
+                inodes.append(-1)
+        inodes = tuple(inodes)
+        
+        self.dropped_lines = 0
+        if inodes != self._inodes:
+            self._rebuild(paths, inodes)
+        else:
+            self.segments[-1].refresh()
+        
+        current = self.segments[-1]
+        base = self.bases[-1]
+        self.errors = self._static_errors + [base + line for line in current.errors]
+        self.stages = self._static_stages + [(name, base + line) for name, line in current.stages]
+        return max(0, self.line_count - (before - self.dropped_lines))
+    
+    @property
+    def size(self) -> int:
+        """Суммарный размер проиндексированных файлов."""
+        return sum(segment.size for segment in self.segments)
+    
+    @property
+    def line_count(self) -> int:
+        """Количество строк во всех файлах."""
+        if not self.segments:
+            return 0
+        return self.bases[-1] + self.segments[-1].line_count
+    
+    def _locate(self, number: int) -> Tuple[LogIndex, int]:
+        """Файл и номер строки в нем по сквозному номеру."""
+        position = bisect_right(self.bases, number) - 1
+        # Пустые файлы имеют ту же базу, что и следующий - берем последний
+        return self.segments[position], number - self.bases[position]
+    
+    def line(self, number: int) -> str:
+        """
+        Текст строки без перевода строки.
+        
+        Args:
+            number: Сквозной номер строки (с 0)
+        
+        Returns:
+            Строка
+        """
+        segment, local = self._locate(number)
+        return segment.line(local)
+    
+    def search(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        backwards: bool = False
+    ) -> Optional[int]:
+        """
+        Найти строку с подстрокой (без учета регистра) во всех файлах.
+        
+        Args:
+            text: Искомый текст
+            start: Строка, с которой начинается поиск
+            end: Строка, на которой поиск заканчивается (не включительно)
+            backwards: Искать назад от start (в пределах [0, start))
+        
+        Returns:
+            Сквозной номер найденной строки или None
+        """
+        count = self.line_count
+        end = count if end is None else min(end, count)
+        low, high = (0, min(start, end)) if backwards else (start, end)
+        
+        order = list(zip(self.segments, self.bases))
+        if backwards:
+            order.reverse()
+        for segment, base in order:
+            local_low = max(0, low - base)
+            local_high = min(segment.line_count, high - base)
+            if local_low >= local_high:
+                continue
+            if backwards:
+                found = segment.search(text, local_high, local_high, backwards=True)
+            else:
+                found = segment.search(text, local_low, local_high)
+            if found is not None:
+                return base + found
+        return None
@@ -0,0 +1,258 @@
+"""
+Монитор ресурсов во время установки.
+
+Фоновый поток раз в MONITOR_INTERVAL секунд снимает:
+
+    net_rx_bps     - скорость приема по сети (все интерфейсы, кроме lo)
+    disk_write_bps - скорость записи на целевой диск (/proc/diskstats)
+    cpu_percent    - загрузка процессора (psutil)
+    mem_percent    - занятая память (psutil)
+    mem_psi        - доля времени ожидания памяти за 10 с (/proc/pressure/memory)
+
+Короткая строка с последними значениями показывается в тексте gauge,
+а весь ряд пишется в MONITOR_FILE (CSV рядом с логом). По ряду видно,
+что тормозит этап: медленное зеркало (мало net, мало disk) или
+медленный диск (net упирается, disk на пределе).
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Any
+from config import MONITOR_FILE, MONITOR_INTERVAL
+from utils.logger import logger
+from utils.lazy import lazy_module
+from utils.tracing import tracer
+
+psutil = lazy_module('psutil')
+
+# Размер сектора в /proc/diskstats не зависит от устройства
+DISKSTATS_SECTOR = 512
+
+COLUMNS = ('t', 'stage', 'net_rx_bps', 'disk_write_bps', 'cpu_percent', 'mem_percent', 'mem_psi')
+
+def _format_rate(value: Optional[float]) -> str:
+    """Скорость в байтах/с в виде '12.3M' ('-' если неизвестна)."""
+    if value is None:
+        return '-'
+    if value < 1024:
+        return f"{value:.0f}B"
+    value /= 1024
+    for unit in ('K', 'M'):
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}G"
+
+def read_disk_written(device: str) -> Optional[int]:
+    """
+    Записано байт на устройство с загрузки (/proc/diskstats).
+    
+    Args:
+        device: Имя устройства ('sda', 'nvme0n1' или '/dev/sda')
+    
+    Returns:
+        Байты или None если устройства нет
+    """
+    name = os.path.basename(device)
+    try:
+        with open('/proc/diskstats', 'r') as f:
+            for line in f:
+                fields = line.split()
+                # major minor name reads ... sectors_written - 10-е поле
+                if len(fields) > 9 and fields[2] == name:
+                    return int(fields[9]) * DISKSTATS_SECTOR
+    except OSError:
+        pass
+    return None
+
+def read_net_received() -> Optional[int]:
+    """Принято байт всеми интерфейсами, кроме lo (psutil)."""
+    try:
+        counters = psutil.net_io_counters(pernic=True)
+    except (ImportError, OSError):
+        return None
+    return sum(nic.bytes_recv for name, nic in counters.items() if name != 'lo')
+
+def read_memory_pressure() -> Optional[float]:
+    """Значение some avg10 из /proc/pressure/memory (нет PSI - None)."""
+    try:
+        with open('/proc/pressure/memory', 'r') as f:
+            for line in f:
+                if line.startswith('some '):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'avg10':
+                            return float(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+class ResourceMonitor:
+    """Фоновый сбор временного ряда ресурсов."""
+    
+    def __init__(self, path: str = MONITOR_FILE, interval: float = MONITOR_INTERVAL):
+        """
+        Инициализация.
+        
+        Args:
+            path: CSV-файл временного ряда
+            interval: Период опроса в секундах
+        """
+        self.path = path
+        self.interval = interval
+        self.device: Optional[str] = None
+        self.samples: List[Dict[str, Any]] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._origin = 0.0
+        self._previous: Optional[Dict[str, Any]] = None
+    
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Подписаться на новые отсчеты (вызывается из потока монитора).
+        
+        Args:
+            callback: Функция, получающая словарь отсчета
+        """
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Отписаться от отсчетов."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    @property
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Последний отсчет или None."""
+        return self.samples[-1] if self.samples else None
+    
+    def _counters(self) -> Dict[str, Any]:
+        """Текущие значения накопительных счетчиков."""
+        return {
+            'time': time.monotonic(),
+            'net_rx': read_net_received(),
+            'disk_written': read_disk_written(self.device) if self.device else None,
+        }
+    
+    @staticmethod
+    def _rate(current: Dict[str, Any], previous: Dict[str, Any], key: str) -> Optional[float]:
+        """Скорость изменения счетчика между двумя снятиями."""
+        if current[key] is None or previous[key] is None:
+            return None
+        elapsed = current['time'] - previous['time']
+        return round(max(0, current[key] - previous[key]) / elapsed, 1) if elapsed > 0 else None
+    
+    def sample(self) -> Dict[str, Any]:
+        """
+        Снять отсчет, дописать его в файл и разослать подписчикам.
+        
+        Returns:
+            Словарь отсчета (поля COLUMNS)
+        """
+        counters = self._counters()
+        previous = self._previous or counters
+        self._previous = counters
+        
+        try:
+            cpu_percent = psutil.cpu_percent(interval=None)
+            mem_percent = psutil.virtual_memory().percent
+        except ImportError:
+            cpu_percent = mem_percent = None
+        
+        sample = {
+            't': round(counters['time'] - self._origin, 3),
+            'stage': tracer.current_stage or '',
+            'net_rx_bps': self._rate(counters, previous, 'net_rx'),
+            'disk_write_bps': self._rate(counters, previous, 'disk_written'),
+            'cpu_percent': cpu_percent,
+            'mem_percent': mem_percent,
+            'mem_psi': read_memory_pressure(),
+        }
+        self.samples.append(sample)
+        
+        if self._file is not None:
+            self._file.write(','.join('' if sample[c] is None else str(sample[c]) for c in COLUMNS) + '\n')
+            self._file.flush()
+        
+        for callback in list(self._listeners):
+            try:
+                callback(sample)
+            except Exception as e:
+                logger.debug(f"Monitor listener failed: {e}")
+        return sample
+    
+    def _loop(self) -> None:
+        """Опрос до вызова stop()."""
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def start(self, device: Optional[str] = None) -> 'ResourceMonitor':
+        """
+        Запустить фоновый опрос (повторный вызов ничего не делает).
+        
+        Args:
+            device: Целевой диск ('/dev/sda'), запись на который измеряется
+        
+        Returns:
+            self
+        """
+        if self._thread is not None:
+            return self
+        
+        self.device = device
+        self.samples = []
+        self._previous = None
+        self._origin = time.monotonic()
+        self._stop.clear()
+        try:
+            self._file = open(self.path, 'w')
+            self._file.write(','.join(COLUMNS) + '\n')
+        except OSError as e:
+            logger.warning(f"Resource monitor file disabled: {e}")
+            self._file = None
+        
+        self.sample()
+        self._thread = threading.Thread(target=self._loop, name='resource-monitor', daemon=True)
+        self._thread.start()
+        logger.debug(f"Resource monitor started (disk: {device}, file: {self.path})")
+        return self
+    
+    def stop(self) -> None:
+        """Остановить опрос и закрыть файл."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    @staticmethod
+    def format_line(sample: Dict[str, Any]) -> str:
+        """
+        Короткая строка для gauge.
+        
+        Args:
+            sample: Отсчет
+        
+        Returns:
+            Например 'net 4.2M/s  disk 38.0M/s  cpu 35%  mem 61%'
+        """
+        parts = [
+            f"net {_format_rate(sample['net_rx_bps'])}/s",
+            f"disk {_format_rate(sample['disk_write_bps'])}/s",
+        ]
+        if sample['cpu_percent'] is not None:
+            parts.append(f"cpu {sample['cpu_percent']:.0f}%")
+        if sample['mem_percent'] is not None:
+            parts.append(f"mem {sample['mem_percent']:.0f}%")
+        if sample['mem_psi']:
+            parts.append(f"psi {sample['mem_psi']:.1f}")
+        return '  '.join(parts)
+
+# Глобальный монитор
+monitor = ResourceMonitor()
@@ -0,0 +1,319 @@
+"""
+Проверка сети: одновременный опрос нескольких точек.
+
+Раньше подключение проверялось одним ping archlinux.org: ответ на ICMP
+ничего не говорит о том, отдают ли зеркала пакеты, а недоступный хост
+стоил полного таймаута ping. Здесь все точки (archlinux.org и зеркала
+из CONNECTIVITY_MIRRORS) опрашиваются одновременно, каждая в своем
+потоке с коротким таймаутом:
+
+    connect_ms     - время TCP-соединения (задержка до хоста)
+    response_ms    - от отправки GET (после TLS) до заголовков ответа
+    throughput_bps - скорость чтения первых CONNECTIVITY_SAMPLE_BYTES
+
+У зеркал читается начало core.db, поэтому те же результаты годятся для
+выбора зеркал (rank_mirrors), если reflector не успел. Точки задаются
+полными URL (http://, https:// или tcp://host:port), так что проверку
+можно прогнать на локальном http.server.
+
+Проверка идет через сокеты, а не через utils.executor, поэтому в кассету
+она записывается отдельно (kind 'netprobe'): при воспроизведении
+результаты берутся из кассеты без обращения к сети.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+from typing import Dict, List, Optional, Any, Iterable
+from config import (
+    CONNECTIVITY_ENDPOINTS, CONNECTIVITY_MIRRORS,
+    CONNECTIVITY_TIMEOUT, CONNECTIVITY_SAMPLE_BYTES
+)
+from utils.logger import logger
+from utils.lazy import lazy_module
+from utils.cassette import get_cassette
+
+ssl = lazy_module('ssl')
+http_client = lazy_module('http.client')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+READ_CHUNK = 64 * 1024
+
+class EndpointResult:
+    """Результат опроса одной точки."""
+    
+    def __init__(self, url: str, server: Optional[str] = None):
+        """
+        Инициализация.
+        
+        Args:
+            url: Опрашиваемый URL
+            server: Строка зеркала из mirrorlist (None - не зеркало)
+        """
+        self.url = url
+        self.server = server
+        self.reachable = False  # TCP-соединение установлено
+        self.ok = False  # сервер ответил без ошибки HTTP
+        self.status: Optional[int] = None
+        self.connect_ms: Optional[float] = None
+        self.response_ms: Optional[float] = None
+        self.bytes = 0
+        self.throughput_bps: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Результат для логов."""
+        return {
+            'url': self.url,
+            'server': self.server,
+            'reachable': self.reachable,
+            'ok': self.ok,
+            'status': self.status,
+            'connect_ms': self.connect_ms,
+            'response_ms': self.response_ms,
+            'bytes': self.bytes,
+            'throughput_bps': self.throughput_bps,
+            'error': self.error,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EndpointResult':
+        """Результат из to_dict() (воспроизведение кассеты)."""
+        result = cls(data['url'], data.get('server'))
+        for key, value in data.items():
+            if key not in ('url', 'server'):
+                setattr(result, key, value)
+        return result
+    
+    def summary(self) -> str:
+        """Строка для лога: URL, состояние, задержка и скорость."""
+        state = 'OK' if self.ok else 'FAILED'
+        parts = [f"{self.url}: {state}"]
+        if self.connect_ms is not None:
+            parts.append(f"connect {self.connect_ms:.0f} ms")
+        if self.response_ms is not None:
+            parts.append(f"response {self.response_ms:.0f} ms")
+        if self.throughput_bps is not None:
+            parts.append(f"{self.throughput_bps / 1024:.0f} KiB/s ({self.bytes} bytes)")
+        if self.error:
+            parts.append(self.error)
+        return ', '.join(parts)
+
+def mirror_probe_url(server: str, repo: str = 'core', arch: Optional[str] = None) -> str:
+    """
+    URL базы репозитория на зеркале.
+    
+    Args:
+        server: Строка зеркала ('https://host/archlinux/$repo/os/$arch')
+        repo: Репозиторий
+        arch: Архитектура (по умолчанию - текущая)
+    
+    Returns:
+        URL файла <repo>.db
+    """
+    arch = arch or os.uname().machine
+    base = server.replace('$repo', repo).replace('$arch', arch).rstrip('/')
+    return f"{base}/{repo}.db"
+
+def probe_url(
+    url: str,
+    timeout: float = CONNECTIVITY_TIMEOUT,
+    sample_bytes: int = CONNECTIVITY_SAMPLE_BYTES,
+    server: Optional[str] = None
+) -> EndpointResult:
+    """
+    Опросить одну точку: соединение, GET и чтение образца.
+    
+    Args:
+        url: http://, https:// или tcp://host:port (только соединение)
+        timeout: Таймаут соединения и общий лимит чтения в секундах
+        sample_bytes: Сколько байт ответа прочитать для оценки скорости
+        server: Строка зеркала, к которой относится URL
+    
+    Returns:
+        EndpointResult (ошибки записываются в error, исключений нет)
+    """
+    result = EndpointResult(url, server)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    sock = None
+    try:
+        port = parts.port or DEFAULT_PORTS.get(scheme)
+        if not parts.hostname or port is None:
+            raise ValueError(f"unsupported URL: {url}")
+        
+        started = time.monotonic()
+        sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+        result.connect_ms = round((time.monotonic() - started) * 1000, 1)
+        result.reachable = True
+        if scheme == 'tcp':
+            result.ok = True
+            return result
+        
+        if scheme == 'https':
+            context = ssl.create_default_context()
+            sock = context.wrap_socket(sock, server_hostname=parts.hostname)
+        
+        # Соединение уже установлено: http.client только отправляет запрос
+        connection = http_client.HTTPConnection(parts.hostname, port, timeout=timeout)
+        connection.sock = sock
+        path = parts.path or '/'
+        if parts.query:
+            path += f"?{parts.query}"
+        requested = time.monotonic()
+        connection.request('GET', path, headers={
+            'Range': f"bytes=0-{sample_bytes - 1}",
+            'User-Agent': 'archinstall-netprobe',
+            'Connection': 'close',
+        })
+        response = connection.getresponse()
+        received = time.monotonic()
+        result.response_ms = round((received - requested) * 1000, 1)
+        result.status = response.status
+        result.ok = response.status < 400
+        
+        # Чтение образца ограничено тем же таймаутом: медленное зеркало
+        # дает частичный образец, а не зависшую проверку
+        while result.bytes < sample_bytes and time.monotonic() - received < timeout:
+            chunk = response.read(min(READ_CHUNK, sample_bytes - result.bytes))
+            if not chunk:
+                break
+            result.bytes += len(chunk)
+        elapsed = time.monotonic() - received
+        if result.bytes and elapsed > 0:
+            result.throughput_bps = round(result.bytes / elapsed, 1)
+        if not result.ok:
+            result.error = f"HTTP {response.status}"
+    
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    
+    finally:
+        if sock is not None:
+            sock.close()
+    return result
+
+def probe_endpoints(
+    targets: Iterable[Any],
+    timeout: float = CONNECTIVITY_TIMEOUT,
+    sample_bytes: int = CONNECTIVITY_SAMPLE_BYTES
+) -> List[EndpointResult]:
+    """
+    Опросить точки одновременно.
+    
+    Args:
+        targets: URL или пары (url, server) для зеркал
+        timeout: Таймаут каждой точки
+        sample_bytes: Размер образца
+    
+    Returns:
+        Результаты в порядке targets; точка, не уложившаяся в общий
+        лимит, помечается ошибкой timeout
+    """
+    targets = [(t, None) if isinstance(t, str) else tuple(t) for t in targets]
+    results: List[Optional[EndpointResult]] = [None] * len(targets)
+    
+    def worker(index: int, url: str, server: Optional[str]) -> None:
+        results[index] = probe_url(url, timeout, sample_bytes, server)
+    
+    threads = []
+    for index, (url, server) in enumerate(targets):
+        thread = threading.Thread(
+            target=worker,
+            args=(index, url, server),
+            name=f"netprobe-{index}",
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    
+    # Соединение, TLS и чтение: каждое ограничено timeout
+    deadline = time.monotonic() + timeout * 3
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
+    
+    # Копия: поток, закончивший после лимита, не меняет возвращенный список
+    final: List[EndpointResult] = []
+    for index, (url, server) in enumerate(targets):
+        result = results[index]
+        if result is None:
+            result = EndpointResult(url, server)
+            result.error = 'timeout'
+        final.append(result)
+    return final
+
+def rank_mirrors(results: Iterable[EndpointResult]) -> List[str]:
+    """
+    Зеркала, ответившие на проверку, от лучшего к худшему.
+    
+    Args:
+        results: Результаты probe_endpoints
+    
+    Returns:
+        Строки зеркал: сначала по скорости образца, затем по задержке
+    """
+    mirrors = [r for r in results if r.server and r.ok and r.bytes > 0]
+    mirrors.sort(key=lambda r: (-(r.throughput_bps or 0), r.connect_ms or 0))
+    return [r.server for r in mirrors]
+
+# Результаты последней проверки (для выбора зеркал)
+_last_results: List[EndpointResult] = []
+_results_lock = threading.Lock()
+
+def check_connectivity(
+    endpoints: Optional[List[str]] = None,
+    mirrors: Optional[List[str]] = None,
+    timeout: float = CONNECTIVITY_TIMEOUT,
+    sample_bytes: int = CONNECTIVITY_SAMPLE_BYTES
+) -> List[EndpointResult]:
+    """
+    Опросить точки проверки сети и зеркала и запомнить результат.
+    
+    Args:
+        endpoints: URL без зеркал (по умолчанию CONNECTIVITY_ENDPOINTS)
+        mirrors: Строки зеркал (по умолчанию CONNECTIVITY_MIRRORS)
+        timeout: Таймаут каждой точки
+        sample_bytes: Размер образца
+    
+    Returns:
+        Результаты: сначала endpoints, затем зеркала
+    """
+    global _last_results
+    
+    endpoints = CONNECTIVITY_ENDPOINTS if endpoints is None else endpoints
+    mirrors = CONNECTIVITY_MIRRORS if mirrors is None else mirrors
+    targets = [(url, None) for url in endpoints]
+    targets += [(mirror_probe_url(server), server) for server in mirrors]
+    
+    cassette = get_cassette()
+    key = ' '.join(url for url, _ in targets)
+    if cassette is not None and cassette.replaying:
+        entry = cassette.replay('netprobe', key)
+        delay = cassette.replay_delay(entry)
+        if delay:
+            time.sleep(delay)
+        results = [EndpointResult.from_dict(data) for data in json.loads(entry.stdout or '[]')]
+    else:
+        started = time.monotonic()
+        results = probe_endpoints(targets, timeout, sample_bytes)
+        if cassette is not None:
+            cassette.record(
+                'netprobe', key,
+                0 if any(r.ok for r in results) else 1,
+                stdout=json.dumps([r.to_dict() for r in results]),
+                duration=time.monotonic() - started
+            )
+    
+    for result in results:
+        logger.debug(f"Connectivity {result.summary()}")
+    with _results_lock:
+        _last_results = results
+    return results
+
+def last_results() -> List[EndpointResult]:
+    """Результаты последней check_connectivity (пустой список - не было)."""
+    with _results_lock:
+        return list(_last_results)
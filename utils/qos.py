@@ -0,0 +1,110 @@
+"""
+Классы приоритета (QoS) для выполняемых команд.
+
+foreground - критический путь установки (разметка, pacman, UI),
+команда запускается как есть. background - фоновая работа на
+пропускную способность (предзагрузка пакетов, опрос зеркал, сжатие
+логов): пониженный nice, низкий приоритет best-effort в ionice.
+idle - работа, которая может ждать сколько угодно: nice 19 и класс
+idle в ionice.
+
+Если в системе работает systemd, фоновые команды дополнительно
+запускаются в transient scope (systemd-run --scope) с низкими
+CPUWeight/IOWeight: веса cgroup ограничивают фон даже тогда, когда
+nice не помогает (например, при записи через page cache).
+"""
+
+import os
+from typing import Dict, List, Any
+from utils.lazy import lazy_module
+
+shutil = lazy_module('shutil')
+
+QOS_FOREGROUND = 'foreground'
+QOS_BACKGROUND = 'background'
+QOS_IDLE = 'idle'
+
+# Параметры классов: nice, класс/уровень ionice, веса cgroup v2 (по умолчанию 100)
+QOS_CLASSES: Dict[str, Dict[str, Any]] = {
+    QOS_FOREGROUND: {},
+    QOS_BACKGROUND: {
+        'nice': 10,
+        'ionice': ('2', '7'),
+        'cpu_weight': 20,
+        'io_weight': 20,
+    },
+    QOS_IDLE: {
+        'nice': 19,
+        'ionice': ('3', None),
+        'cpu_weight': 1,
+        'io_weight': 1,
+    },
+}
+
+# Найденные утилиты (shutil.which на каждую команду не нужен)
+_tools: Dict[str, bool] = {}
+
+def _has_tool(name: str) -> bool:
+    """Проверить наличие утилиты в PATH (с кэшированием)."""
+    if name not in _tools:
+        _tools[name] = shutil.which(name) is not None
+    return _tools[name]
+
+def _systemd_available() -> bool:
+    """True если PID 1 - systemd и есть systemd-run."""
+    return os.path.isdir('/run/systemd/system') and _has_tool('systemd-run')
+
+def validate_qos(qos: str) -> str:
+    """
+    Проверить имя класса QoS.
+    
+    Args:
+        qos: Имя класса
+    
+    Returns:
+        То же имя
+    
+    Raises:
+        ValueError: Если класс неизвестен
+    """
+    if qos not in QOS_CLASSES:
+        raise ValueError(f"Unknown QoS class: {qos}")
+    return qos
+
+def qos_prefix(qos: str, chroot: bool = False) -> List[str]:
+    """
+    Префикс argv, запускающий команду с приоритетом класса.
+    
+    Недоступные утилиты пропускаются: команда все равно выполнится,
+    просто без соответствующего ограничения. Для команд внутри chroot
+    наличие утилит проверить нельзя, поэтому используются только nice
+    (coreutils) и ionice (util-linux) из base, без systemd-run.
+    
+    Args:
+        qos: Класс QoS
+        chroot: Команда выполняется в устанавливаемой системе
+    
+    Returns:
+        Список аргументов (пустой для foreground)
+    """
+    params = QOS_CLASSES[validate_qos(qos)]
+    prefix: List[str] = []
+    
+    if not chroot and 'cpu_weight' in params and _systemd_available():
+        prefix += [
+            'systemd-run', '--scope', '--quiet', '--collect',
+            '-p', f"CPUWeight={params['cpu_weight']}",
+            '-p', f"IOWeight={params['io_weight']}",
+            '--',
+        ]
+    
+    if 'nice' in params and (chroot or _has_tool('nice')):
+        prefix += ['nice', '-n', str(params['nice'])]
+    
+    if 'ionice' in params and (chroot or _has_tool('ionice')):
+        io_class, level = params['ionice']
+        prefix += ['ionice', '-c', io_class]
+        if level is not None:
+            prefix += ['-n', level]
+    
+    return prefix
@@ -0,0 +1,267 @@
+"""
+Учет ресурсов, потребленных командами.
+
+Процессорное время и пиковая память берутся из rusage завершенного
+процесса (os.wait4), объем чтения и записи на диск - из /proc/<pid>/io
+самого процесса, который опрашивается в фоне, пока команда выполняется.
+Дерево потомков не обходится: завершенные потомки добавляют свои
+счетчики к родителю, так что к концу команды они уже учтены. Для команд
+chroot-сессии (у них нет отдельного процесса, которого можно дождаться)
+процессорное время и ввод-вывод считаются как разница счетчиков shell
+сессии до и после команды, пиковая память не известна.
+
+Учет выключен по умолчанию (RESOURCE_ACCOUNTING) и не ведется для
+проб (run_probe).
+"""
+
+import os
+import threading
+from typing import Optional, Dict, List, Any
+
+# Период опроса /proc во время выполнения команды (секунды)
+SAMPLE_INTERVAL = 0.5
+
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+def descendants(pid: int) -> List[int]:
+    """PID всех потомков процесса (по /proc)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Имя процесса в скобках может содержать пробелы
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    
+    result = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+def read_proc_io(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Счетчики ввода-вывода процесса из /proc/<pid>/io.
+    
+    Args:
+        pid: PID процесса
+    
+    Returns:
+        Словарь (rchar, wchar, read_bytes, write_bytes, ...) или None
+        если процесс завершился или нет доступа
+    """
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    
+    counters = {}
+    for line in lines:
+        key, _, value = line.partition(':')
+        if value.strip().isdigit():
+            counters[key] = int(value)
+    return counters
+
+def read_proc_cpu(pid: int) -> Optional[float]:
+    """
+    Процессорное время процесса вместе с завершенными потомками.
+    
+    Args:
+        pid: PID процесса
+    
+    Returns:
+        utime + stime + cutime + cstime в секундах или None
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    
+    # Поля 14-17 stat (utime, stime, cutime, cstime), отсчет от поля state
+    return sum(int(value) for value in fields[11:15]) / _CLK_TCK
+
+def read_proc_peak_rss(pid: int) -> Optional[int]:
+    """
+    Пиковый RSS процесса (VmHWM) в КиБ.
+    
+    Args:
+        pid: PID процесса
+    
+    Returns:
+        Размер в КиБ или None
+    """
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+class ResourceUsage:
+    """Ресурсы, потребленные одной командой."""
+    
+    def __init__(
+        self,
+        user_time: Optional[float] = None,
+        system_time: Optional[float] = None,
+        cpu_time: Optional[float] = None,
+        max_rss: Optional[int] = None,
+        read_bytes: Optional[int] = None,
+        write_bytes: Optional[int] = None
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            user_time: Время в режиме пользователя (секунды)
+            system_time: Время в режиме ядра (секунды)
+            cpu_time: Общее процессорное время (по умолчанию user + system)
+            max_rss: Пиковый RSS самого крупного процесса (КиБ)
+            read_bytes: Прочитано с блочных устройств (байт)
+            write_bytes: Записано на блочные устройства (байт)
+        """
+        self.user_time = user_time
+        self.system_time = system_time
+        if cpu_time is None and user_time is not None and system_time is not None:
+            cpu_time = user_time + system_time
+        self.cpu_time = cpu_time
+        self.max_rss = max_rss
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+    
+    @classmethod
+    def from_rusage(cls, rusage: Any) -> 'ResourceUsage':
+        """
+        Создать из результата os.wait4 / resource.getrusage.
+        
+        Args:
+            rusage: struct_rusage
+        
+        Returns:
+            ResourceUsage без счетчиков ввода-вывода
+        """
+        # ru_maxrss в Linux уже в КиБ
+        return cls(rusage.ru_utime, rusage.ru_stime, max_rss=rusage.ru_maxrss)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Заполненные поля для трассы и отчетов."""
+        data = {
+            'user_s': self.user_time,
+            'sys_s': self.system_time,
+            'cpu_s': self.cpu_time,
+            'max_rss_kb': self.max_rss,
+            'read_bytes': self.read_bytes,
+            'write_bytes': self.write_bytes,
+        }
+        return {
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in data.items()
+            if value is not None
+        }
+
+class ResourceSampler:
+    """
+    Фоновый опрос /proc/<pid> процесса одной команды.
+    
+    Счетчики корня включают только завершенных потомков: живые потомки
+    попадают в итог, когда корень их дождется. Обход всего /proc на каждом
+    опросе стоил дороже, чем сама точность промежуточных значений.
+    """
+    
+    def __init__(self, pid: int, include_root: bool = True, interval: float = SAMPLE_INTERVAL):
+        """
+        Инициализация.
+        
+        Args:
+            pid: Корневой процесс
+            include_root: Процесс - сама команда (False для shell chroot-сессии,
+                          которая живет всю установку: считается прирост
+                          счетчиков, пиковая память не снимается)
+            interval: Период опроса в секундах
+        """
+        self.pid = pid
+        self.include_root = include_root
+        self.interval = interval
+        self.read_bytes: Optional[int] = None
+        self.write_bytes: Optional[int] = None
+        self.cpu_time: Optional[float] = None
+        self.max_rss: Optional[int] = None
+        self._baseline: Optional[Dict[str, float]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def sample(self) -> None:
+        """Снять текущие значения счетчиков."""
+        io = read_proc_io(self.pid)
+        if io is None:
+            # Процесс уже завершился - оставляем последние значения
+            return
+        
+        if self.include_root:
+            rss = read_proc_peak_rss(self.pid)
+            if rss is not None:
+                self.max_rss = max(self.max_rss or 0, rss)
+        
+        counters = {
+            'read_bytes': io.get('read_bytes', 0),
+            'write_bytes': io.get('write_bytes', 0),
+            'cpu_time': read_proc_cpu(self.pid) or 0.0,
+        }
+        if self._baseline is None:
+            self._baseline = counters if not self.include_root else {key: 0 for key in counters}
+        
+        # Счетчики не убывают, но потомок может завершиться между чтениями
+        read_bytes = int(counters['read_bytes'] - self._baseline['read_bytes'])
+        write_bytes = int(counters['write_bytes'] - self._baseline['write_bytes'])
+        self.read_bytes = max(self.read_bytes or 0, read_bytes)
+        self.write_bytes = max(self.write_bytes or 0, write_bytes)
+        self.cpu_time = max(self.cpu_time or 0.0, counters['cpu_time'] - self._baseline['cpu_time'])
+    
+    def _loop(self) -> None:
+        """Опрос до вызова stop()."""
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def start(self) -> 'ResourceSampler':
+        """Снять начальные значения и запустить фоновый опрос."""
+        self.sample()
+        self._thread = threading.Thread(target=self._loop, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Остановить опрос и снять последние значения."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+    
+    def usage(self, rusage: Any = None) -> ResourceUsage:
+        """
+        Итог по команде.
+        
+        Args:
+            rusage: rusage из os.wait4 (точное процессорное время и память)
+        
+        Returns:
+            ResourceUsage
+        """
+        if rusage is not None:
+            usage = ResourceUsage.from_rusage(rusage)
+        else:
+            usage = ResourceUsage(cpu_time=self.cpu_time, max_rss=self.max_rss)
+        usage.read_bytes = self.read_bytes
+        usage.write_bytes = self.write_bytes
+        return usage
@@ -0,0 +1,123 @@
+"""
+Отчет о времени запуска установщика.
+
+Запускает отдельный интерпретатор с -X importtime, разбирает его вывод
+и показывает самые дорогие импорты, а также время `main.py --help`
+целиком. Используется командой main.py --import-report.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import List, Dict, Any
+from config import STARTUP_BUDGET_MS
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Разобрать вывод python -X importtime.
+    
+    Args:
+        output: stderr интерпретатора
+    
+    Returns:
+        Список {'module', 'self_us', 'cumulative_us', 'depth'} в порядке вывода
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # заголовок таблицы
+        name = parts[2].rstrip()
+        modules.append({
+            'module': name.strip(),
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+        })
+    return modules
+
+def measure_imports(target: str = 'main') -> List[Dict[str, Any]]:
+    """
+    Замерить импорт модуля в отдельном интерпретаторе.
+    
+    Args:
+        target: Имя модуля
+    
+    Returns:
+        Результат parse_importtime
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {target}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True
+    )
+    return parse_importtime(result.stderr)
+
+def measure_command(argv: List[str], runs: int = 3) -> float:
+    """
+    Лучшее время запуска команды в миллисекундах.
+    
+    Args:
+        argv: Аргументы python (например ['main.py', '--help'])
+        runs: Количество запусков
+    
+    Returns:
+        Минимальное время в мс
+    """
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argv],
+            cwd=PROJECT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def print_import_report(target: str = 'main', top: int = 20) -> bool:
+    """
+    Вывести отчет о времени импорта и запуска.
+    
+    Args:
+        target: Замеряемый модуль
+        top: Сколько самых дорогих модулей показать
+    
+    Returns:
+        True если `main.py --help` укладывается в STARTUP_BUDGET_MS
+    """
+    modules = measure_imports(target)
+    if not modules:
+        print(f"Failed to import {target}")
+        return False
+    
+    total = next((m for m in reversed(modules) if m['module'] == target), modules[-1])
+    own = [m for m in modules if m['module'].split('.')[0] in ('config', 'main', 'utils', 'ui', 'installer')]
+    
+    print(f"Import of '{target}': {total['cumulative_us'] / 1000:.1f} ms, {len(modules)} modules")
+    print()
+    print(f"{'self ms':>8} {'total ms':>9}  module (top {top} by self time)")
+    for module in sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top]:
+        print(f"{module['self_us'] / 1000:>8.1f} {module['cumulative_us'] / 1000:>9.1f}  {module['module']}")
+    
+    print()
+    print(f"{'self ms':>8} {'total ms':>9}  installer modules")
+    for module in sorted(own, key=lambda m: m['cumulative_us'], reverse=True):
+        print(f"{module['self_us'] / 1000:>8.1f} {module['cumulative_us'] / 1000:>9.1f}  {module['module']}")
+    
+    baseline = measure_command(['-c', 'pass'])
+    help_time = measure_command(['main.py', '--help'])
+    within = help_time <= STARTUP_BUDGET_MS
+    print()
+    print(f"Interpreter startup:  {baseline:.1f} ms")
+    print(f"main.py --help:       {help_time:.1f} ms "
+          f"(budget {STARTUP_BUDGET_MS} ms, {'OK' if within else 'OVER BUDGET'})")
+    return within
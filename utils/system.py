@@ -2,13 +2,13 @@
 Системные проверки и получение информации о системе.
 """
 
-import os
-import json
-import psutil
 from utils.logger import logger
-from utils.executor import run_command
+from utils.lazy import lazy_module
+from utils.hwprobe import get_hardware_snapshot, read_meminfo
 from typing import Dict, List, Optional
 
+psutil = lazy_module('psutil')
+
 def get_total_memory_gb() -> float:
     """
     Получить общий объем RAM в GB.
@@ -16,7 +16,7 @@ def get_total_memory_gb() -> float:
     Returns:
         Объем RAM в GB
     """
-    return psutil.virtual_memory().total / (1024 ** 3)
+    return get_hardware_snapshot().memory.total_gb
 
 def get_available_memory_gb() -> float:
     """
@@ -25,19 +25,26 @@ def get_available_memory_gb() -> float:
     Returns:
         Доступный объем RAM в GB
     """
-    return psutil.virtual_memory().available / (1024 ** 3)
+    # Свободная память меняется - читаем /proc/meminfo заново, без кэша
+    return read_meminfo().available_gb
 
-def get_cpu_info() -> Dict[str, any]:
+def get_cpu_info(brand: Optional[str] = None) -> Dict[str, any]:
     """
     Получить информацию о процессоре.
     
+    Args:
+        brand: Уже известный бренд процессора (иначе берется из снимка)
+    
     Returns:
         Словарь с информацией о CPU
     """
+    cpu = get_hardware_snapshot().cpu
     return {
-        'count': psutil.cpu_count(),
-        'percent': psutil.cpu_percent(interval=1),
-        'brand': get_cpu_brand()
+        'count': cpu.logical,
+        'physical_cores': cpu.physical_cores,
+        # Без interval: загрузка с прошлого вызова, без секундной паузы
+        'percent': psutil.cpu_percent(interval=None),
+        'brand': brand if brand is not None else cpu.brand
     }
 
 def get_cpu_brand() -> str:
@@ -47,15 +54,7 @@ def get_cpu_brand() -> str:
     Returns:
         Название процессора
     """
-    try:
-        returncode, output = run_command(
-            "grep -m1 'model name' /proc/cpuinfo | cut -d ':' -f 2",
-            check=False,
-            log=False
-        )
-        return output.strip() if returncode == 0 else "Unknown CPU"
-    except:
-        return "Unknown CPU"
+    return get_hardware_snapshot().cpu.brand
 
 def has_efi() -> bool:
     """
@@ -64,7 +63,7 @@ def has_efi() -> bool:
     Returns:
         True если система поддерживает EFI
     """
-    return os.path.exists('/sys/firmware/efi')
+    return get_hardware_snapshot().firmware.uefi
 
 def has_virtualization() -> bool:
     """
@@ -73,15 +72,7 @@ def has_virtualization() -> bool:
     Returns:
         True если поддерживается
     """
-    try:
-        returncode, output = run_command(
-            "grep -o 'vmx\\|svm' /proc/cpuinfo | head -1",
-            check=False,
-            log=False
-        )
-        return returncode == 0 and bool(output.strip())
-    except:
-        return False
+    return get_hardware_snapshot().cpu.virtualization is not None
 
 def get_system_info() -> Dict[str, any]:
     """
@@ -91,22 +82,46 @@ def get_system_info() -> Dict[str, any]:
         Словарь со всеми параметрами
     """
     logger.debug("Collecting system information...")
+    snapshot = get_hardware_snapshot()
+    
+    try:
+        cpu = get_cpu_info()
+    except ImportError as e:
+        # Без psutil нет только текущей загрузки процессора
+        logger.debug(f"CPU load unavailable: {e}")
+        cpu = {
+            'count': snapshot.cpu.logical,
+            'physical_cores': snapshot.cpu.physical_cores,
+            'percent': None,
+            'brand': snapshot.cpu.brand
+        }
     
     return {
-        'memory_gb': get_total_memory_gb(),
-        'cpu': get_cpu_info(),
-        'uefi': has_efi(),
-        'virtualization': has_virtualization(),
-        'platform': os.uname().machine,
-        'kernel': os.uname().release
+        'memory_gb': snapshot.memory.total_gb,
+        'cpu': cpu,
+        'uefi': snapshot.firmware.uefi,
+        'virtualization': snapshot.cpu.virtualization is not None,
+        'hypervisor': snapshot.cpu.hypervisor,
+        'vendor': snapshot.dmi.sys_vendor,
+        'product': snapshot.dmi.product_name,
+        'platform': snapshot.platform,
+        'kernel': snapshot.kernel
     }
 
-def print_system_info():
-    """Вывести информацию о системе в лог."""
-    info = get_system_info()
+def print_system_info(info: Optional[Dict[str, any]] = None):
+    """
+    Вывести информацию о системе в лог.
+    
+    Args:
+        info: Уже собранный результат get_system_info
+    """
+    if info is None:
+        info = get_system_info()
     logger.info("System Information:")
     logger.info(f"  RAM: {info['memory_gb']:.1f} GB")
     logger.info(f"  CPU cores: {info['cpu']['count']}")
     logger.info(f"  Boot mode: {'UEFI' if info['uefi'] else 'BIOS'}")
     logger.info(f"  Virtualization: {'Yes' if info['virtualization'] else 'No'}")
     logger.info(f"  Platform: {info['platform']}")
+    if info['product']:
+        logger.info(f"  Machine: {info['vendor'] or ''} {info['product']}".rstrip())
@@ -0,0 +1,221 @@
+"""
+Параллельное выполнение небольшого графа зависимых задач.
+
+Каждая задача - функция без аргументов, возвращающая True/False, со
+списком задач, от которых она зависит. Задача запускается в своем
+потоке, как только успешно завершились все ее зависимости; если
+зависимость не прошла, задача пропускается. run() ждет не дольше
+общего дедлайна. Фоновые задачи (background=True) дедлайн не ждет:
+они продолжают выполняться, и их результат можно дождаться позже
+через wait().
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Iterable
+
+# Состояния задачи
+PENDING = 'pending'
+RUNNING = 'running'
+PASSED = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+TIMED_OUT = 'timeout'
+
+class Task:
+    """Задача графа."""
+    
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], bool],
+        deps: Iterable[str] = (),
+        critical: bool = True,
+        background: bool = False
+    ):
+        """
+        Инициализация.
+        
+        Args:
+            name: Имя задачи
+            func: Функция, возвращающая True при успехе
+            deps: Имена задач, которые должны успешно завершиться раньше
+            critical: Провал задачи означает провал всего графа
+            background: Не ждать задачу в run() (дедлайн на нее не действует)
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.critical = critical
+        self.background = background
+        self.status = PENDING
+        self.started: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+class TaskGraph:
+    """Граф задач с параллельным запуском."""
+    
+    def __init__(self):
+        """Инициализация пустого графа."""
+        self.tasks: Dict[str, Task] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+    
+    def add(
+        self,
+        name: str,
+        func: Callable[[], bool],
+        deps: Iterable[str] = (),
+        critical: bool = True,
+        background: bool = False
+    ) -> Task:
+        """
+        Добавить задачу (зависимости должны быть добавлены раньше).
+        
+        Args:
+            name: Имя задачи
+            func: Функция, возвращающая True при успехе
+            deps: Зависимости
+            critical: Провал задачи - провал графа
+            background: Фоновая задача
+        
+        Returns:
+            Task
+        
+        Raises:
+            ValueError: Если имя занято или зависимость неизвестна
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Unknown dependency of {name}: {dep}")
+        task = Task(name, func, deps, critical, background)
+        self.tasks[name] = task
+        return task
+    
+    def _finish(self, task: Task, status: str, error: Optional[str] = None) -> None:
+        """Отметить завершение задачи, запустить зависящие от нее и разбудить ожидающих."""
+        with self._changed:
+            if task.status == TIMED_OUT:
+                return  # результат после дедлайна не учитывается
+            task.status = status
+            task.error = error
+            if task.started is not None:
+                task.duration = time.monotonic() - task.started
+            task.done.set()
+            self._start_ready()
+            self._changed.notify_all()
+    
+    def _execute(self, task: Task) -> None:
+        """Выполнить задачу в отдельном потоке."""
+        try:
+            status = PASSED if task.func() else FAILED
+            self._finish(task, status)
+        except Exception as e:
+            self._finish(task, FAILED, str(e))
+    
+    def _start_ready(self) -> None:
+        """
+        Запустить задачи с выполненными зависимостями (под блокировкой).
+        
+        Задачи добавляются после своих зависимостей, поэтому одного прохода
+        достаточно, чтобы пропуск распространился по всей цепочке.
+        """
+        for task in self.tasks.values():
+            if task.status != PENDING:
+                continue
+            deps = [self.tasks[dep] for dep in task.deps]
+            if any(dep.status in (FAILED, SKIPPED, TIMED_OUT) for dep in deps):
+                task.status = SKIPPED
+                task.done.set()
+                continue
+            if all(dep.status == PASSED for dep in deps):
+                task.status = RUNNING
+                task.started = time.monotonic()
+                threading.Thread(
+                    target=self._execute,
+                    args=(task,),
+                    name=f"task-{task.name}",
+                    daemon=True
+                ).start()
+    
+    def run(self, deadline: Optional[float] = None) -> bool:
+        """
+        Выполнить граф.
+        
+        Args:
+            deadline: Общее время ожидания в секундах (None - без ограничения)
+        
+        Returns:
+            True если ни одна критическая задача не провалилась
+        """
+        started = time.monotonic()
+        with self._changed:
+            self._start_ready()
+            while True:
+                waiting = [t for t in self.tasks.values() if not t.background and not t.done.is_set()]
+                if not waiting:
+                    break
+                remaining = None if deadline is None else deadline - (time.monotonic() - started)
+                if remaining is not None and remaining <= 0:
+                    for task in waiting:
+                        if task.status != RUNNING:
+                            continue
+                        # Поток задачи продолжит работу, но ее результат уже не учитывается
+                        task.status = TIMED_OUT
+                        task.duration = time.monotonic() - (task.started or started)
+                        task.done.set()
+                    # Зависящие задачи (в том числе фоновые) уже не запустятся:
+                    # пропустить их, чтобы wait() на них не ждал вечно
+                    self._start_ready()
+                    self._changed.notify_all()
+                    break
+                self._changed.wait(remaining)
+        
+        return not any(
+            task.critical and task.status in (FAILED, SKIPPED, TIMED_OUT)
+            for task in self.tasks.values()
+            if not task.background
+        )
+    
+    def wait(self, name: str, timeout: Optional[float] = None) -> Optional[bool]:
+        """
+        Дождаться задачи (обычно фоновой).
+        
+        Args:
+            name: Имя задачи
+            timeout: Максимальное ожидание в секундах
+        
+        Returns:
+            True/False - результат задачи, None - не завершилась за timeout
+        """
+        task = self.tasks[name]
+        if not task.done.wait(timeout):
+            return None
+        return task.status == PASSED
+    
+    def summary(self) -> List[str]:
+        """
+        Строки сводки: задача, состояние, время.
+        
+        Returns:
+            Список строк в порядке добавления задач
+        """
+        lines = []
+        for task in self.tasks.values():
+            if task.duration is not None:
+                duration = f"{task.duration * 1000:>8.0f} ms"
+            elif task.status == RUNNING:
+                duration = f"{(time.monotonic() - task.started) * 1000:>8.0f} ms+"
+            else:
+                duration = f"{'-':>8}"
+            line = f"{task.name:<24} {task.status:<8} {duration}"
+            if task.background:
+                line += ' (background)'
+            if task.error:
+                line += f" {task.error}"
+            lines.append(line)
+        return lines
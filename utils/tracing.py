@@ -0,0 +1,211 @@
+"""
+Трассировка установки в формате Chrome trace-event.
+Каждая команда и каждый этап установки записываются как span,
+результат открывается в chrome://tracing или ui.perfetto.dev.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Any, Iterator
+from config import TRACE_FILE
+from utils.logger import logger
+from utils.executor import CommandRecord, add_command_listener
+
+# Условный поток трассы для этапов установки
+STAGES_TID = 0
+
+class Tracer:
+    """Сборщик span'ов и запись их в JSON trace-event."""
+    
+    def __init__(self):
+        """Инициализация пустой трассы."""
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._origin = time.monotonic()
+        self._pid = os.getpid()
+        self._threads: Dict[int, int] = {}
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._stage_args: Dict[str, Any] = {}
+        self._add_thread_name(STAGES_TID, 'stages')
+    
+    def _ts(self, monotonic: float) -> int:
+        """Перевести time.monotonic() в микросекунды от начала трассы."""
+        return int((monotonic - self._origin) * 1_000_000)
+    
+    def _tid(self) -> int:
+        """Номер потока трассы для текущего потока Python."""
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            tid = len(self._threads) + 1
+            self._threads[ident] = tid
+            self._add_thread_name(tid, threading.current_thread().name)
+        return self._threads[ident]
+    
+    def _add_thread_name(self, tid: int, name: str) -> None:
+        """Добавить metadata-событие с именем потока."""
+        self.events.append({
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': self._pid,
+            'tid': tid,
+            'args': {'name': name}
+        })
+    
+    def complete(
+        self,
+        name: str,
+        started: float,
+        duration: float,
+        cat: str = 'installer',
+        tid: Optional[int] = None,
+        args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Записать завершенный span (событие "X").
+        
+        Args:
+            name: Имя span'а
+            started: Время начала по time.monotonic()
+            duration: Длительность в секундах
+            cat: Категория
+            tid: Поток трассы (по умолчанию текущий поток)
+            args: Дополнительные поля
+        """
+        with self._lock:
+            self.events.append({
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': self._ts(started),
+                'dur': int(duration * 1_000_000),
+                'pid': self._pid,
+                'tid': self._tid() if tid is None else tid,
+                'args': args or {}
+            })
+    
+    @contextmanager
+    def span(self, name: str, cat: str = 'installer', **args) -> Iterator[None]:
+        """
+        Записать span вокруг блока кода.
+        
+        Args:
+            name: Имя span'а
+            cat: Категория
+            **args: Дополнительные поля
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.complete(name, started, time.monotonic() - started, cat=cat, args=args)
+    
+    def record_command(self, record: CommandRecord) -> None:
+        """
+        Записать выполненную команду (наблюдатель executor).
+        
+        Args:
+            record: Сведения о команде
+        """
+        args = {
+            'cmd': record.cmd,
+            'pid': record.pid,
+            'returncode': record.returncode,
+            'wall_s': round(record.duration, 6),
+            'output_bytes': record.output_bytes,
+            'stage': self._stage
+        }
+        if record.usage is not None:
+            args.update(record.usage.to_dict())
+        
+        self.complete(
+            record.cmd.split('\n', 1)[0][:60],
+            record.started,
+            record.duration,
+            cat=record.kind,
+            args=args
+        )
+    
+    def begin_stage(self, name: str, **args) -> None:
+        """
+        Начать этап установки (предыдущий этап завершается).
+        
+        Args:
+            name: Ключ этапа
+            **args: Дополнительные поля
+        """
+        self.end_stage()
+        self._stage = name
+        self._stage_started = time.monotonic()
+        self._stage_args = args
+    
+    def end_stage(self) -> None:
+        """Завершить текущий этап, если он есть."""
+        if self._stage is None:
+            return
+        self.complete(
+            self._stage,
+            self._stage_started,
+            time.monotonic() - self._stage_started,
+            cat='stage',
+            tid=STAGES_TID,
+            args=self._stage_args
+        )
+        self._stage = None
+    
+    def stage_durations(self) -> List[Tuple[str, float]]:
+        """
+        Завершенные этапы в порядке выполнения.
+        
+        Returns:
+            Список (ключ этапа, длительность в секундах)
+        """
+        with self._lock:
+            return [
+                (event['name'], event['dur'] / 1_000_000)
+                for event in self.events
+                if event.get('cat') == 'stage'
+            ]
+    
+    @property
+    def current_stage(self) -> Optional[str]:
+        """Ключ текущего этапа или None."""
+        return self._stage
+    
+    def save(self, path: str = TRACE_FILE) -> bool:
+        """
+        Записать трассу в файл.
+        
+        Args:
+            path: Путь к JSON-файлу
+        
+        Returns:
+            True если успешно
+        """
+        try:
+            with self._lock:
+                data = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            logger.debug(f"Trace written to {path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write trace: {e}")
+            return False
+
+# Глобальный трассировщик
+tracer = Tracer()
+add_command_listener(tracer.record_command)
+
+@atexit.register
+def _save_trace_at_exit() -> None:
+    """Сохранить трассу при выходе, если что-то было записано."""
+    tracer.end_stage()
+    if any(event['ph'] == 'X' for event in tracer.events):
+        tracer.save()
@@ -2,28 +2,45 @@
 Валидация данных пользователя.
 """
 
+import os
 import re
 import subprocess
+from typing import Tuple, Optional
 from utils.logger import logger
-from utils.executor import run_command, command_exists
-from config import t
+from utils.executor import Cmd, run_command, command_exists
+from utils.qos import QOS_FOREGROUND, QOS_BACKGROUND
+from utils.taskgraph import TaskGraph
+from utils.netprobe import check_connectivity
+from utils.keyring import KeyringState, load_keyring_state, save_keyring_state
+from utils.hwprobe import read_block_device
+from config import t, COMMAND_TIMEOUTS, PREREQUISITE_DEADLINE
+
+# Команды, без которых установка невозможна
+REQUIRED_COMMANDS = ['lsblk', 'parted', 'mkfs.ext4', 'pacstrap', 'arch-chroot']
+
+# Граф последнего запуска проверок: инициализация ключей pacman
+# продолжается в фоне и после возврата из check_all_prerequisites
+_prerequisites: Optional[TaskGraph] = None
 
 def check_internet() -> bool:
     """
     Проверить подключение к интернету.
-    Пингует archlinux.org
+    Одновременно опрашивает archlinux.org и зеркала (utils.netprobe);
+    результаты сохраняются для выбора зеркал.
     
     Returns:
-        True если есть интернет
+        True если ответила хотя бы одна точка
     """
     logger.info("Checking internet connection...")
-    returncode, _ = run_command(
-        "ping -c 1 archlinux.org",
-        check=False,
-        log=False
-    )
-    result = returncode == 0
-    logger.info(f"Internet check: {'OK' if result else 'FAILED'}")
+    results = check_connectivity()
+    reachable = [r for r in results if r.ok]
+    result = bool(reachable)
+    if result:
+        fastest = min(r.connect_ms for r in reachable)
+        logger.info(f"Internet check: OK ({len(reachable)}/{len(results)} endpoints, "
+                    f"best connect {fastest:.0f} ms)")
+    else:
+        logger.info("Internet check: FAILED")
     return result
 
 def check_boot_mode() -> bool:
@@ -36,40 +53,65 @@ def check_boot_mode() -> bool:
     import os
     return os.path.exists('/sys/firmware/efi')
 
-def check_disk_space(disk: str, required_gb: int) -> bool:
+def check_disk_space(disk: str, required_gb: Optional[float] = None) -> bool:
     """
     Проверить достаточно ли места на диске.
+    Без required_gb нужное место оценивается по полному набору пакетов
+    текущей конфигурации и базам синхронизации pacman (installer.sizing)
+    и сравнивается с корневым разделом после разметки.
     
     Args:
         disk: Путь к диску (например /dev/sda)
-        required_gb: Требуемое место в GB
+        required_gb: Требуемое место в GB (None - оценить)
     
     Returns:
         True если места достаточно
     """
+    # Отложенный импорт: installer.* сам импортирует validators
+    from installer.sizing import estimate_disk_usage, root_partition_bytes
+    
     try:
-        returncode, output = run_command(
-            f"lsblk -J -o NAME,SIZE {disk}",
-            check=False,
-            log=False
-        )
-        # Простая проверка - можно расширить
-        return returncode == 0
+        device = read_block_device(disk)
+        if not device.exists or not device.size_bytes:
+            logger.error(f"Disk {disk} not found")
+            return False
+        
+        if required_gb is not None:
+            available = root_partition_bytes(device.size_bytes)
+            result = required_gb * 1024 ** 3 <= available
+        else:
+            result = bool(estimate_disk_usage(disk_bytes=device.size_bytes).fits)
+        
+        logger.info(f"Disk space check for {disk}: {'OK' if result else 'FAILED'}")
+        return result
     except Exception as e:
         logger.error(f"Failed to check disk space: {e}")
         return False
 
-def check_pacman_keys() -> bool:
+def check_pacman_keys(qos: str = QOS_FOREGROUND) -> bool:
     """
     Инициализация ключей pacman.
+    Связка не перестраивается, если ее отпечаток совпадает с сохраненным
+    после прошлого успешного --populate (utils.keyring).
+    
+    Args:
+        qos: Класс приоритета команд pacman-key
     
     Returns:
         True если успешно
     """
+    state = KeyringState()
+    if state.initialized and state.fingerprint == load_keyring_state():
+        logger.info(f"Pacman keyring is up to date (archlinux-keyring {state.keyring_version}), skipping")
+        return True
+    
     logger.info("Initializing pacman keys...")
     try:
-        run_command("pacman-key --init", check=True, log=True)
-        run_command("pacman-key --populate archlinux", check=True, log=True)
+        limits = COMMAND_TIMEOUTS['pacman_key']
+        if not state.initialized:
+            run_command(Cmd(['pacman-key', '--init']), check=True, log=True, qos=qos, **limits)
+        run_command(Cmd(['pacman-key', '--populate', 'archlinux']), check=True, log=True, qos=qos, **limits)
+        save_keyring_state(KeyringState())
         return True
     except Exception as e:
         logger.error(f"Failed to initialize pacman keys: {e}")
@@ -121,42 +163,106 @@ def validate_password(password: str) -> Tuple[bool, str]:
         return False, "Password must be at least 6 characters"
     return True, "Password is valid"
 
-def check_all_prerequisites() -> bool:
+def check_root() -> bool:
     """
-    Запустить все проверки перед установкой.
+    Проверить запуск от root.
     
     Returns:
-        True если все проверки пройдены
+        True если euid = 0
     """
-    logger.info("=" * 50)
-    logger.info("Running prerequisite checks...")
-    logger.info("=" * 50)
-    
-    # Проверка root
-    import os
     if os.geteuid() != 0:
         logger.error("This script must be run as root!")
         return False
+    return True
+
+def check_required_command(cmd: str) -> bool:
+    """
+    Проверить наличие обязательной команды.
+    
+    Args:
+        cmd: Имя команды
     
-    # Проверка интернета
+    Returns:
+        True если команда есть
+    """
+    if not command_exists(cmd):
+        logger.error(f"Required command not found: {cmd}")
+        return False
+    return True
+
+def _check_internet_required() -> bool:
+    """Проверка интернета как обязательное условие."""
     if not check_internet():
         logger.error("No internet connection!")
         return False
-    
-    # Проверка pacman keys
-    if not check_pacman_keys():
+    return True
+
+def _init_pacman_keys_background() -> bool:
+    """Инициализация ключей pacman с фоновым приоритетом."""
+    if not check_pacman_keys(qos=QOS_BACKGROUND):
         logger.warning("Failed to initialize pacman keys")
-        # Не критично, продолжаем
+        return False
+    return True
+
+def check_all_prerequisites(deadline: float = PREREQUISITE_DEADLINE) -> bool:
+    """
+    Запустить все проверки перед установкой.
     
-    # Проверка необходимых команд
-    required_commands = ['lsblk', 'parted', 'mkfs.ext4', 'pacstrap', 'arch-chroot']
-    for cmd in required_commands:
-        if not command_exists(cmd):
-            logger.error(f"Required command not found: {cmd}")
-            return False
+    Проверки выполняются параллельно как граф зависимостей и ждутся не
+    дольше deadline секунд. Инициализация ключей pacman некритична и
+    продолжается в фоне, пока запускается интерфейс; перед установкой
+    пакетов ее нужно дождаться через wait_for_pacman_keys().
+    
+    Args:
+        deadline: Общее время на обязательные проверки в секундах
+    
+    Returns:
+        True если все проверки пройдены
+    """
+    global _prerequisites
+    
+    logger.info("=" * 50)
+    logger.info("Running prerequisite checks...")
+    logger.info("=" * 50)
+    
+    graph = TaskGraph()
+    graph.add('root', check_root)
+    graph.add('internet', _check_internet_required)
+    graph.add('pacman_keys', _init_pacman_keys_background, deps=['root'], critical=False, background=True)
+    for cmd in REQUIRED_COMMANDS:
+        graph.add(f"command:{cmd}", lambda cmd=cmd: check_required_command(cmd))
+    _prerequisites = graph
+    
+    passed = graph.run(deadline)
+    
+    logger.info("Prerequisite check timings:")
+    for line in graph.summary():
+        logger.info(f"  {line}")
+    
+    if not passed:
+        logger.error(f"Prerequisite checks failed (deadline {deadline:.0f}s)")
+        return False
     
     logger.info("All prerequisite checks passed!")
     logger.info("=" * 50)
     return True
 
-from typing import Tuple
+def wait_for_pacman_keys(timeout: Optional[float] = None) -> bool:
+    """
+    Дождаться фоновой инициализации ключей pacman.
+    
+    Args:
+        timeout: Максимальное ожидание в секундах
+    
+    Returns:
+        True если ключи готовы (или проверки не запускались)
+    """
+    if _prerequisites is None:
+        return True
+    
+    logger.info("Waiting for pacman keyring initialization...")
+    result = _prerequisites.wait('pacman_keys', timeout)
+    if result is None:
+        logger.warning("Pacman keyring initialization is still running")
+        return False
+    return result